@@ -0,0 +1,52 @@
+"""
+Фоновое удаление аккаунтов.
+
+DELETE /api/users/profile только помечает пользователя (deletion_requested_at)
+и ставит задачу. Задача удаляет строки порциями по ACCOUNT_PURGE_CHUNK_SIZE,
+фиксируя каждую порцию отдельно, чтобы блокировка записи SQLite освобождалась
+для других пользователей. Незавершенные задачи возобновляются при старте приложения;
+при остановке задача, запущенная на старте, прерывается после текущей порции (stop).
+"""
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import User, SleepRecord, Goal, Reminder, Tombstone
+
+# Заметки удаляются вместе с записями сна (ON DELETE CASCADE), статистика - вместе с пользователем
+PURGED_MODELS = (SleepRecord, Goal, Reminder, Tombstone)
+
+
+def _delete_chunk(db: Session, model, user_id: int, chunk_size: int) -> int:
+    ids = select(model.id).where(model.user_id == user_id).limit(chunk_size).scalar_subquery()
+    return db.execute(delete(model).where(model.id.in_(ids))).rowcount
+
+
+def purge_user(bind, user_id: int, chunk_size: int = None, pause: float = None, stop=None) -> bool:
+    """Удаляет данные пользователя; False, если прервано через stop (threading.Event)."""
+    chunk_size = chunk_size or settings.ACCOUNT_PURGE_CHUNK_SIZE
+    pause = settings.ACCOUNT_PURGE_PAUSE_MS / 1000 if pause is None else pause
+    with Session(bind=bind) as db:
+        for model in PURGED_MODELS:
+            while _delete_chunk(db, model, user_id, chunk_size):
+                db.commit()
+                if stop is not None and stop.is_set():
+                    return False
+                if pause:
+                    time.sleep(pause)
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+    return True
+
+
+def pending_user_ids(bind) -> list:
+    with Session(bind=bind) as db:
+        return db.scalars(select(User.id).where(User.deletion_requested_at.is_not(None))).all()
+
+
+def purge_pending(bind, user_ids=None, stop=None):
+    for user_id in pending_user_ids(bind) if user_ids is None else user_ids:
+        if not purge_user(bind, user_id, stop=stop):
+            return
@@ -0,0 +1,47 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models import SleepRecord
+
+# Агрегаты по записям сна: имя поля в ответе -> SQL-выражение.
+# Новая метрика добавляется одной строкой и попадает в тот же SELECT.
+SLEEP_AGGREGATES = {
+    "total_records": func.count(SleepRecord.id),
+    "average_duration": func.avg(SleepRecord.duration),
+    "average_quality": func.avg(SleepRecord.quality),
+    "max_duration": func.max(SleepRecord.duration),
+    "min_duration": func.min(SleepRecord.duration),
+    "duration_sum": func.coalesce(func.sum(SleepRecord.duration), 0.0),
+    "duration_sq_sum": func.coalesce(func.sum(SleepRecord.duration * SleepRecord.duration), 0.0),
+    "quality_sum": func.coalesce(func.sum(SleepRecord.quality), 0),
+    "quality_sq_sum": func.coalesce(func.sum(SleepRecord.quality * SleepRecord.quality), 0),
+    "deep_sleep_sum": func.coalesce(func.sum(SleepRecord.deep_sleep), 0.0),
+    "deep_sleep_count": func.count(SleepRecord.deep_sleep),
+    "light_sleep_sum": func.coalesce(func.sum(SleepRecord.light_sleep), 0.0),
+    "light_sleep_count": func.count(SleepRecord.light_sleep),
+    "rem_sleep_sum": func.coalesce(func.sum(SleepRecord.rem_sleep), 0.0),
+    "rem_sleep_count": func.count(SleepRecord.rem_sleep),
+}
+
+
+def sleep_aggregates_statement(fields=None):
+    names = fields or list(SLEEP_AGGREGATES)
+    return select(*(SLEEP_AGGREGATES[name].label(name) for name in names))
+
+
+def get_sleep_aggregates(db: Session, user_id: int, fields=None) -> dict:
+    stmt = sleep_aggregates_statement(fields).where(SleepRecord.user_id == user_id)
+    return dict(db.execute(stmt).one()._mapping)
+
+
+def get_sleep_aggregates_by_user(db: Session, user_ids, fields=None) -> dict:
+    stmt = (
+        sleep_aggregates_statement(fields)
+        .add_columns(SleepRecord.user_id)
+        .where(SleepRecord.user_id.in_(user_ids))
+        .group_by(SleepRecord.user_id)
+    )
+    result = {}
+    for row in db.execute(stmt):
+        values = dict(row._mapping)
+        result[values.pop("user_id")] = values
+    return result
@@ -0,0 +1,142 @@
+"""Async-режим роутов (settings.DB_ASYNC).
+
+Обработчики и зависимости написаны для синхронной Session. В async-режиме
+каждый роутер копируется: Depends(get_db) заменяется на AsyncSession, а тело
+синхронного обработчика выполняется через AsyncSession.run_sync - в greenlet
+на event loop, поэтому запросы к БД идут через async-драйвер (aiosqlite, asyncpg)
+без потока из пула на каждый запрос. Асинхронные обработчики получают
+AsyncSession и обращаются к БД через run_db.
+"""
+import dataclasses
+import inspect
+from fastapi import APIRouter, Depends, params
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import database
+from app.database import get_async_db, get_db
+
+# По этому ключу в Session.info синхронная сессия находит свою AsyncSession
+ASYNC_SESSION_KEY = "async_session"
+# Скрытый параметр обертки: сессия, в которой выполняется синхронное тело
+_SESSION_PARAM = "_async_session"
+
+ROUTE_ATTRS = (
+    "response_model", "status_code", "tags", "dependencies", "summary", "description",
+    "response_description", "responses", "deprecated", "methods", "operation_id",
+    "response_model_include", "response_model_exclude", "response_model_by_alias",
+    "response_model_exclude_unset", "response_model_exclude_defaults", "response_model_exclude_none",
+    "include_in_schema", "response_class", "name", "callbacks", "openapi_extra",
+    "generate_unique_id_function", "strict_content_type",
+)
+
+_converted = {}
+
+
+async def run_db(db, fn, *args):
+    """Вызывает fn(session, *args): через run_sync для AsyncSession, иначе в пуле потоков."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+def _async_session(db):
+    return db.info.get(ASYNC_SESSION_KEY)
+
+
+def stream_in_session(db, iterator):
+    """Итератор, читающий из db, в виде, пригодном для StreamingResponse."""
+    async_db = _async_session(db)
+    if async_db is None:
+        return iterator
+
+    async def chunks():
+        # Каждый шаг - отдельный run_sync: курсор читается через async-драйвер
+        while (chunk := await async_db.run_sync(lambda _: next(iterator, None))) is not None:
+            yield chunk
+
+    return chunks()
+
+
+def thread_bind(db):
+    """Движок для фоновых задач в потоках: async-движок вне event loop не работает."""
+    if _async_session(db) is not None:
+        return database.engine
+    return db.get_bind()
+
+
+def _convert_parameters(fn):
+    parameters, session_names, changed = [], [], False
+    for parameter in inspect.signature(fn).parameters.values():
+        default = parameter.default
+        if isinstance(default, params.Depends) and default.dependency is not None:
+            if default.dependency is get_db:
+                session_names.append(parameter.name)
+                parameter = parameter.replace(
+                    default=dataclasses.replace(default, dependency=get_async_db), annotation=AsyncSession
+                )
+                changed = True
+            else:
+                dependency = async_endpoint(default.dependency)
+                if dependency is not default.dependency:
+                    parameter = parameter.replace(default=dataclasses.replace(default, dependency=dependency))
+                    changed = True
+        parameters.append(parameter)
+    return parameters, session_names, changed
+
+
+def async_endpoint(fn):
+    """Async-версия обработчика или зависимости; fn без обращений к get_db возвращается как есть."""
+    if fn in _converted:
+        return _converted[fn]
+    if not inspect.isfunction(fn):
+        return fn
+    parameters, session_names, changed = _convert_parameters(fn)
+    if not changed:
+        _converted[fn] = fn
+        return fn
+
+    if inspect.iscoroutinefunction(fn):
+        async def wrapper(**kwargs):
+            return await fn(**kwargs)
+    else:
+        parameters.append(inspect.Parameter(
+            _SESSION_PARAM, inspect.Parameter.KEYWORD_ONLY,
+            default=Depends(get_async_db), annotation=AsyncSession
+        ))
+
+        async def wrapper(**kwargs):
+            db = kwargs.pop(_SESSION_PARAM)
+            db.sync_session.info[ASYNC_SESSION_KEY] = db
+
+            def call(session):
+                return fn(**{**kwargs, **{name: session for name in session_names}})
+
+            return await db.run_sync(call)
+
+    wrapper.__name__ = fn.__name__
+    wrapper.__qualname__ = fn.__qualname__
+    wrapper.__doc__ = fn.__doc__
+    wrapper.__module__ = fn.__module__
+    wrapper.__signature__ = inspect.signature(fn).replace(parameters=_ordered(parameters))
+    _converted[fn] = wrapper
+    return wrapper
+
+
+def _ordered(parameters):
+    # Скрытый keyword-only параметр после всех остальных
+    return sorted(parameters, key=lambda parameter: parameter.kind)
+
+
+def async_router(router: APIRouter) -> APIRouter:
+    """Копия роутера с async-обработчиками на AsyncSession."""
+    converted = APIRouter()
+    for route in router.routes:
+        if isinstance(route, APIRoute):
+            converted.add_api_route(
+                route.path, async_endpoint(route.endpoint),
+                **{attr: getattr(route, attr) for attr in ROUTE_ATTRS}
+            )
+        else:
+            converted.routes.append(route)
+    return converted
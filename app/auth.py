@@ -1,10 +1,17 @@
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import hashlib
+import threading
+import time
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from app.database import get_db
+from app.cache import LRUCache
+from app.config import settings
 
 SECRET_KEY = "my_secret_key_for_sleep_tracker_app_12345"
 ALGORITHM = "HS256"
@@ -12,6 +19,13 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 security = HTTPBearer()
 
+# Пользователь по subject токена: повторные запросы не ходят в таблицу users
+principal_cache = LRUCache(
+    "principal", settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+# Проверенные claims по sha256 токена: запись живет не дольше, чем до exp
+token_cache = LRUCache("token", settings.TOKEN_CACHE_SIZE)
+
 def get_password_hash(password: str):
     pwd_bytes = password.encode('utf-8')
     salt = bcrypt.gensalt()
@@ -23,6 +37,61 @@ def verify_password(plain_password: str, hashed_password: str):
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(pwd_bytes, hashed_bytes)
 
+class PasswordHashPool:
+    """Ограниченный пул для bcrypt с учетом задач в очереди."""
+    
+    def __init__(self, kind: str, workers: int):
+        self.kind = kind
+        self.workers = workers
+        self.in_flight = 0
+        self.completed = 0
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+    
+    async def run(self, func, *args):
+        executor = self._get_executor()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+    
+    def stats(self) -> dict:
+        in_flight = self.in_flight
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - self.workers, 0),
+            "completed": self.completed,
+        }
+    
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_EXECUTOR, settings.PASSWORD_HASH_WORKERS)
+
+async def get_password_hash_async(password: str):
+    return await password_pool.run(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -30,6 +99,32 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> dict:
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    claims = token_cache.get(digest)
+    if claims is not None:
+        return claims
+    
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    exp = claims.get("exp")
+    if exp is not None and exp > time.time():
+        token_cache.set(digest, claims, ttl=exp - time.time())
+    return claims
+
+def invalidate_principal(username: str):
+    principal_cache.pop(username)
+
+def _principal_data(user) -> dict:
+    return {column.key: getattr(user, column.key) for column in user.__table__.columns}
+
+def _attach_principal(db: Session, data: dict):
+    from app.models import User
+    
+    # Объект из кэша присоединяется к сессии без SELECT и ведет себя как загруженный
+    user = User(**data)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -44,14 +139,19 @@ def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    cached = principal_cache.get(username)
+    if cached is not None:
+        return _attach_principal(db, cached)
+    
+    user = db.query(User).filter(User.username == username, User.deletion_requested_at.is_(None)).first()
     if user is None:
         raise credentials_exception
+    principal_cache.set(username, _principal_data(user))
     return user
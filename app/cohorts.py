@@ -0,0 +1,197 @@
+"""
+Сравнение с пользователями своего возраста (таблица cohort_rollups).
+
+Пакетная задача делит пользователей с указанным возрастом на порции по id,
+считает для каждой порции средние длительность и качество сна пользователей
+и раскладывает их в гистограммы по возрастным группам. Порции обрабатываются
+в пуле процессов (у каждого процесса свой движок БД); частичные гистограммы
+сливаются сложением и заменяют таблицу в одной транзакции. Аккаунты,
+ожидающие удаления, не учитываются.
+
+Запрос рекомендаций читает одну строку своей группы и находит перцентиль
+пользователя по гистограмме, не обращаясь к строкам других пользователей.
+
+Пересчет: python -m app.cohorts rebuild [--workers N] [--chunk-size N]
+(--workers 0 - без пула, в текущем процессе)
+"""
+import argparse
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.aggregates import get_sleep_aggregates_by_user
+from app.cache import LRUCache
+from app.config import settings
+from app.database import Base, SessionLocal, create_db_engine, engine
+from app.duration_sketch import DurationSketch
+from app.models import CohortRollup, User
+
+# Нижние границы возрастных групп
+AGE_BUCKETS = (0, 18, 25, 35, 45, 55, 65)
+
+
+class QualitySketch(DurationSketch):
+    """Гистограмма среднего качества сна (1-10) с шагом 0.1."""
+    __slots__ = ()
+    bins_per_unit = 10
+    bins = 10 * 10 + 1
+
+
+cohort_cache = LRUCache("cohorts", len(AGE_BUCKETS), ttl=settings.COHORT_CACHE_TTL_SECONDS)
+
+
+def age_bucket(age: int) -> int:
+    return AGE_BUCKETS[max(bisect_right(AGE_BUCKETS, age) - 1, 0)]
+
+
+def age_group_label(bucket: int) -> str:
+    index = AGE_BUCKETS.index(bucket)
+    if index == len(AGE_BUCKETS) - 1:
+        return f"{bucket}+"
+    return f"{bucket}-{AGE_BUCKETS[index + 1] - 1}"
+
+
+def chunk_histograms(db: Session, user_ids) -> dict:
+    """Частичные гистограммы порции: {группа: [пользователей, DurationSketch, QualitySketch]}."""
+    ages = dict(db.execute(select(User.id, User.age).where(User.id.in_(user_ids))).all())
+    aggregates = get_sleep_aggregates_by_user(db, user_ids, ["total_records", "average_duration", "average_quality"])
+    histograms = {}
+    for user_id, values in aggregates.items():
+        if not values["total_records"]:
+            continue
+        bucket = age_bucket(ages[user_id])
+        if bucket not in histograms:
+            histograms[bucket] = [0, DurationSketch(), QualitySketch()]
+        histogram = histograms[bucket]
+        histogram[0] += 1
+        histogram[1].add([values["average_duration"]])
+        histogram[2].add([values["average_quality"]])
+    return histograms
+
+
+_worker_engine = None
+
+
+def _init_worker(database_url: str):
+    global _worker_engine
+    _worker_engine = create_db_engine(database_url)
+
+
+def _worker_chunk(user_ids) -> dict:
+    with Session(bind=_worker_engine) as db:
+        return chunk_histograms(db, user_ids)
+
+
+def _user_id_chunks(db: Session, chunk_size: int):
+    last_id = 0
+    while True:
+        user_ids = db.scalars(
+            select(User.id)
+            .where(User.id > last_id, User.age.is_not(None), User.deletion_requested_at.is_(None))
+            .order_by(User.id)
+            .limit(chunk_size)
+        ).all()
+        if not user_ids:
+            return
+        yield user_ids
+        last_id = user_ids[-1]
+
+
+def rebuild_cohorts(db: Session, workers: int = 0, chunk_size: int = 1000, progress=None) -> dict:
+    """Пересчитывает cohort_rollups; возвращает {группа: число пользователей}."""
+    chunks = _user_id_chunks(db, chunk_size)
+    totals = {}
+    with ExitStack() as stack:
+        if workers:
+            url = db.get_bind().url.render_as_string(hide_password=False)
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(url,))
+            )
+            partials = executor.map(_worker_chunk, chunks)
+        else:
+            partials = (chunk_histograms(db, user_ids) for user_ids in chunks)
+        
+        for done, partial in enumerate(partials, start=1):
+            for bucket, (users, durations, qualities) in partial.items():
+                if bucket not in totals:
+                    totals[bucket] = [0, DurationSketch(), QualitySketch()]
+                total = totals[bucket]
+                total[0] += users
+                total[1].merge(durations)
+                total[2].merge(qualities)
+            if progress:
+                progress(done)
+
+    now = datetime.now(timezone.utc)
+    db.execute(delete(CohortRollup))
+    if totals:
+        db.execute(insert(CohortRollup), [
+            {
+                "age_bucket": bucket,
+                "user_count": users,
+                "duration_sketch": durations.dumps(),
+                "quality_sketch": qualities.dumps(),
+                "updated_at": now,
+            }
+            for bucket, (users, durations, qualities) in totals.items()
+        ])
+    db.commit()
+    cohort_cache.clear()
+    return {bucket: total[0] for bucket, total in totals.items()}
+
+
+def _get_cohort(db: Session, bucket: int):
+    cohort = cohort_cache.get(bucket)
+    if cohort is None:
+        row = db.get(CohortRollup, bucket)
+        if row is None:
+            return None
+        cohort = (row.user_count, DurationSketch.loads(row.duration_sketch), QualitySketch.loads(row.quality_sketch))
+        cohort_cache.set(bucket, cohort)
+    return cohort
+
+
+def cohort_comparison(db: Session, age: int, average_duration: float, average_quality: float):
+    """Перцентиль пользователя в его возрастной группе или None, если группа слишком мала."""
+    if age is None:
+        return None
+    bucket = age_bucket(age)
+    cohort = _get_cohort(db, bucket)
+    if cohort is None or cohort[0] < settings.COHORT_MIN_USERS:
+        return None
+    users, durations, qualities = cohort
+    return {
+        "age_group": age_group_label(bucket),
+        "users": users,
+        "duration_percentile": round(durations.rank(average_duration) * 100),
+        "quality_percentile": round(qualities.rank(average_quality) * 100),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пересчет таблицы cohort_rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        cohorts = rebuild_cohorts(
+            db, args.workers, args.chunk_size, progress=lambda n: print(f"Обработано порций: {n}")
+        )
+    finally:
+        db.close()
+    for bucket in sorted(cohorts):
+        print(f"{age_group_label(bucket)}: {cohorts[bucket]} пользователей")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,55 @@ class Settings:
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./sleep_tracker.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Async-стек (app/async_routes.py): AsyncSession и async-обработчики всех роутов. Драйвер
+    # выводится из DATABASE_URL (sqlite -> aiosqlite, postgresql -> asyncpg) или задается явно
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "0").lower() not in ("0", "false", "no")
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    
+    # GET /metrics и сбор метрик запросов (app/metrics.py)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+    
+    # Операторы дольше порога пишутся в лог app.query_stats вместе с маршрутом
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    
+    # SQLite: применяются к каждому новому соединению
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # < 0 - размер в КиБ
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
+    # Число потоков для синхронных обработчиков и зависимостей (по умолчанию в Starlette 40)
+    THREADPOOL_SIZE: int = int(os.getenv("THREADPOOL_SIZE", "40"))
+    
+    # Фоновое удаление аккаунтов: строки удаляются порциями, каждая - своя короткая транзакция
+    ACCOUNT_PURGE_CHUNK_SIZE: int = int(os.getenv("ACCOUNT_PURGE_CHUNK_SIZE", "100"))
+    ACCOUNT_PURGE_PAUSE_MS: float = float(os.getenv("ACCOUNT_PURGE_PAUSE_MS", "5"))
+    
+    # GET /api/sync: курсор отстает от момента выборки, чтобы не пропустить строки, чей updated_at
+    # выставлен до выборки, а commit случился после (клиент убирает повторы по id)
+    SYNC_CURSOR_OVERLAP_SECONDS: float = float(os.getenv("SYNC_CURSOR_OVERLAP_SECONDS", "30"))
+    
+    # Сравнение с возрастной группой (app/cohorts.py): группы меньше порога не показываются
+    COHORT_MIN_USERS: int = int(os.getenv("COHORT_MIN_USERS", "5"))
+    COHORT_CACHE_TTL_SECONDS: float = float(os.getenv("COHORT_CACHE_TTL_SECONDS", "300"))
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "my_secret_key_for_sleep_tracker_app_12345")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    
+    # Bcrypt выполняется в отдельном пуле, чтобы не занимать потоки обработчиков
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    
+    # Caches
+    ANALYTICS_CACHE_SIZE: int = int(os.getenv("ANALYTICS_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
 
 settings = Settings()
@@ -1,14 +1,69 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app import query_stats
 
-DATABASE_URL = "sqlite:///./sleep_tracker.db"
+def configure_sqlite_connection(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    # Без этого SQLite не проверяет внешние ключи и не выполняет ON DELETE CASCADE
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Драйверы async-режима по бэкенду DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def _engine_options(url) -> dict:
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    if url.database not in (None, "", ":memory:"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+def create_db_engine(database_url: str = None):
+    url = make_url(database_url or settings.DATABASE_URL)
+    engine = create_engine(url, **_engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", configure_sqlite_connection)
+    return engine
+
+def async_database_url(database_url: str = None):
+    if database_url is None and settings.ASYNC_DATABASE_URL:
+        return make_url(settings.ASYNC_DATABASE_URL)
+    url = make_url(database_url or settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Нет async-драйвера для {backend}: задайте ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_db_engine(database_url: str = None):
+    url = async_database_url(database_url)
+    engine = create_async_engine(url, **_engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        # Слушатель синхронного фасада: PRAGMA выполняются через адаптер драйвера
+        event.listen(engine.sync_engine, "connect", configure_sqlite_connection)
+    return engine
+
+query_stats.install()
+engine = create_db_engine()
+# Объекты не устаревают после commit: значения уже получены через RETURNING (app/repository.py)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+# Async-движок создается только при DB_ASYNC: драйвер (aiosqlite, asyncpg) нужен лишь ему.
+# Синхронный engine остается для фоновых задач в потоках и команд обслуживания
+async_engine = create_async_db_engine() if settings.DB_ASYNC else None
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -18,3 +73,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,118 @@
+"""
+Скетч распределения длительности сна для приближенных перцентилей.
+
+Гистограмма с корзинами фиксированной ширины BIN_WIDTH (5 минут) от 0 до
+MAX_HOURS и одной корзиной переполнения. В отличие от t-digest и KLL такой
+скетч поддерживает удаление значения (вычитание из корзины), что нужно при
+изменении и удалении записей, и сливается простым сложением счетчиков.
+
+Погрешность. Перцентиль считается так же, как np.percentile по умолчанию
+(линейная интерполяция между порядковыми статистиками), но каждая порядковая
+статистика заменяется точкой внутри ее корзины (значения в корзине считаются
+равномерно распределенными). Поэтому для длительностей меньше MAX_HOURS
+ошибка не превышает BIN_WIDTH. В корзине переполнения границы берутся из
+переданных min/max, и ошибка ограничена шириной [MAX_HOURS, max].
+
+Сериализация: счетчики uint32 little-endian, сжатые zlib; у типичного
+пользователя это сотня-другая байт.
+"""
+import zlib
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+BINS_PER_HOUR = 12
+BIN_WIDTH = 1 / BINS_PER_HOUR
+MAX_HOURS = 24
+BINS = MAX_HOURS * BINS_PER_HOUR + 1
+
+
+class DurationSketch:
+    __slots__ = ("counts",)
+    # Подклассы могут задать другую сетку для других величин
+    bins_per_unit = BINS_PER_HOUR
+    bins = BINS
+
+    def __init__(self, counts=None):
+        self.counts = array("I", counts if counts is not None else bytes(4 * self.bins))
+
+    def bin_index(self, value: float) -> int:
+        return min(max(int(value * self.bins_per_unit), 0), self.bins - 1)
+
+    @classmethod
+    def from_bins(cls, bins: dict) -> "DurationSketch":
+        sketch = cls()
+        for index, count in bins.items():
+            sketch.counts[min(max(index, 0), sketch.bins - 1)] += count
+        return sketch
+
+    @classmethod
+    def loads(cls, data: bytes) -> "DurationSketch":
+        counts = array("I")
+        counts.frombytes(zlib.decompress(data))
+        return cls(counts)
+
+    def dumps(self) -> bytes:
+        return zlib.compress(self.counts.tobytes(), 6)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def add(self, durations, sign: int = 1) -> None:
+        for duration in durations:
+            index = self.bin_index(duration)
+            # Счетчик не уходит в минус, даже если скетч разошелся с записями
+            if sign > 0 or self.counts[index]:
+                self.counts[index] += sign
+
+    def merge(self, other: "DurationSketch") -> None:
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+
+    def _point(self, rank: int, cumulative, low, high) -> float:
+        # rank-я (с нуля) порядковая статистика: точка внутри ее корзины
+        index = bisect_right(cumulative, rank)
+        before = cumulative[index - 1] if index else 0
+        start = index / self.bins_per_unit
+        end = start + 1 / self.bins_per_unit
+        if index == self.bins - 1 and high is not None:
+            end = max(high, start)
+        point = start + (end - start) * (rank - before + 0.5) / self.counts[index]
+        if low is not None:
+            point = max(point, low)
+        if high is not None:
+            point = min(point, high)
+        return point
+
+    def percentiles(self, percents, low: float = None, high: float = None) -> list:
+        """Приближенные перцентили; low/high - известные min/max длительности, уточняют края."""
+        cumulative = list(accumulate(self.counts))
+        total = cumulative[-1]
+        if not total:
+            return [None] * len(percents)
+        result = []
+        for percent in percents:
+            rank = (total - 1) * percent / 100
+            lower = int(rank)
+            value = self._point(lower, cumulative, low, high)
+            if rank > lower:
+                upper = self._point(lower + 1, cumulative, low, high)
+                value += (upper - value) * (rank - lower)
+            result.append(value)
+        return result
+
+    def rank(self, value: float) -> float:
+        """Доля значений меньше value (0..1); внутри корзины значения считаются равномерными."""
+        total = self.count
+        if not total:
+            return None
+        index = self.bin_index(value)
+        below = sum(self.counts[:index])
+        if index < self.bins - 1:
+            position = value * self.bins_per_unit - index
+            below += self.counts[index] * min(max(position, 0.0), 1.0)
+        else:
+            below += self.counts[index] / 2
+        return below / total
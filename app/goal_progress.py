@@ -0,0 +1,177 @@
+"""
+Прогресс целей сна (таблица goal_progress).
+
+День (UTC, как в sleep_daily_rollups) выполняет цель, если суммарная
+длительность сна за день не меньше target_duration, а среднее качество - не
+меньше target_quality. Учитываются дни с записями начиная с дня создания цели.
+
+Хуки app.sleep_stats вызывают days_changed после обновления дневных сверток.
+Запись за последний учтенный день или за более поздний меняет счетчики по
+одной строке свертки: серия до последнего дня хранится отдельно, поэтому его
+можно переоценить без истории. Изменение более раннего дня, исчезновение
+последнего дня и правка целей (update_goal) пересобирают прогресс по дневным
+сверткам, а не по записям сна. Строки прогресса, которой еще нет, хуки не
+трогают - она собирается при первом чтении.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Goal, GoalProgress, SleepDailyRollup
+
+PROGRESS_FIELDS = [
+    "tracked_days", "hit_days", "last_day", "last_day_hit", "streak_before_last", "longest_before_last",
+]
+
+GOAL_COLUMNS = [Goal.id, Goal.user_id, Goal.created_at, Goal.target_duration, Goal.target_quality]
+DAY_COLUMNS = [
+    SleepDailyRollup.user_id, SleepDailyRollup.day, SleepDailyRollup.record_count,
+    SleepDailyRollup.duration_sum, SleepDailyRollup.quality_sum,
+]
+
+
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _is_hit(goal, totals) -> bool:
+    return (
+        totals.duration_sum >= goal.target_duration
+        and totals.quality_sum >= goal.target_quality * totals.record_count
+    )
+
+
+def _streak_at_last(state) -> int:
+    return state["streak_before_last"] + 1 if state["last_day_hit"] else 0
+
+
+def _advance(state: dict, day: date, hit: bool) -> None:
+    # Новый день позже last_day: прежний последний день уходит в историю серий
+    if state["last_day"] is not None:
+        ending = _streak_at_last(state)
+        state["longest_before_last"] = max(state["longest_before_last"], ending)
+        state["streak_before_last"] = ending if day == state["last_day"] + timedelta(days=1) else 0
+    state["tracked_days"] += 1
+    state["hit_days"] += hit
+    state["last_day"] = day
+    state["last_day_hit"] = hit
+
+
+def _rebuild(db: Session, condition) -> None:
+    # DELETE до чтения сверток: под блокировкой записи их не изменит параллельная запись сна
+    db.execute(delete(GoalProgress).where(GoalProgress.goal_id.in_(select(Goal.id).where(condition))))
+    goals = db.execute(select(*GOAL_COLUMNS).where(condition)).all()
+    if not goals:
+        return
+    since = min(_day(goal.created_at) for goal in goals)
+    days = defaultdict(list)
+    rows = db.execute(
+        select(*DAY_COLUMNS)
+        .where(SleepDailyRollup.user_id.in_({goal.user_id for goal in goals}), SleepDailyRollup.day >= since)
+        .order_by(SleepDailyRollup.day)
+    )
+    for row in rows:
+        days[row.user_id].append(row)
+
+    now = datetime.now(timezone.utc)
+    progress = []
+    for goal in goals:
+        state = {
+            "tracked_days": 0, "hit_days": 0, "last_day": None, "last_day_hit": False,
+            "streak_before_last": 0, "longest_before_last": 0,
+        }
+        start = _day(goal.created_at)
+        for totals in days[goal.user_id]:
+            if totals.day >= start:
+                _advance(state, totals.day, _is_hit(goal, totals))
+        progress.append({"goal_id": goal.id, "updated_at": now, **state})
+    db.execute(insert(GoalProgress), progress)
+
+
+def rebuild(db: Session, goal_ids) -> None:
+    _rebuild(db, Goal.id.in_(goal_ids))
+
+
+def rebuild_for_users(db: Session, user_ids) -> None:
+    _rebuild(db, Goal.user_id.in_(user_ids))
+
+
+def days_changed(db: Session, user_id: int, days) -> None:
+    """Обновляет прогресс целей пользователя по сверткам указанных дней (свертки уже обновлены)."""
+    days = sorted({_day(day) for day in days if day is not None})
+    if not days:
+        return
+    goals = db.execute(
+        select(*GOAL_COLUMNS, *(getattr(GoalProgress, field) for field in PROGRESS_FIELDS))
+        .join(GoalProgress, GoalProgress.goal_id == Goal.id)
+        .where(Goal.user_id == user_id)
+    ).all()
+    if not goals:
+        return
+    totals_by_day = {
+        row.day: row
+        for row in db.execute(
+            select(*DAY_COLUMNS).where(SleepDailyRollup.user_id == user_id, SleepDailyRollup.day.in_(days))
+        )
+    }
+
+    now = datetime.now(timezone.utc)
+    stale = []
+    for goal in goals:
+        state = {field: getattr(goal, field) for field in PROGRESS_FIELDS}
+        start = _day(goal.created_at)
+        for day in days:
+            if day < start:
+                continue
+            totals = totals_by_day.get(day)
+            last_day = state["last_day"]
+            if last_day is not None and (day < last_day or day == last_day and totals is None):
+                # Прошлое известно только суммарно: пересобираем по сверткам
+                stale.append(goal.id)
+                break
+            if day == last_day:
+                hit = _is_hit(goal, totals)
+                state["hit_days"] += hit - state["last_day_hit"]
+                state["last_day_hit"] = hit
+            elif totals is not None:
+                _advance(state, day, _is_hit(goal, totals))
+        else:
+            if state != {field: getattr(goal, field) for field in PROGRESS_FIELDS}:
+                db.execute(
+                    update(GoalProgress)
+                    .where(GoalProgress.goal_id == goal.id)
+                    .values(**state, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+    if stale:
+        rebuild(db, stale)
+
+
+def get_progress(db: Session, goal: Goal) -> dict:
+    progress = db.get(GoalProgress, goal.id, populate_existing=True)
+    if progress is None:
+        rebuild(db, [goal.id])
+        db.commit()
+        progress = db.get(GoalProgress, goal.id, populate_existing=True)
+
+    today = datetime.now(timezone.utc).date()
+    state = {field: getattr(progress, field) for field in PROGRESS_FIELDS}
+    last_day = progress.last_day
+    if last_day is None or last_day < today - timedelta(days=1):
+        current_streak = 0
+    elif last_day == today and not progress.last_day_hit:
+        # Сегодняшний день еще не закончен: серия по вчерашний день не прервана
+        current_streak = progress.streak_before_last
+    else:
+        current_streak = _streak_at_last(state)
+    return {
+        "goal_id": goal.id,
+        "tracked_days": progress.tracked_days,
+        "hit_days": progress.hit_days,
+        "hit_rate": progress.hit_days / progress.tracked_days if progress.tracked_days else None,
+        "current_streak": current_streak,
+        "longest_streak": max(progress.longest_before_last, _streak_at_last(state)),
+        "last_day": last_day,
+    }
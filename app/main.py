@@ -1,26 +1,77 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from app import account_deletion, database, metrics
+from app.async_routes import async_router
 from app.database import Base, engine
 from app.config import settings
-from app.routes import user, sleep, goal, analytics, reminder
+from app.auth import password_pool
+from app.query_stats import QueryStatsMiddleware
+from app.routes import user, sleep, goal, analytics, reminder, sync
+from app.routes import metrics as metrics_routes
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    description=settings.PROJECT_DESCRIPTION,
-    version=settings.PROJECT_VERSION
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    stop = threading.Event()
+    purge = None
+    pending = await run_in_threadpool(account_deletion.pending_user_ids, engine)
+    if pending:
+        purge = app.state.account_purge = asyncio.create_task(
+            run_in_threadpool(account_deletion.purge_pending, engine, pending, stop)
+        )
+    yield
+    if purge is not None:
+        # Текущая порция дочищается, остальное возобновится при следующем старте
+        stop.set()
+        await purge
+    password_pool.shutdown()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
 
-app.include_router(user.router, prefix="/api/users", tags=["Users"])
-app.include_router(sleep.router, prefix="/api", tags=["Sleep Records"])
-app.include_router(goal.router, prefix="/api", tags=["Goals"])
-app.include_router(analytics.router, prefix="/api", tags=["Analytics"])
-app.include_router(reminder.router, prefix="/api", tags=["Reminders"])
+ROUTERS = [
+    (user.router, "/api/users", ["Users"]),
+    (sleep.router, "/api", ["Sleep Records"]),
+    (goal.router, "/api", ["Goals"]),
+    (analytics.router, "/api", ["Analytics"]),
+    (reminder.router, "/api", ["Reminders"]),
+    (sync.router, "/api", ["Sync"]),
+]
 
-@app.get("/")
 def root():
     return {
         "message": f"Добро пожаловать в {settings.PROJECT_NAME}!",
         "docs": "/docs",
         "version": settings.PROJECT_VERSION
     }
+
+def create_app(async_db: bool = settings.DB_ASYNC) -> FastAPI:
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description=settings.PROJECT_DESCRIPTION,
+        version=settings.PROJECT_VERSION,
+        lifespan=lifespan
+    )
+    
+    app.add_middleware(QueryStatsMiddleware)
+    if settings.METRICS_ENABLED:
+        metrics.install(engine, password_pool)
+        if async_db and database.async_engine is not None:
+            metrics.install(database.async_engine.sync_engine)
+        app.add_middleware(metrics.MetricsMiddleware)
+    
+    for router, prefix, tags in ROUTERS:
+        # DB_ASYNC: те же обработчики на AsyncSession (app/async_routes.py)
+        app.include_router(async_router(router) if async_db else router, prefix=prefix, tags=tags)
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_routes.router, tags=["Metrics"])
+    
+    app.get("/")(root)
+    return app
+
+app = create_app()
@@ -0,0 +1,175 @@
+"""
+Метрики процесса в текстовом формате Prometheus (GET /metrics).
+
+Счетчики запросов и гистограммы задержек обновляет MetricsMiddleware в потоке
+событийного цикла, поэтому они обходятся без блокировок. Блокировка нужна только
+счетчику выдач соединений из пула: он обновляется из рабочих потоков.
+Остальное - размеры пулов, кэши, bcrypt - снимается в момент запроса метрик.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from anyio import to_thread
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from app.cache import cache_stats
+from app.query_stats import route_template
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Маршрут для несовпавших путей, чтобы произвольные URL не плодили ряды метрик
+UNMATCHED_ROUTE = "unmatched"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.requests = {}
+        self.latency = {}
+        self.in_flight = 0
+        self.pool_checkouts = 0
+        self._pool_lock = threading.Lock()
+        self.engines = []
+        self.password_pool = None
+
+    def observe_request(self, method: str, route: str, status: int, elapsed: float):
+        key = (method, route, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = _Histogram()
+        histogram.observe(elapsed)
+
+    def pool_checkout(self):
+        with self._pool_lock:
+            self.pool_checkouts += 1
+
+    def reset(self):
+        self.requests.clear()
+        self.latency.clear()
+        with self._pool_lock:
+            self.pool_checkouts = 0
+
+    def render(self) -> str:
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        metric("http_requests_total", "counter", "HTTP-запросы по маршрутам и статусам", [
+            ({"method": method, "route": route, "status": status}, count)
+            for (method, route, status), count in sorted(self.requests.items())
+        ])
+
+        lines.append("# HELP http_request_duration_seconds Время обработки HTTP-запроса")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), histogram.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        metric("http_requests_in_flight", "gauge", "Запросы в обработке", [({}, self.in_flight)])
+
+        limiter = to_thread.current_default_thread_limiter()
+        metric("threadpool_threads", "gauge", "Размер пула потоков для синхронных обработчиков", [
+            ({}, limiter.total_tokens)
+        ])
+        metric("threadpool_threads_busy", "gauge", "Занятые потоки пула", [({}, limiter.borrowed_tokens)])
+        metric("threadpool_saturation", "gauge", "Доля занятых потоков пула", [
+            ({}, limiter.borrowed_tokens / limiter.total_tokens)
+        ])
+
+        metric("db_pool_checkouts_total", "counter", "Выдачи соединений из пулов БД", [({}, self.pool_checkouts)])
+        metric("db_pool_checked_out", "gauge", "Соединения БД, выданные в данный момент", [
+            ({"engine": str(engine.url)}, engine.pool.checkedout())
+            for engine in self.engines if hasattr(engine.pool, "checkedout")
+        ])
+
+        caches = cache_stats()
+        metric("cache_hits_total", "counter", "Попадания в кэш", [
+            ({"cache": name}, stats["hits"]) for name, stats in caches.items()
+        ])
+        metric("cache_misses_total", "counter", "Промахи кэша", [
+            ({"cache": name}, stats["misses"]) for name, stats in caches.items()
+        ])
+        metric("cache_hit_ratio", "gauge", "Доля попаданий в кэш", [
+            ({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()
+        ])
+        metric("cache_entries", "gauge", "Записей в кэше", [
+            ({"cache": name}, stats["size"]) for name, stats in caches.items()
+        ])
+
+        if self.password_pool is not None:
+            stats = self.password_pool.stats()
+            metric("password_hash_in_flight", "gauge", "Задачи bcrypt в работе и в очереди", [({}, stats["in_flight"])])
+            metric("password_hash_queue_depth", "gauge", "Задачи bcrypt в очереди", [({}, stats["queue_depth"])])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def _on_checkout(*args):
+    registry.pool_checkout()
+
+
+def install(engine=None, password_pool=None):
+    if not event.contains(Pool, "checkout", _on_checkout):
+        event.listen(Pool, "checkout", _on_checkout)
+    if engine is not None and engine not in registry.engines:
+        registry.engines.append(engine)
+    if password_pool is not None:
+        registry.password_pool = password_pool
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+        registry.in_flight += 1
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight -= 1
+            route = route_template(scope) if "route" in scope else UNMATCHED_ROUTE
+            registry.observe_request(scope["method"], route, status, time.perf_counter() - started)
@@ -3,5 +3,10 @@ from app.models.sleep_record import SleepRecord
 from app.models.goal import Goal
 from app.models.reminder import Reminder
 from app.models.note import Note
+from app.models.user_sleep_stats import UserSleepStats
+from app.models.tombstone import Tombstone
+from app.models.sleep_daily_rollup import SleepDailyRollup
+from app.models.cohort_rollup import CohortRollup
+from app.models.goal_progress import GoalProgress
 
-__all__ = ["User", "SleepRecord", "Goal", "Reminder", "Note"]
+__all__ = ["User", "SleepRecord", "Goal", "Reminder", "Note", "UserSleepStats", "Tombstone", "SleepDailyRollup", "CohortRollup", "GoalProgress"]
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime, LargeBinary
+from app.database import Base
+from datetime import datetime, timezone
+
+class CohortRollup(Base):
+    __tablename__ = "cohort_rollups"
+    
+    # Нижняя граница возрастной группы (app/cohorts.py, AGE_BUCKETS)
+    age_bucket = Column(Integer, primary_key=True)
+    user_count = Column(Integer, default=0, nullable=False)
+    # Гистограммы средних значений пользователей группы (сериализованные скетчи)
+    duration_sketch = Column(LargeBinary, nullable=False)
+    quality_sketch = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
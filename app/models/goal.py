@@ -1,16 +1,22 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, Float, ForeignKey, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone
 
 class Goal(Base):
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goals_user_created", "user_id", "created_at", "id"),
+        Index("ix_goals_user_updated", "user_id", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     target_duration = Column(Float)
     target_quality = Column(Integer)
     description = Column(Text, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     user = relationship("User", back_populates="goals")
+    progress = relationship("GoalProgress", back_populates="goal", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Date, Boolean, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from app.database import Base
+from datetime import datetime, timezone
+
+class GoalProgress(Base):
+    __tablename__ = "goal_progress"
+    
+    goal_id = Column(Integer, ForeignKey("goals.id", ondelete="CASCADE"), primary_key=True)
+    # Дни (UTC) с записями сна начиная с дня создания цели и дни, в которые цель выполнена
+    tracked_days = Column(Integer, default=0, nullable=False)
+    hit_days = Column(Integer, default=0, nullable=False)
+    # Последний учтенный день; серии до него хранятся отдельно, чтобы пересчитать его без истории
+    last_day = Column(Date, nullable=True)
+    last_day_hit = Column(Boolean, default=False, nullable=False)
+    streak_before_last = Column(Integer, default=0, nullable=False)
+    longest_before_last = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    goal = relationship("Goal", back_populates="progress")
@@ -1,14 +1,18 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_record_updated", "sleep_record_id", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    sleep_record_id = Column(Integer, ForeignKey("sleep_records.id"))
+    sleep_record_id = Column(Integer, ForeignKey("sleep_records.id", ondelete="CASCADE"))
     content = Column(Text)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     sleep_record = relationship("SleepRecord", back_populates="notes")
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class SleepDailyRollup(Base):
+    __tablename__ = "sleep_daily_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Календарный день sleep_date (UTC)
+    day = Column(Date, primary_key=True)
+    record_count = Column(Integer, default=0, nullable=False)
+    duration_sum = Column(Float, default=0.0, nullable=False)
+    duration_sq_sum = Column(Float, default=0.0, nullable=False)
+    min_duration = Column(Float, nullable=True)
+    max_duration = Column(Float, nullable=True)
+    quality_sum = Column(Integer, default=0, nullable=False)
+    # Фазы необязательны: для средних нужны и суммы, и число записей с фазой
+    deep_sleep_sum = Column(Float, default=0.0, nullable=False)
+    deep_sleep_count = Column(Integer, default=0, nullable=False)
+    light_sleep_sum = Column(Float, default=0.0, nullable=False)
+    light_sleep_count = Column(Integer, default=0, nullable=False)
+    rem_sleep_sum = Column(Float, default=0.0, nullable=False)
+    rem_sleep_count = Column(Integer, default=0, nullable=False)
+    
+    user = relationship("User", back_populates="daily_rollups")
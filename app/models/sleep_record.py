@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone
 
 class SleepRecord(Base):
     __tablename__ = "sleep_records"
+    __table_args__ = (
+        Index("ix_sleep_records_user_date", "user_id", "sleep_date", "id"),
+        Index("ix_sleep_records_user_updated", "user_id", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     sleep_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     sleep_start = Column(DateTime)
     sleep_end = Column(DateTime)
@@ -17,6 +21,7 @@ class SleepRecord(Base):
     light_sleep = Column(Float, nullable=True)
     rem_sleep = Column(Float, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     user = relationship("User", back_populates="sleep_records")
-    notes = relationship("Note", back_populates="sleep_record", cascade="all, delete-orphan")
+    notes = relationship("Note", back_populates="sleep_record", cascade="all, delete-orphan", passive_deletes=True)
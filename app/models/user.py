@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Частичный индекс: при старте ищутся аккаунты, ожидающие удаления, а их единицы
+        Index(
+            "ix_users_deletion_requested", "deletion_requested_at",
+            sqlite_where=text("deletion_requested_at IS NOT NULL"),
+            postgresql_where=text("deletion_requested_at IS NOT NULL"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
@@ -12,7 +20,13 @@ class User(Base):
     password = Column(String)
     age = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Аккаунт ожидает фонового удаления (app/account_deletion.py) и уже недоступен
+    deletion_requested_at = Column(DateTime, nullable=True)
     
-    sleep_records = relationship("SleepRecord", back_populates="user", cascade="all, delete-orphan")
-    goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan")
-    reminders = relationship("Reminder", back_populates="user", cascade="all, delete-orphan")
+    # Дочерние строки удаляет БД (ON DELETE CASCADE), ORM не загружает их перед удалением
+    sleep_records = relationship("SleepRecord", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    reminders = relationship("Reminder", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    sleep_stats = relationship("UserSleepStats", back_populates="user", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    tombstones = relationship("Tombstone", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    daily_rollups = relationship("SleepDailyRollup", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
@@ -0,0 +1,39 @@
+from sqlalchemy import BigInteger, Column, Integer, Float, ForeignKey, DateTime, LargeBinary
+from sqlalchemy.orm import relationship
+from app.database import Base
+from datetime import datetime, timezone
+import math
+
+class UserSleepStats(Base):
+    __tablename__ = "user_sleep_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    record_count = Column(Integer, default=0, nullable=False)
+    duration_sum = Column(Float, default=0.0, nullable=False)
+    duration_sq_sum = Column(Float, default=0.0, nullable=False)
+    min_duration = Column(Float, nullable=True)
+    max_duration = Column(Float, nullable=True)
+    quality_sum = Column(Integer, default=0, nullable=False)
+    quality_sq_sum = Column(Integer, default=0, nullable=False)
+    # Сериализованный DurationSketch (app/duration_sketch.py) для перцентилей длительности
+    duration_sketch = Column(LargeBinary, nullable=True)
+    # Версия данных для ключей кэшей аналитики: растет с каждым изменением записей пользователя.
+    # Новая строка начинает с time_ns(), чтобы не совпасть с версиями удаленного пользователя,
+    # чей id SQLite выдаст заново
+    version = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    user = relationship("User", back_populates="sleep_stats")
+    
+    @property
+    def average_duration(self):
+        return self.duration_sum / self.record_count
+    
+    @property
+    def average_quality(self):
+        return self.quality_sum / self.record_count
+    
+    @property
+    def duration_stddev(self):
+        variance = self.duration_sq_sum / self.record_count - self.average_duration ** 2
+        return math.sqrt(max(variance, 0.0))
@@ -0,0 +1,112 @@
+"""
+Учет SQL-запросов по HTTP-запросам.
+
+Слушатели событий Engine считают операторы и время в БД для текущего запроса
+(contextvar, который выставляет QueryStatsMiddleware). Итог уходит в заголовок
+Server-Timing и в лог app.query_stats, операторы дольше SLOW_QUERY_THRESHOLD_MS
+пишутся в лог вместе с маршрутом. Для потоковых ответов в заголовок попадают
+только запросы, выполненные до начала ответа.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    __slots__ = ("scope", "count", "duration")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.count = 0
+        self.duration = 0.0
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope)
+
+
+def route_template(scope: dict) -> str:
+    """Шаблон маршрута (/api/sleep/{record_id}); до роутинга или без совпадения - сам путь."""
+    path = scope.get("path", "")
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return path
+    # Во вложенных роутерах route.path не содержит префикс include_router: восстанавливаем его из пути
+    concrete = route.path_format.format(**scope.get("path_params", {}))
+    if path.endswith(concrete):
+        return path[:len(path) - len(concrete)] + template
+    return template
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_started
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "slow query %.1f ms route=%s: %s", elapsed * 1000, stats.route if stats else None, statement,
+            extra={"duration_ms": elapsed * 1000, "route": stats.route if stats else None, "statement": statement},
+        )
+
+
+def install():
+    # Слушатели на классе Engine: учитываются все движки, включая тестовые
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def server_timing(stats: RequestQueryStats) -> bytes:
+    return f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'.encode("latin-1")
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestQueryStats(scope)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing(stats))]
+                logger.info(
+                    "%s %s status=%s queries=%d db_ms=%.2f",
+                    scope["method"], stats.route, message["status"], stats.count, stats.duration * 1000,
+                    extra={
+                        "method": scope["method"], "route": stats.route, "status": message["status"],
+                        "queries": stats.count, "db_time_ms": stats.duration * 1000,
+                    },
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,39 @@
+"""
+Запись ORM-объектов одним SQL-оператором.
+
+INSERT/UPDATE ... RETURNING возвращают строку в том виде, в каком она сохранена
+в БД, поэтому после commit не нужен повторный SELECT (db.refresh): сессии
+создаются с expire_on_commit=False.
+
+update_owned/delete_owned проверяют владельца в том же операторе
+(WHERE id = ? AND user_id = ?): отсутствие строки означает 404.
+"""
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+
+def create(db: Session, model, **values):
+    return db.scalars(insert(model).values(**values).returning(model)).one()
+
+
+def update_row(db: Session, model, row_id: int, **values):
+    """Обновляет строку по id и возвращает объект с новыми значениями (None, если строки нет)."""
+    return db.scalars(
+        update(model).where(model.id == row_id).values(**values).returning(model),
+        execution_options={"populate_existing": True}
+    ).one_or_none()
+
+
+def update_owned(db: Session, model, row_id: int, user_id: int, **values):
+    """Обновляет строку пользователя; None, если строки нет или она чужая."""
+    return db.scalars(
+        update(model).where(model.id == row_id, model.user_id == user_id).values(**values).returning(model),
+        execution_options={"populate_existing": True}
+    ).one_or_none()
+
+
+def delete_owned(db: Session, model, row_id: int, user_id: int):
+    """Удаляет строку пользователя и возвращает ее прежние значения (Row) или None."""
+    return db.execute(
+        delete(model).where(model.id == row_id, model.user_id == user_id).returning(*model.__table__.columns)
+    ).one_or_none()
@@ -1,59 +1,80 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.database import get_db
-from app.models import User, SleepRecord
+from app.models import User
 from app.auth import get_current_user
+from app.cohorts import cohort_comparison
+from app.sleep_stats import get_stats_summary
+from app.sleep_trends import get_trends
 
 router = APIRouter()
 
 @router.get("/statistics", responses={401: {"description": "Не аутентифицирован"}})
 def get_statistics(
+    window: Optional[int] = Query(None, ge=1, le=365, description="Статистика за последние window дней"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    records = db.query(SleepRecord).filter(
-        SleepRecord.user_id == current_user.id
-    ).all()
+    stats = get_stats_summary(db, current_user.id, window)
+    window_fields = {"window": window} if window else {}
     
-    if not records:
+    if not stats["total_records"]:
         return {
             "message": "Нет данных для статистики",
-            "total_records": 0
+            "total_records": 0,
+            **window_fields
         }
     
-    total_records = len(records)
-    avg_duration = sum(r.duration for r in records) / total_records
-    avg_quality = sum(r.quality for r in records) / total_records
+    result = {
+        "total_records": stats["total_records"],
+        "average_duration": round(stats["average_duration"], 2),
+        "average_quality": round(stats["average_quality"], 2),
+        "max_duration": round(stats["max_duration"], 2),
+        "min_duration": round(stats["min_duration"], 2),
+        "duration_stddev": round(stats["duration_stddev"], 2)
+    }
+    if "duration_percentiles" in stats:
+        result["duration_percentiles"] = {
+            name: round(value, 2) for name, value in stats["duration_percentiles"].items()
+        }
+    if window:
+        for phase in ("average_deep_sleep", "average_light_sleep", "average_rem_sleep"):
+            result[phase] = round(stats[phase], 2) if stats[phase] is not None else None
+    return {**result, **window_fields}
+
+@router.get("/statistics/trends", responses={401: {"description": "Не аутентифицирован"}})
+def get_statistics_trends(
+    days: int = Query(30, ge=1, le=365, description="Сколько последних дней отдать в ряду daily"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    trends = get_trends(db, current_user.id, days)
     
-    max_duration = max(r.duration for r in records)
-    min_duration = min(r.duration for r in records)
+    if trends is None:
+        return {
+            "message": "Нет данных для трендов",
+            "total_records": 0
+        }
     
-    return {
-        "total_records": total_records,
-        "average_duration": round(avg_duration, 2),
-        "average_quality": round(avg_quality, 2),
-        "max_duration": round(max_duration, 2),
-        "min_duration": round(min_duration, 2)
-    }
+    return trends
 
 @router.get("/recommendations", responses={401: {"description": "Не аутентифицирован"}})
 def get_recommendations(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    records = db.query(SleepRecord).filter(
-        SleepRecord.user_id == current_user.id
-    ).all()
+    stats = get_stats_summary(db, current_user.id)
     
-    if not records:
+    if not stats["total_records"]:
         return {
             "recommendations": ["Начните записывать свой сон для получения персональных рекомендаций"]
         }
     
     recommendations = []
     
-    avg_duration = sum(r.duration for r in records) / len(records)
-    avg_quality = sum(r.quality for r in records) / len(records)
+    avg_duration = stats["average_duration"]
+    avg_quality = stats["average_quality"]
     
     if avg_duration < 7:
         recommendations.append("Старайтесь спать не менее 7-8 часов в сутки")
@@ -72,8 +93,17 @@ def get_recommendations(
     
     recommendations.append("Старайтесь ложиться спать в одно и то же время каждый день")
     
-    return {
+    result = {
         "average_duration": round(avg_duration, 2),
         "average_quality": round(avg_quality, 2),
         "recommendations": recommendations
     }
+    
+    cohort = cohort_comparison(db, current_user.age, avg_duration, avg_quality)
+    if cohort:
+        recommendations.append(
+            f"Вы спите дольше, чем {cohort['duration_percentile']}% пользователей в возрасте {cohort['age_group']}, "
+            f"а качество сна у вас выше, чем у {cohort['quality_percentile']}%"
+        )
+        result["cohort"] = cohort
+    return result
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User, Goal
+from app.models import User, Goal, Tombstone
 from app.schemas import goal as goal_schemas
 from app.auth import get_current_user
-from typing import List
+from app import goal_progress, repository
+from app.pagination import NEXT_CURSOR_HEADER, keyset_page
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -14,15 +16,14 @@ def create_goal(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    new_goal = Goal(
+    new_goal = repository.create(
+        db, Goal,
         user_id=current_user.id,
         target_duration=goal_data.target_duration,
         target_quality=goal_data.target_quality,
         description=goal_data.description
     )
-    db.add(new_goal)
     db.commit()
-    db.refresh(new_goal)
     return new_goal
 
 @router.get("/goals/{goal_id}", response_model=goal_schemas.GoalResponse, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Цель не найдена"}})
@@ -40,10 +41,9 @@ def get_goal(
         raise HTTPException(status_code=404, detail="Цель не найдена")
     return goal
 
-@router.put("/goals/{goal_id}", response_model=goal_schemas.GoalResponse, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Цель не найдена"}})
-def update_goal(
+@router.get("/goals/{goal_id}/progress", response_model=goal_schemas.GoalProgressResponse, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Цель не найдена"}})
+def get_goal_progress(
     goal_id: int,
-    goal_update: goal_schemas.GoalUpdate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -54,16 +54,27 @@ def update_goal(
     
     if not goal:
         raise HTTPException(status_code=404, detail="Цель не найдена")
+    return goal_progress.get_progress(db, goal)
+
+@router.put("/goals/{goal_id}", response_model=goal_schemas.GoalResponse, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Цель не найдена"}})
+def update_goal(
+    goal_id: int,
+    goal_update: goal_schemas.GoalUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    values = goal_update.model_dump(exclude_none=True)
+    if values:
+        goal = repository.update_owned(db, Goal, goal_id, current_user.id, **values)
+        # Изменились цели - прогресс пересобирается по дневным сверткам
+        if goal and values.keys() & {"target_duration", "target_quality"}:
+            goal_progress.rebuild(db, [goal_id])
+        db.commit()
+    else:
+        goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == current_user.id).first()
     
-    if goal_update.target_duration is not None:
-        goal.target_duration = goal_update.target_duration
-    if goal_update.target_quality is not None:
-        goal.target_quality = goal_update.target_quality
-    if goal_update.description is not None:
-        goal.description = goal_update.description
-    
-    db.commit()
-    db.refresh(goal)
+    if not goal:
+        raise HTTPException(status_code=404, detail="Цель не найдена")
     return goal
 
 @router.delete("/goals/{goal_id}", status_code=status.HTTP_204_NO_CONTENT, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Цель не найдена"}})
@@ -72,25 +83,24 @@ def delete_goal(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
-    
-    if not goal:
+    if not repository.delete_owned(db, Goal, goal_id, current_user.id):
         raise HTTPException(status_code=404, detail="Цель не найдена")
     
-    db.delete(goal)
+    db.add(Tombstone(user_id=current_user.id, entity="goal", entity_id=goal_id))
     db.commit()
     return None
 
 @router.get("/goals", response_model=List[goal_schemas.GoalResponse], responses={401: {"description": "Не аутентифицирован"}})
 def get_goals(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    goals = db.query(Goal).filter(
-        Goal.user_id == current_user.id
-    ).order_by(Goal.created_at.desc()).all()
+    query = db.query(Goal).filter(Goal.user_id == current_user.id)
     
+    goals, next_cursor = keyset_page(query, [Goal.created_at, Goal.id], cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return goals
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+# Асинхронный обработчик: выполняется в событийном цикле, не занимая поток пула
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
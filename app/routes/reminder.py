@@ -4,6 +4,7 @@ from app.database import get_db
 from app.models import User, Reminder
 from app.schemas import reminder as reminder_schemas
 from app.auth import get_current_user
+from app import repository
 
 router = APIRouter()
 
@@ -13,15 +14,14 @@ def create_reminder(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    new_reminder = Reminder(
+    new_reminder = repository.create(
+        db, Reminder,
         user_id=current_user.id,
         reminder_time=reminder_data.reminder_time,
         message=reminder_data.message,
         is_active=1
     )
-    db.add(new_reminder)
     db.commit()
-    db.refresh(new_reminder)
     return new_reminder
 
 @router.put("/reminders/{reminder_id}", response_model=reminder_schemas.ReminderResponse, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Напоминание не найдено"}})
@@ -31,23 +31,15 @@ def update_reminder(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    reminder = db.query(Reminder).filter(
-        Reminder.id == reminder_id,
-        Reminder.user_id == current_user.id
-    ).first()
+    values = reminder_update.model_dump(exclude_none=True)
+    if values:
+        reminder = repository.update_owned(db, Reminder, reminder_id, current_user.id, **values)
+        db.commit()
+    else:
+        reminder = db.query(Reminder).filter(Reminder.id == reminder_id, Reminder.user_id == current_user.id).first()
     
     if not reminder:
         raise HTTPException(status_code=404, detail="Напоминание не найдено")
-    
-    if reminder_update.reminder_time is not None:
-        reminder.reminder_time = reminder_update.reminder_time
-    if reminder_update.message is not None:
-        reminder.message = reminder_update.message
-    if reminder_update.is_active is not None:
-        reminder.is_active = reminder_update.is_active
-    
-    db.commit()
-    db.refresh(reminder)
     return reminder
 
 @router.delete("/reminders/{reminder_id}", status_code=status.HTTP_204_NO_CONTENT, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Напоминание не найдено"}})
@@ -56,14 +48,8 @@ def delete_reminder(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    reminder = db.query(Reminder).filter(
-        Reminder.id == reminder_id,
-        Reminder.user_id == current_user.id
-    ).first()
-    
-    if not reminder:
+    if not repository.update_owned(db, Reminder, reminder_id, current_user.id, is_active=0):
         raise HTTPException(status_code=404, detail="Напоминание не найдено")
     
-    reminder.is_active = 0
     db.commit()
     return None
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User, SleepRecord, Note
+from app.models import User, SleepRecord, Note, Tombstone
 from app.schemas import sleep as sleep_schemas
 from app.auth import get_current_user
-from typing import List
+from app import sleep_stats
+from app.sleep_ingest import insert_sleep_records, to_utc, validate_sleep_items
+from app import repository, sleep_export, sleep_import
+from app.async_routes import stream_in_session
+from app.pagination import NEXT_CURSOR_HEADER, keyset_page
+from typing import List, Literal, Optional
+from datetime import datetime
 
 router = APIRouter()
 
@@ -16,8 +23,10 @@ def create_sleep_record(
 ):
     duration = (sleep_data.sleep_end - sleep_data.sleep_start).total_seconds() / 3600
     
-    new_record = SleepRecord(
+    new_record = repository.create(
+        db, SleepRecord,
         user_id=current_user.id,
+        sleep_date=to_utc(sleep_data.sleep_end),
         sleep_start=sleep_data.sleep_start,
         sleep_end=sleep_data.sleep_end,
         duration=duration,
@@ -26,11 +35,60 @@ def create_sleep_record(
         light_sleep=sleep_data.light_sleep,
         rem_sleep=sleep_data.rem_sleep
     )
-    db.add(new_record)
+    sleep_stats.record_added(db, new_record)
     db.commit()
-    db.refresh(new_record)
     return new_record
 
+@router.post("/sleep/batch", response_model=sleep_schemas.SleepRecordBatchResponse, responses={401: {"description": "Не аутентифицирован"}})
+def create_sleep_records_batch(
+    batch: sleep_schemas.SleepRecordBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    valid, invalid = validate_sleep_items(batch.records)
+    results = [{"index": index, "status": "invalid", "errors": errors} for index, errors in invalid]
+    
+    ids = insert_sleep_records(db, current_user.id, [item for _, item in valid])
+    db.commit()
+    
+    results.extend({"index": index, "status": "created", "id": record_id} for (index, _), record_id in zip(valid, ids))
+    results.sort(key=lambda result: result["index"])
+    return {"created": len(ids), "failed": len(results) - len(ids), "results": results}
+
+@router.post("/sleep/import", response_model=sleep_schemas.SleepImportResponse, responses={400: {"description": "Некорректный файл"}, 401: {"description": "Не аутентифицирован"}})
+def import_sleep_records(
+    file: UploadFile = File(...),
+    fmt: Optional[Literal["csv", "ndjson", "json"]] = Query(None, alias="format"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    fmt = fmt or sleep_import.detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Не удалось определить формат файла")
+    try:
+        return sleep_import.import_sleep_records(db, current_user.id, sleep_import.iter_rows(file.file, fmt))
+    except sleep_import.ImportFormatError as exc:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Некорректный файл: {exc}. Загружено записей: {exc.created}"
+        )
+
+@router.get("/sleep/export", response_class=StreamingResponse, responses={401: {"description": "Не аутентифицирован"}})
+def export_sleep_records(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    headers = {"Content-Disposition": f'attachment; filename="sleep_records.{fmt}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        stream_in_session(db, sleep_export.stream_records(db, current_user.id, fmt, gzip)),
+        media_type=sleep_export.MEDIA_TYPES[fmt],
+        headers=headers
+    )
+
 @router.get("/sleep/{record_id}", response_model=sleep_schemas.SleepRecordResponse, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Запись не найдена"}})
 def get_sleep_record(
     record_id: int,
@@ -53,6 +111,19 @@ def update_sleep_record(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    values = sleep_update.model_dump(exclude_none=True)
+    if values and not sleep_stats.TRACKED_FIELDS & values.keys():
+        # Меняются только фазы: прежние значения не нужны, хватает UPDATE и пересчета дневной свертки
+        record = repository.update_owned(db, SleepRecord, record_id, current_user.id, **values)
+        if not record:
+            raise HTTPException(status_code=404, detail="Запись не найдена")
+        sleep_stats.phases_changed(db, record)
+        db.commit()
+        return record
+    
+    if values:
+        # Прежние значения для пересчета статистики читаются уже под блокировкой записи
+        sleep_stats.lock_stats(db, current_user.id)
     record = db.query(SleepRecord).filter(
         SleepRecord.id == record_id,
         SleepRecord.user_id == current_user.id
@@ -60,25 +131,20 @@ def update_sleep_record(
     
     if not record:
         raise HTTPException(status_code=404, detail="Запись не найдена")
+    if not values:
+        return record
     
-    if sleep_update.sleep_start is not None:
-        record.sleep_start = sleep_update.sleep_start
-    if sleep_update.sleep_end is not None:
-        record.sleep_end = sleep_update.sleep_end
-    if sleep_update.quality is not None:
-        record.quality = sleep_update.quality
-    if sleep_update.deep_sleep is not None:
-        record.deep_sleep = sleep_update.deep_sleep
-    if sleep_update.light_sleep is not None:
-        record.light_sleep = sleep_update.light_sleep
-    if sleep_update.rem_sleep is not None:
-        record.rem_sleep = sleep_update.rem_sleep
-    
-    if sleep_update.sleep_start is not None or sleep_update.sleep_end is not None:
-        record.duration = (record.sleep_end - record.sleep_start).total_seconds() / 3600
+    old_values = sleep_stats.snapshot(record)
+    if "sleep_start" in values or "sleep_end" in values:
+        sleep_start = values.get("sleep_start", record.sleep_start)
+        sleep_end = values.get("sleep_end", record.sleep_end)
+        values["duration"] = (sleep_end - sleep_start).total_seconds() / 3600
+        # Ночь переезжает на день нового пробуждения; хук пересчитает прежний и новый дни
+        values["sleep_date"] = to_utc(sleep_end)
     
+    record = repository.update_owned(db, SleepRecord, record_id, current_user.id, **values)
+    sleep_stats.record_changed(db, old_values, record)
     db.commit()
-    db.refresh(record)
     return record
 
 @router.delete("/sleep/{record_id}", status_code=status.HTTP_204_NO_CONTENT, responses={401: {"description": "Не аутентифицирован"}, 404: {"description": "Запись не найдена"}})
@@ -87,15 +153,13 @@ def delete_sleep_record(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    record = db.query(SleepRecord).filter(
-        SleepRecord.id == record_id,
-        SleepRecord.user_id == current_user.id
-    ).first()
-    
+    # RETURNING отдает удаленную строку - ее значения нужны для пересчета статистики
+    record = repository.delete_owned(db, SleepRecord, record_id, current_user.id)
     if not record:
         raise HTTPException(status_code=404, detail="Запись не найдена")
     
-    db.delete(record)
+    db.add(Tombstone(user_id=current_user.id, entity="sleep_record", entity_id=record_id))
+    sleep_stats.record_removed(db, record)
     db.commit()
     return None
 
@@ -114,22 +178,27 @@ def create_note(
     if not record:
         raise HTTPException(status_code=404, detail="Запись о сне не найдена")
     
-    new_note = Note(
-        sleep_record_id=record_id,
-        content=note_data.content
-    )
-    db.add(new_note)
+    new_note = repository.create(db, Note, sleep_record_id=record_id, content=note_data.content)
     db.commit()
-    db.refresh(new_note)
     return new_note
 
 @router.get("/sleep", response_model=List[sleep_schemas.SleepRecordResponse], responses={401: {"description": "Не аутентифицирован"}})
 def get_sleep_records(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    records = db.query(SleepRecord).filter(
-        SleepRecord.user_id == current_user.id
-    ).order_by(SleepRecord.sleep_date.desc()).all()
+    query = db.query(SleepRecord).filter(SleepRecord.user_id == current_user.id)
+    if date_from is not None:
+        query = query.filter(SleepRecord.sleep_date >= to_utc(date_from))
+    if date_to is not None:
+        query = query.filter(SleepRecord.sleep_date < to_utc(date_to))
     
+    records, next_cursor = keyset_page(query, [SleepRecord.sleep_date, SleepRecord.id], cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return records
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import User, SleepRecord, Goal, Reminder, Note, Tombstone
+from app.schemas import sync as sync_schemas
+from app.auth import get_current_user
+from app.config import settings
+from app.pagination import decode_cursor, encode_cursor
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+
+router = APIRouter()
+
+def _changed(query, column, since, until):
+    if since is None:
+        # Полный снимок включает и строки без updated_at (база, обновленная без заполнения столбца)
+        return query.filter(or_(column <= until, column.is_(None))).all()
+    return query.filter(column > since, column <= until).all()
+
+@router.get("/sync", response_model=sync_schemas.SyncResponse, responses={401: {"description": "Не аутентифицирован"}, 400: {"description": "Некорректный курсор"}})
+def sync_changes(
+    since: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Без курсора возвращается полный снимок. Новый курсор - момент начала выборки минус
+    # SYNC_CURSOR_OVERLAP_SECONDS: updated_at выставляется при flush, до commit, и запись,
+    # которая еще не зафиксирована во время выборки, попадет в следующую. Строки из этого
+    # интервала приходят повторно, клиент сопоставляет их по id
+    since_at = decode_cursor(since, [SleepRecord.updated_at])[0] if since else None
+    until = datetime.now(timezone.utc).replace(tzinfo=None)
+    
+    sleep_records = _changed(
+        db.query(SleepRecord).filter(SleepRecord.user_id == current_user.id),
+        SleepRecord.updated_at, since_at, until
+    )
+    notes = _changed(
+        db.query(Note).join(SleepRecord).filter(SleepRecord.user_id == current_user.id),
+        Note.updated_at, since_at, until
+    )
+    goals = _changed(
+        db.query(Goal).filter(Goal.user_id == current_user.id),
+        Goal.updated_at, since_at, until
+    )
+    reminders = _changed(
+        db.query(Reminder).filter(Reminder.user_id == current_user.id),
+        Reminder.updated_at, since_at, until
+    )
+    deleted = _changed(
+        db.query(Tombstone).filter(Tombstone.user_id == current_user.id),
+        Tombstone.deleted_at, since_at, until
+    ) if since_at is not None else []
+    
+    return {
+        "cursor": encode_cursor([until - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP_SECONDS)]),
+        "sleep_records": sleep_records,
+        "notes": notes,
+        "goals": goals,
+        "reminders": reminders,
+        "deleted": deleted
+    }
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from app import account_deletion, repository, sleep_stats, sleep_trends
+from app.async_routes import run_db, thread_bind
 from app.database import get_db
 from app.models import User
 from app.schemas import user as user_schemas
-from app.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from app.auth import (
+    get_password_hash_async, verify_password_async, create_access_token, get_current_user, invalidate_principal
+)
 
 router = APIRouter()
 
-@router.post("/register", response_model=user_schemas.UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user: user_schemas.UserCreate, db: Session = Depends(get_db)):
+def _check_user_unique(db: Session, user: user_schemas.UserCreate):
     db_user = db.query(User).filter(User.username == user.username).first()
     if db_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Пользователь с таким именем уже существует")
@@ -16,29 +20,44 @@ def register_user(user: user_schemas.UserCreate, db: Session = Depends(get_db)):
     db_email = db.query(User).filter(User.email == user.email).first()
     if db_email:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email уже используется")
-    
-    hashed_password = get_password_hash(user.password)
-    new_user = User(
+    # Не держим соединение из пула, пока считается bcrypt
+    db.close()
+
+def _save_user(db: Session, user: user_schemas.UserCreate, hashed_password: str):
+    new_user = repository.create(
+        db, User,
         username=user.username,
         email=user.email,
         password=hashed_password,
         age=user.age
     )
-    db.add(new_user)
     db.commit()
-    db.refresh(new_user)
     return new_user
 
+def _get_password_hash_by_username(db: Session, username: str):
+    user = db.query(User).filter(User.username == username, User.deletion_requested_at.is_(None)).first()
+    hashed_password = user.password if user else None
+    db.close()
+    return hashed_password
+
+# Обработчики асинхронные: запросы к БД идут в общий пул потоков (в async-режиме -
+# через AsyncSession), а bcrypt - в отдельный ограниченный пул и не вытесняет остальные роуты
+@router.post("/register", response_model=user_schemas.UserResponse, status_code=status.HTTP_201_CREATED)
+async def register_user(user: user_schemas.UserCreate, db: Session = Depends(get_db)):
+    await run_db(db, _check_user_unique, user)
+    hashed_password = await get_password_hash_async(user.password)
+    return await run_db(db, _save_user, user, hashed_password)
+
 @router.post("/login", response_model=user_schemas.TokenResponse, responses={401: {"description": "Неверные учетные данные"}})
-def login(login_data: user_schemas.LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == login_data.username).first()
-    if not user or not verify_password(login_data.password, user.password):
+async def login(login_data: user_schemas.LoginRequest, db: Session = Depends(get_db)):
+    hashed_password = await run_db(db, _get_password_hash_by_username, login_data.username)
+    if not hashed_password or not await verify_password_async(login_data.password, hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверное имя пользователя или пароль"
         )
     
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data={"sub": login_data.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/profile", response_model=user_schemas.UserResponse, responses={401: {"description": "Не аутентифицирован"}})
@@ -58,20 +77,28 @@ def update_profile(
         ).first()
         if existing_user:
             raise HTTPException(status_code=400, detail="Email уже используется")
-        current_user.email = user_update.email
-    
-    if user_update.age is not None:
-        current_user.age = user_update.age
     
+    values = user_update.model_dump(exclude_none=True)
+    if not values:
+        return current_user
+    user = repository.update_row(db, User, current_user.id, **values)
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    invalidate_principal(user.username)
+    return user
 
 @router.delete("/profile", status_code=status.HTTP_204_NO_CONTENT, responses={401: {"description": "Не аутентифицирован"}})
 def delete_user(
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    db.delete(current_user)
+    # Аккаунт сразу становится недоступен, данные удаляются фоновой задачей порциями
+    user_id, username = current_user.id, current_user.username
+    current_user.deletion_requested_at = datetime.now(timezone.utc)
     db.commit()
+    invalidate_principal(username)
+    # id может достаться новому пользователю: кэшированная аналитика не должна его пережить
+    sleep_stats.forget_user(user_id)
+    sleep_trends.forget_user(user_id)
+    background_tasks.add_task(account_deletion.purge_user, thread_bind(db), user_id)
     return None
@@ -1,11 +1,17 @@
 from app.schemas.user import UserCreate, UserResponse, UserUpdate, LoginRequest, TokenResponse
-from app.schemas.sleep import SleepRecordCreate, SleepRecordUpdate, SleepRecordResponse, NoteCreate, NoteResponse
+from app.schemas.sleep import (
+    SleepRecordCreate, SleepRecordUpdate, SleepRecordResponse, NoteCreate, NoteResponse,
+    SleepRecordBatchCreate, SleepRecordBatchResponse, SleepImportResponse
+)
 from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse
 from app.schemas.reminder import ReminderCreate, ReminderUpdate, ReminderResponse
+from app.schemas.sync import TombstoneResponse, SyncResponse
 
 __all__ = [
     "UserCreate", "UserResponse", "UserUpdate", "LoginRequest", "TokenResponse",
     "SleepRecordCreate", "SleepRecordUpdate", "SleepRecordResponse", "NoteCreate", "NoteResponse",
+    "SleepRecordBatchCreate", "SleepRecordBatchResponse", "SleepImportResponse",
     "GoalCreate", "GoalUpdate", "GoalResponse",
-    "ReminderCreate", "ReminderUpdate", "ReminderResponse"
+    "ReminderCreate", "ReminderUpdate", "ReminderResponse",
+    "TombstoneResponse", "SyncResponse"
 ]
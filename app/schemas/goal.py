@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class GoalCreate(BaseModel):
     target_duration: float = Field(..., ge=0, le=24)
@@ -19,6 +19,16 @@ class GoalResponse(BaseModel):
     target_quality: int
     description: Optional[str]
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
+
+class GoalProgressResponse(BaseModel):
+    goal_id: int
+    tracked_days: int
+    hit_days: int
+    hit_rate: Optional[float]
+    current_streak: int
+    longest_streak: int
+    last_day: Optional[date]
@@ -34,6 +34,7 @@ class ReminderResponse(BaseModel):
     is_active: bool
     message: Optional[str]
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class SleepRecordCreate(BaseModel):
@@ -72,10 +72,35 @@ class SleepRecordResponse(BaseModel):
     light_sleep: Optional[float]
     rem_sleep: Optional[float]
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+MAX_BATCH_SIZE = 5000
+
+class SleepRecordBatchCreate(BaseModel):
+    # Элементы проверяются по одному, чтобы ошибка в одном не отклоняла весь пакет
+    records: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class SleepRecordBatchItemResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    errors: Optional[List[str]] = None
+
+class SleepRecordBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[SleepRecordBatchItemResult]
+
+class SleepImportResponse(BaseModel):
+    processed: int
+    created: int
+    failed: int
+    # Первые MAX_REPORTED_ERRORS отклоненных записей
+    errors: List[SleepRecordBatchItemResult]
+
 class NoteCreate(BaseModel):
     content: str = Field(..., min_length=1, max_length=1000)
 
@@ -84,6 +109,7 @@ class NoteResponse(BaseModel):
     sleep_record_id: int
     content: str
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
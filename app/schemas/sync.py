@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+from app.schemas.sleep import SleepRecordResponse, NoteResponse
+from app.schemas.goal import GoalResponse
+from app.schemas.reminder import ReminderResponse
+
+class TombstoneResponse(BaseModel):
+    entity: str
+    entity_id: int
+    deleted_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class SyncResponse(BaseModel):
+    cursor: str
+    sleep_records: List[SleepRecordResponse]
+    notes: List[NoteResponse]
+    goals: List[GoalResponse]
+    reminders: List[ReminderResponse]
+    deleted: List[TombstoneResponse]
@@ -0,0 +1,76 @@
+"""
+Потоковая выгрузка истории сна в NDJSON или CSV.
+
+Строки читаются серверным курсором порциями по EXPORT_CHUNK_SIZE и сразу
+сериализуются, поэтому расход памяти не зависит от длины истории.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import SleepRecord
+
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    SleepRecord.id, SleepRecord.sleep_date, SleepRecord.sleep_start, SleepRecord.sleep_end,
+    SleepRecord.duration, SleepRecord.quality, SleepRecord.deep_sleep, SleepRecord.light_sleep,
+    SleepRecord.rem_sleep, SleepRecord.created_at, SleepRecord.updated_at,
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _iter_chunks(db: Session, user_id: int):
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(SleepRecord.user_id == user_id)
+        .order_by(SleepRecord.sleep_date, SleepRecord.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    yield from db.execute(stmt).partitions()
+
+
+def _to_text(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def stream_ndjson(db: Session, user_id: int):
+    for rows in _iter_chunks(db, user_id):
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, map(_to_text, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def stream_csv(db: Session, user_id: int):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in _iter_chunks(db, user_id):
+        writer.writerows([_to_text(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 - формат gzip
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_records(db: Session, user_id: int, fmt: str, gzip: bool = False):
+    chunks = stream_ndjson(db, user_id) if fmt == "ndjson" else stream_csv(db, user_id)
+    return gzip_stream(chunks) if gzip else chunks
@@ -0,0 +1,208 @@
+"""
+Потоковый импорт истории сна из файлов других трекеров (CSV, NDJSON, JSON-массив).
+
+Файл читается блоками по READ_SIZE байт и разбирается по мере чтения, записи
+проверяются и вставляются порциями по IMPORT_CHUNK_SIZE, каждая порция - своя
+транзакция. Порции, загруженные до ошибки формата файла, остаются в БД.
+Каждая ночь датируется своим пробуждением (sleep_end в UTC), поэтому
+перенесенная история сразу попадает в окна статистики, тренды и серии целей.
+
+Запуск из консоли: python -m app.sleep_import USERNAME FILE [--format csv] [--chunk-size 1000]
+"""
+import argparse
+import codecs
+import csv
+import json
+import os
+import re
+from itertools import islice
+
+from sqlalchemy.orm import Session
+
+from app.database import Base, SessionLocal, engine
+from app.models import User
+from app.sleep_ingest import insert_sleep_records, validate_sleep_items
+
+READ_SIZE = 64 * 1024
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# Предел размера одного элемента JSON-массива, чтобы битый файл не читался в память целиком
+MAX_JSON_ITEM_SIZE = 1024 * 1024
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json"}
+
+_json_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+class ImportFormatError(ValueError):
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.created = 0
+
+
+def detect_format(filename):
+    return FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def _iter_text(stream):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    while True:
+        data = stream.read(READ_SIZE)
+        if not data:
+            break
+        try:
+            text = decoder.decode(data)
+        except UnicodeDecodeError:
+            raise ImportFormatError("файл должен быть в кодировке UTF-8")
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _iter_lines(stream):
+    pending = ""
+    for text in _iter_text(stream):
+        lines = (pending + text).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
+
+
+def iter_csv(stream):
+    reader = csv.DictReader(_iter_lines(stream))
+    try:
+        for row in reader:
+            # Пустые ячейки - отсутствующие значения, лишние ячейки без заголовка отбрасываются
+            yield {key: value if value != "" else None for key, value in row.items() if key is not None}
+    except csv.Error as exc:
+        raise ImportFormatError(f"строка {reader.line_num}: {exc}")
+
+
+def iter_ndjson(stream):
+    for number, line in enumerate(_iter_lines(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ImportFormatError(f"строка {number}: {exc.msg}")
+
+
+def iter_json_array(stream):
+    chunks = _iter_text(stream)
+    buffer, pos = "", 0
+    state = "start"
+    eof = False
+    while True:
+        pos = _whitespace.match(buffer, pos).end()
+        if pos < len(buffer):
+            if state == "start":
+                if buffer[pos] != "[":
+                    raise ImportFormatError("ожидается JSON-массив")
+                pos += 1
+                state = "first"
+                continue
+            if state == "separator":
+                char = buffer[pos]
+                pos += 1
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ImportFormatError("ожидается ',' или ']' между элементами")
+                state = "item"
+                continue
+            if state == "first" and buffer[pos] == "]":
+                return
+            try:
+                item, end = _json_decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                if eof or len(buffer) - pos > MAX_JSON_ITEM_SIZE:
+                    raise ImportFormatError(exc.msg)
+                end = None
+            # Значение, упершееся в конец буфера, может продолжаться в следующем блоке
+            if end is not None and (end < len(buffer) or eof):
+                yield item
+                pos = end
+                state = "separator"
+                continue
+        if eof:
+            raise ImportFormatError("неожиданный конец файла")
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_rows(stream, fmt: str):
+    if fmt == "csv":
+        return iter_csv(stream)
+    if fmt == "ndjson":
+        return iter_ndjson(stream)
+    return iter_json_array(stream)
+
+
+def import_sleep_records(db: Session, user_id: int, rows, chunk_size: int = IMPORT_CHUNK_SIZE, progress=None) -> dict:
+    report = {"processed": 0, "created": 0, "failed": 0, "errors": []}
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return report
+            valid, invalid = validate_sleep_items(chunk)
+            ids = insert_sleep_records(db, user_id, [item for _, item in valid])
+            db.commit()
+            for index, errors in invalid[:MAX_REPORTED_ERRORS - len(report["errors"])]:
+                report["errors"].append({"index": report["processed"] + index, "status": "invalid", "errors": errors})
+            report["processed"] += len(chunk)
+            report["created"] += len(ids)
+            report["failed"] += len(invalid)
+            if progress:
+                progress(report)
+    except ImportFormatError as exc:
+        db.rollback()
+        exc.created = report["created"]
+        raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт записей сна из CSV, NDJSON или JSON")
+    parser.add_argument("username")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())))
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("не удалось определить формат файла, укажите --format")
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == args.username).first()
+        if user is None:
+            parser.error(f"пользователь {args.username} не найден")
+        with open(args.path, "rb") as stream:
+            report = import_sleep_records(
+                db, user.id, iter_rows(stream, fmt), args.chunk_size,
+                progress=lambda r: print(f"Обработано строк: {r['processed']}, загружено: {r['created']}")
+            )
+    except ImportFormatError as exc:
+        raise SystemExit(f"Некорректный файл: {exc}. Загружено записей: {exc.created}")
+    finally:
+        db.close()
+    for error in report["errors"]:
+        print(f"Запись {error['index']}: {'; '.join(error['errors'])}")
+    print(f"Готово, загружено: {report['created']}, отклонено: {report['failed']}")
+
+
+if __name__ == "__main__":
+    main()
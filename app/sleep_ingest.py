@@ -0,0 +1,65 @@
+"""
+Пакетная вставка записей сна: один executemany, одно обновление статистики.
+
+Пакет обычно содержит прошлые ночи (синхронизация устройства, импорт), поэтому
+sleep_date берется из самой ночи, а не из времени вставки: по его дню запись
+попадает в окна статистики, тренды и серии целей.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import sleep_stats
+from app.models import SleepRecord
+from app.schemas.sleep import SleepRecordCreate
+
+
+def validate_sleep_items(items: list):
+    """Проверяет элементы по одному, возвращает [(index, SleepRecordCreate)] и [(index, [ошибки])]."""
+    valid, invalid = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, SleepRecordCreate.model_validate(item)))
+        except ValidationError as exc:
+            invalid.append((index, [
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in exc.errors()
+            ]))
+    return valid, invalid
+
+
+def to_utc(value: datetime) -> datetime:
+    """Время в UTC без часового пояса, как хранится sleep_date (для ночи - to_utc(sleep_end))."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def insert_sleep_records(db: Session, user_id: int, items) -> list:
+    """Вставляет проверенные SleepRecordCreate и возвращает id в порядке items."""
+    if not items:
+        return []
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "user_id": user_id,
+            "sleep_date": to_utc(item.sleep_end),
+            "sleep_start": item.sleep_start,
+            "sleep_end": item.sleep_end,
+            "duration": (item.sleep_end - item.sleep_start).total_seconds() / 3600,
+            "quality": item.quality,
+            "deep_sleep": item.deep_sleep,
+            "light_sleep": item.light_sleep,
+            "rem_sleep": item.rem_sleep,
+            "created_at": now,
+        }
+        for item in items
+    ]
+    ids = db.scalars(
+        insert(SleepRecord).returning(SleepRecord.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+    sleep_stats.records_added(db, user_id, [SimpleNamespace(**row) for row in rows])
+    return ids
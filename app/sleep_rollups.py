@@ -0,0 +1,131 @@
+"""
+Дневные свертки записей сна (таблица sleep_daily_rollups).
+
+Одна строка на пользователя и календарный день sleep_date (UTC, день
+пробуждения - см. app.sleep_ingest.to_utc): число записей,
+суммы длительности, качества и фаз, экстремумы длительности. Статистика за
+последние N дней (/api/statistics?window=N) суммирует не больше N строк вместо
+чтения всех записей периода.
+
+Свертки обновляют хуки app.sleep_stats в той же транзакции, что и саму запись.
+Добавления применяются приращением; изменения и удаления пересчитывают
+затронутые дни по записям этих дней, поэтому прежние значения фаз не нужны,
+а экстремумы остаются точными.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.aggregates import sleep_aggregates_statement
+from app.models import SleepRecord, SleepDailyRollup
+
+# Агрегат из app.aggregates -> колонка свертки
+ROLLUP_COLUMNS = {
+    "total_records": "record_count",
+    "duration_sum": "duration_sum",
+    "duration_sq_sum": "duration_sq_sum",
+    "min_duration": "min_duration",
+    "max_duration": "max_duration",
+    "quality_sum": "quality_sum",
+    "deep_sleep_sum": "deep_sleep_sum",
+    "deep_sleep_count": "deep_sleep_count",
+    "light_sleep_sum": "light_sleep_sum",
+    "light_sleep_count": "light_sleep_count",
+    "rem_sleep_sum": "rem_sleep_sum",
+    "rem_sleep_count": "rem_sleep_count",
+}
+PHASES = ("deep_sleep", "light_sleep", "rem_sleep")
+SUMMED_COLUMNS = [column for column in ROLLUP_COLUMNS.values() if column not in ("min_duration", "max_duration")]
+
+
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _day_range(day: date):
+    start = datetime.combine(day, time.min)
+    return (SleepRecord.sleep_date >= start) & (SleepRecord.sleep_date < start + timedelta(days=1))
+
+
+def _insert_from_records(db: Session, *conditions) -> None:
+    day = func.date(SleepRecord.sleep_date)
+    stmt = (
+        sleep_aggregates_statement(list(ROLLUP_COLUMNS))
+        .add_columns(SleepRecord.user_id, day)
+        .where(SleepRecord.sleep_date.is_not(None), *conditions)
+        .group_by(SleepRecord.user_id, day)
+    )
+    db.execute(insert(SleepDailyRollup).from_select([*ROLLUP_COLUMNS.values(), "user_id", "day"], stmt))
+
+
+def rebuild(db: Session, user_ids) -> None:
+    db.execute(delete(SleepDailyRollup).where(SleepDailyRollup.user_id.in_(user_ids)))
+    _insert_from_records(db, SleepRecord.user_id.in_(user_ids))
+
+
+def refresh_days(db: Session, user_id: int, days) -> None:
+    """Пересчитывает свертки указанных дней по записям сна (записи должны быть сброшены в БД)."""
+    days = {_day(day) for day in days if day is not None}
+    if not days:
+        return
+    db.execute(
+        delete(SleepDailyRollup)
+        .where(SleepDailyRollup.user_id == user_id, SleepDailyRollup.day.in_(days))
+    )
+    _insert_from_records(db, SleepRecord.user_id == user_id, or_(*(_day_range(day) for day in days)))
+
+
+def add(db: Session, user_id: int, records) -> None:
+    by_day = defaultdict(list)
+    for record in records:
+        if record.sleep_date is not None:
+            by_day[_day(record.sleep_date)].append(record)
+
+    missing = []
+    rollup = SleepDailyRollup
+    for day, day_records in by_day.items():
+        durations = [r.duration for r in day_records]
+        lowest, highest = min(durations), max(durations)
+        deltas = {
+            "record_count": len(day_records),
+            "duration_sum": sum(durations),
+            "duration_sq_sum": sum(d * d for d in durations),
+            "quality_sum": sum(r.quality for r in day_records),
+        }
+        for phase in PHASES:
+            phase_values = [getattr(r, phase) for r in day_records if getattr(r, phase) is not None]
+            deltas[f"{phase}_sum"] = sum(phase_values)
+            deltas[f"{phase}_count"] = len(phase_values)
+        result = db.execute(
+            update(rollup)
+            .where(rollup.user_id == user_id, rollup.day == day)
+            .values(
+                **{column: getattr(rollup, column) + delta for column, delta in deltas.items()},
+                min_duration=case(
+                    (or_(rollup.min_duration.is_(None), rollup.min_duration > lowest), lowest),
+                    else_=rollup.min_duration,
+                ),
+                max_duration=case(
+                    (or_(rollup.max_duration.is_(None), rollup.max_duration < highest), highest),
+                    else_=rollup.max_duration,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            missing.append(day)
+    # Первая запись за день: строки еще нет, собираем ее из записей
+    refresh_days(db, user_id, missing)
+
+
+def window_totals(db: Session, user_id: int, since: date) -> dict:
+    """Суммы сверток начиная с дня since: не больше одной строки на день окна."""
+    rollup = SleepDailyRollup
+    stmt = select(
+        *(func.coalesce(func.sum(getattr(rollup, column)), 0).label(column) for column in SUMMED_COLUMNS),
+        func.min(rollup.min_duration).label("min_duration"),
+        func.max(rollup.max_duration).label("max_duration"),
+    ).where(rollup.user_id == user_id, rollup.day >= since)
+    return dict(db.execute(stmt).one()._mapping)
@@ -0,0 +1,323 @@
+"""
+Материализованная статистика сна пользователя (таблица user_sleep_stats).
+
+Роуты записей сна вызывают record_added/record_changed/record_removed в той же
+транзакции, что и саму запись, поэтому аналитика читает одну строку вместо
+всей истории. Прежние значения для record_changed читаются после lock_stats,
+уже под блокировкой записи. Если строки еще нет (например, данные загружены в
+обход API), она пересчитывается из sleep_records.
+
+Поверх таблицы работает LRU-кэш сводок, ключ которого включает версию данных
+пользователя из той же строки (колонка version). Хуки поднимают ее в той же
+транзакции, что и запись сна, поэтому устаревшая сводка не находится и после
+записи из другого процесса (импорт, пересчет, второй воркер).
+
+В строке хранится и скетч длительностей (app.duration_sketch), из которого
+сводка отдает приближенные перцентили без сортировки всей истории.
+
+Те же хуки поддерживают дневные свертки (app.sleep_rollups), по которым
+считается статистика за последние N дней, и пересобирают их вместе со строкой
+статистики. По обновленным сверткам пересчитывается прогресс целей
+(app.goal_progress).
+
+Полный пересчет таблиц: python -m app.sleep_stats rebuild [--chunk-size N]
+"""
+import argparse
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Integer, case, cast, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app import goal_progress, sleep_rollups
+from app.aggregates import get_sleep_aggregates_by_user
+from app.cache import LRUCache
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.duration_sketch import BINS_PER_HOUR, DurationSketch
+from app.models import User, SleepRecord, UserSleepStats
+
+STATS_FIELDS = [
+    "total_records", "duration_sum", "duration_sq_sum", "min_duration",
+    "max_duration", "quality_sum", "quality_sq_sum",
+]
+
+SUMMARY_PERCENTILES = (10, 25, 50, 75, 90)
+
+WINDOW_FIELDS = [
+    "record_count", "duration_sum", "duration_sq_sum", "min_duration", "max_duration", "quality_sum",
+]
+
+SleepValues = namedtuple(
+    "SleepValues",
+    ["user_id", "sleep_date", "duration", "quality", "deep_sleep", "light_sleep", "rem_sleep"],
+)
+
+# Поля обновления, от которых зависит статистика (duration выводится из начала и конца сна)
+TRACKED_FIELDS = frozenset({"sleep_start", "sleep_end", "quality"})
+
+stats_cache = LRUCache("analytics", settings.ANALYTICS_CACHE_SIZE)
+
+
+def forget_user(user_id: int) -> None:
+    stats_cache.pop_where(lambda key: key[0] == user_id)
+
+
+def snapshot(record) -> SleepValues:
+    return SleepValues(*(getattr(record, field) for field in SleepValues._fields))
+
+
+def _duration_bins_by_user(db: Session, user_ids) -> dict:
+    # Те же номера корзин, что и DurationSketch.bin_index: CAST в SQLite отбрасывает дробную часть, как int()
+    bin_index = cast(SleepRecord.duration * BINS_PER_HOUR, Integer)
+    rows = db.execute(
+        select(SleepRecord.user_id, bin_index, func.count())
+        .where(SleepRecord.user_id.in_(user_ids), SleepRecord.duration.is_not(None))
+        .group_by(SleepRecord.user_id, bin_index)
+    )
+    bins = defaultdict(dict)
+    for user_id, index, count in rows:
+        bins[user_id][index] = count
+    return bins
+
+
+def rebuild_stats(db: Session, user_ids) -> None:
+    db.flush()
+    # DELETE до чтения агрегатов: pysqlite начинает транзакцию с первого изменения, и только
+    # так запись, зафиксированная между чтением и вставкой, не теряется
+    db.execute(delete(UserSleepStats).where(UserSleepStats.user_id.in_(user_ids)))
+    aggregates = get_sleep_aggregates_by_user(db, user_ids, STATS_FIELDS)
+    bins = _duration_bins_by_user(db, user_ids)
+    now = datetime.now(timezone.utc)
+    empty = {
+        "total_records": 0, "duration_sum": 0.0, "duration_sq_sum": 0.0, "min_duration": None,
+        "max_duration": None, "quality_sum": 0, "quality_sq_sum": 0,
+    }
+    rows = []
+    for user_id in user_ids:
+        values = dict(aggregates.get(user_id, empty))
+        values["record_count"] = values.pop("total_records")
+        values["duration_sketch"] = DurationSketch.from_bins(bins.get(user_id, {})).dumps()
+        rows.append({"user_id": user_id, "updated_at": now, "version": time.time_ns(), **values})
+    db.execute(insert(UserSleepStats), rows)
+    sleep_rollups.rebuild(db, user_ids)
+    goal_progress.rebuild_for_users(db, user_ids)
+
+
+def get_user_stats(db: Session, user_id: int) -> UserSleepStats:
+    stats = db.get(UserSleepStats, user_id, populate_existing=True)
+    if stats is None:
+        rebuild_stats(db, [user_id])
+        db.commit()
+        stats = db.get(UserSleepStats, user_id, populate_existing=True)
+    return stats
+
+
+def data_version(db: Session, user_id: int) -> int:
+    version = db.scalar(select(UserSleepStats.version).where(UserSleepStats.user_id == user_id))
+    if version is None:
+        version = get_user_stats(db, user_id).version
+    return version
+
+
+def _phase_averages(totals: dict) -> dict:
+    return {
+        f"average_{phase}": totals[f"{phase}_sum"] / totals[f"{phase}_count"] if totals[f"{phase}_count"] else None
+        for phase in sleep_rollups.PHASES
+    }
+
+
+def get_stats_summary(db: Session, user_id: int, window: int = None) -> dict:
+    """Сводка за всю историю или, если задан window, за последние window дней (UTC)."""
+    since = datetime.now(timezone.utc).date() - timedelta(days=window - 1) if window else None
+    version = data_version(db, user_id)
+    key = (user_id, version) if since is None else (user_id, version, since)
+    summary = stats_cache.get(key)
+    if summary is not None:
+        return summary
+    
+    # Строка статистики нужна и для окна: при ее пересборке пересобираются и свертки
+    stats = get_user_stats(db, user_id)
+    if since is not None and stats.record_count:
+        totals = sleep_rollups.window_totals(db, user_id, since)
+        # Несохраненная строка: средние и отклонение за окно считают свойства модели
+        stats = UserSleepStats(**{field: totals[field] for field in WINDOW_FIELDS})
+    summary = {"total_records": stats.record_count}
+    if stats.record_count:
+        summary.update(
+            average_duration=stats.average_duration,
+            average_quality=stats.average_quality,
+            max_duration=stats.max_duration,
+            min_duration=stats.min_duration,
+            duration_stddev=stats.duration_stddev,
+        )
+        if since is not None:
+            summary.update(_phase_averages(totals))
+        elif stats.duration_sketch is not None:
+            percentiles = DurationSketch.loads(stats.duration_sketch).percentiles(
+                SUMMARY_PERCENTILES, stats.min_duration, stats.max_duration
+            )
+            summary["duration_percentiles"] = {
+                f"p{percent}": value for percent, value in zip(SUMMARY_PERCENTILES, percentiles)
+            }
+    stats_cache.set(key, summary)
+    return summary
+
+
+def _remaining(aggregate, user_id):
+    return (
+        select(aggregate(SleepRecord.duration))
+        .where(SleepRecord.user_id == user_id)
+        .scalar_subquery()
+    )
+
+
+def _apply(db: Session, user_id: int, records, sign: int) -> bool:
+    stats = UserSleepStats
+    durations = [r.duration for r in records]
+    # Скетч меняется в Python: нет строки или скетча - пересчет из записей
+    sketch_data = db.scalar(select(stats.duration_sketch).where(stats.user_id == user_id))
+    if sketch_data is None:
+        return False
+    sketch = DurationSketch.loads(sketch_data)
+    sketch.add(durations, sign)
+    qualities = [r.quality for r in records]
+    lowest, highest = min(durations), max(durations)
+    if sign > 0:
+        min_duration = case(
+            (or_(stats.min_duration.is_(None), stats.min_duration > lowest), lowest),
+            else_=stats.min_duration,
+        )
+        max_duration = case(
+            (or_(stats.max_duration.is_(None), stats.max_duration < highest), highest),
+            else_=stats.max_duration,
+        )
+    else:
+        # Удаленное значение могло быть экстремумом: тогда берем его из оставшихся записей
+        min_duration = case(
+            (stats.min_duration >= lowest, _remaining(func.min, user_id)),
+            else_=stats.min_duration,
+        )
+        max_duration = case(
+            (stats.max_duration <= highest, _remaining(func.max, user_id)),
+            else_=stats.max_duration,
+        )
+    result = db.execute(
+        update(stats)
+        .where(stats.user_id == user_id)
+        .values(
+            record_count=stats.record_count + sign * len(records),
+            duration_sum=stats.duration_sum + sign * sum(durations),
+            duration_sq_sum=stats.duration_sq_sum + sign * sum(d * d for d in durations),
+            min_duration=min_duration,
+            max_duration=max_duration,
+            quality_sum=stats.quality_sum + sign * sum(qualities),
+            quality_sq_sum=stats.quality_sq_sum + sign * sum(q * q for q in qualities),
+            duration_sketch=sketch.dumps(),
+            version=stats.version + 1,
+            updated_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def _touch(db: Session, user_id: int) -> None:
+    # Изменились только дневные свертки: сводки за окна устарели, поднимаем версию
+    db.execute(
+        update(UserSleepStats)
+        .where(UserSleepStats.user_id == user_id)
+        .values(version=UserSleepStats.version + 1, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def lock_stats(db: Session, user_id: int) -> None:
+    """Блокирует строку статистики до чтения прежних значений записи для record_changed."""
+    # pysqlite открывает транзакцию только на первом INSERT/UPDATE/DELETE: без этого UPDATE
+    # прежние значения читаются вне блокировки, и две параллельные правки вычтут одно и то же
+    _touch(db, user_id)
+
+
+def _apply_or_rebuild(db: Session, user_id: int, records, sign: int) -> None:
+    db.flush()
+    if not _apply(db, user_id, records, sign):
+        rebuild_stats(db, [user_id])
+        return
+    days = [record.sleep_date for record in records]
+    if sign > 0:
+        sleep_rollups.add(db, user_id, records)
+    else:
+        sleep_rollups.refresh_days(db, user_id, days)
+    goal_progress.days_changed(db, user_id, days)
+
+
+def record_added(db: Session, record) -> None:
+    _apply_or_rebuild(db, record.user_id, [record], 1)
+
+
+def records_added(db: Session, user_id: int, records) -> None:
+    if records:
+        _apply_or_rebuild(db, user_id, records, 1)
+
+
+def record_removed(db: Session, record) -> None:
+    _apply_or_rebuild(db, record.user_id, [record], -1)
+
+
+def record_changed(db: Session, old: SleepValues, record) -> None:
+    db.flush()
+    days = {old.sleep_date, record.sleep_date}
+    sleep_rollups.refresh_days(db, record.user_id, days)
+    goal_progress.days_changed(db, record.user_id, days)
+    if old.duration == record.duration and old.quality == record.quality:
+        _touch(db, record.user_id)
+        return
+    if _apply(db, record.user_id, [old], -1):
+        _apply(db, record.user_id, [record], 1)
+    else:
+        rebuild_stats(db, [record.user_id])
+
+
+def phases_changed(db: Session, record) -> None:
+    # Фазы не входят в user_sleep_stats, но входят в дневную свертку
+    sleep_rollups.refresh_days(db, record.user_id, [record.sleep_date])
+    _touch(db, record.user_id)
+
+
+def rebuild_all(db: Session, chunk_size: int = 500, progress=None) -> int:
+    processed = 0
+    last_id = 0
+    while True:
+        user_ids = db.scalars(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).all()
+        if not user_ids:
+            return processed
+        rebuild_stats(db, user_ids)
+        db.commit()
+        processed += len(user_ids)
+        last_id = user_ids[-1]
+        if progress:
+            progress(processed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пересчет таблиц user_sleep_stats, sleep_daily_rollups и goal_progress")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        total = rebuild_all(db, args.chunk_size, progress=lambda n: print(f"Пересчитано пользователей: {n}"))
+    finally:
+        db.close()
+    print(f"Готово, пользователей: {total}")
+
+
+if __name__ == "__main__":
+    main()
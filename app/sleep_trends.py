@@ -0,0 +1,158 @@
+"""
+Тренды сна пользователя (GET /api/statistics/trends).
+
+Колонки duration/quality/фаз сна выбираются одним запросом и превращаются в
+непрерывные массивы NumPy; все показатели считаются векторно. Скользящие
+средние за 7 и 30 дней и сравнение неделя к неделе считаются по календарным
+дням и отсчитываются от последней ночи пользователя, а не от текущей даты.
+Фазы сна необязательны: пропуски (NaN) в расчетах не участвуют.
+
+Результат кэшируется с ключом по версии данных пользователя, как и сводка
+в app.sleep_stats.
+"""
+from collections import namedtuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.cache import LRUCache
+from app.config import settings
+from app.models import SleepRecord
+from app.sleep_stats import data_version
+
+METRICS = ("duration", "quality", "deep_sleep", "light_sleep", "rem_sleep")
+PERCENTILES = (10, 25, 50, 75, 90)
+WINDOWS = (7, 30)
+# Метрики, для которых отдается ряд скользящих средних по дням
+DAILY_METRICS = ("duration", "quality")
+
+SleepSeries = namedtuple("SleepSeries", ["days", "first_date", "values"])
+
+trends_cache = LRUCache("trends", settings.ANALYTICS_CACHE_SIZE)
+
+
+def load_series(db: Session, user_id: int):
+    """Ночи пользователя в виде массивов: номер дня от первой ночи и матрица METRICS x ночи."""
+    # date() отдает день строкой (в SQLite) или датой: разбор datetime на каждой строке не нужен
+    rows = db.execute(
+        select(func.date(SleepRecord.sleep_date), *(getattr(SleepRecord, name) for name in METRICS))
+        .where(SleepRecord.user_id == user_id, SleepRecord.sleep_date.is_not(None))
+        .order_by(SleepRecord.sleep_date, SleepRecord.id)
+    ).all()
+    if not rows:
+        return None
+    dates, *columns = zip(*rows)
+    dates = np.array(dates, dtype="datetime64[D]")
+    return SleepSeries(
+        days=(dates - dates[0]).astype(np.int64),
+        first_date=dates[0],
+        values=np.array(columns, dtype=np.float64),
+    )
+
+
+def _rolling(sum_prefix, count_prefix, ends, window):
+    """Средние за окна из window дней, заканчивающиеся в днях ends; NaN, если данных нет."""
+    stop = ends + 1
+    start = np.maximum(stop - window, 0)
+    window_sums = sum_prefix[:, stop] - sum_prefix[:, start]
+    window_counts = count_prefix[:, stop] - count_prefix[:, start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+def _number(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def compute_trends(series: SleepSeries, days: int = 30) -> dict:
+    values = series.values
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    present = valid.astype(np.float64)
+    total_days = int(series.days[-1]) + 1
+
+    # Префиксные суммы по календарным дням: несколько записей за день усредняются вместе,
+    # а среднее за любое окно - разность двух префиксов
+    zero = np.zeros((len(METRICS), 1))
+    sum_prefix = np.hstack([zero, np.cumsum(
+        [np.bincount(series.days, weights=row, minlength=total_days) for row in filled], axis=1
+    )])
+    count_prefix = np.hstack([zero, np.cumsum(
+        [np.bincount(series.days, weights=row, minlength=total_days) for row in present], axis=1
+    )])
+    # Окна нужны только для последних дней: ряда daily и прошлой недели
+    shown = min(days, total_days)
+    ends = np.arange(max(total_days - max(shown, 8), 0), total_days)
+    rolling = {window: _rolling(sum_prefix, count_prefix, ends, window) for window in WINDOWS}
+
+    weekly = rolling[7]
+    current_week = weekly[:, -1]
+    previous_week = weekly[:, -8] if total_days > 7 else np.full(len(METRICS), np.nan)
+
+    metrics = {}
+    for index, name in enumerate(METRICS):
+        mask = valid[index]
+        if not mask.any():
+            metrics[name] = None
+            continue
+        row = values[index, mask]
+        x = series.days[mask].astype(np.float64)
+        x_centered = x - x.mean()
+        x_variance = np.dot(x_centered, x_centered)
+        slope = np.dot(x_centered, row - row.mean()) / x_variance if x_variance else np.nan
+        metrics[name] = {
+            "count": int(mask.sum()),
+            "mean": _number(row.mean()),
+            "std": _number(row.std()),
+            "min": _number(row.min()),
+            "max": _number(row.max()),
+            "percentiles": {
+                f"p{p}": _number(value) for p, value in zip(PERCENTILES, np.percentile(row, PERCENTILES))
+            },
+            "slope_per_day": _number(slope, 4),
+            **{f"rolling_{window}d": _number(rolling[window][index, -1]) for window in WINDOWS},
+            "week_over_week": {
+                "current": _number(current_week[index]),
+                "previous": _number(previous_week[index]),
+                "delta": _number(current_week[index] - previous_week[index]),
+            },
+        }
+
+    dates = series.first_date + np.arange(total_days - shown, total_days)
+    daily_rolling = {
+        (name, window): rolling[window][METRICS.index(name), -shown:]
+        for name in DAILY_METRICS for window in WINDOWS
+    }
+    daily = [
+        {
+            "date": str(date),
+            **{f"{name}_{window}d": _number(column[i]) for (name, window), column in daily_rolling.items()},
+        }
+        for i, date in enumerate(dates)
+    ]
+
+    return {
+        "total_records": int(values.shape[1]),
+        "first_date": str(series.first_date),
+        "last_date": str(dates[-1]),
+        "metrics": metrics,
+        "daily": daily,
+    }
+
+
+def forget_user(user_id: int) -> None:
+    trends_cache.pop_where(lambda key: key[0] == user_id)
+
+
+def get_trends(db: Session, user_id: int, days: int = 30):
+    key = (user_id, data_version(db, user_id), days)
+    trends = trends_cache.get(key)
+    if trends is not None:
+        return trends
+
+    series = load_series(db, user_id)
+    trends = compute_trends(series, days) if series is not None else None
+    if trends is not None:
+        trends_cache.set(key, trends)
+    return trends
@@ -0,0 +1,101 @@
+"""
+Удаление аккаунта с 50k записей сна и 100k заметок: каскад ORM, загружающий
+все дочерние строки в сессию (прежнее поведение), против ON DELETE CASCADE в БД.
+
+Запуск: python -m benchmarks.bench_account_delete
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.models import User, SleepRecord, Note, Goal
+
+RECORDS = 50_000
+NOTES_PER_RECORD = 2
+
+
+def fill(engine):
+    Base.metadata.create_all(bind=engine)
+    start = datetime(1900, 1, 1, 23, 0)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(username="heavy", email="heavy@example.com", password="x")
+        ).inserted_primary_key[0]
+        conn.execute(insert(SleepRecord), [
+            {
+                "user_id": user_id,
+                "sleep_date": start + timedelta(days=i),
+                "sleep_start": start + timedelta(days=i),
+                "sleep_end": start + timedelta(days=i, hours=8),
+                "duration": 8.0,
+                "quality": 7,
+            }
+            for i in range(RECORDS)
+        ])
+        record_ids = conn.scalars(select(SleepRecord.id).where(SleepRecord.user_id == user_id)).all()
+        conn.execute(insert(Note), [
+            {"sleep_record_id": record_id, "content": f"заметка {n}"}
+            for record_id in record_ids
+            for n in range(NOTES_PER_RECORD)
+        ])
+        conn.execute(insert(Goal), [{"user_id": user_id, "target_duration": 8.0, "target_quality": 8}])
+    return user_id
+
+
+def orm_cascade(db, user_id):
+    # То, что делал cascade="all, delete-orphan" без passive_deletes
+    user = db.get(User, user_id)
+    for record in user.sleep_records:
+        for note in record.notes:
+            db.delete(note)
+        db.delete(record)
+    for child in (*user.goals, *user.reminders, *user.tombstones):
+        db.delete(child)
+    db.delete(user)
+    db.commit()
+
+
+def db_cascade(db, user_id):
+    db.delete(db.get(User, user_id))
+    db.commit()
+
+
+def main():
+    print(f"{'variant':>12} {'s':>7} {'statements':>11} {'peak, MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, delete, factory in (
+            # Прежняя схема: внешние ключи SQLite не проверялись
+            ("orm cascade", orm_cascade, lambda url: create_engine(url, connect_args={"check_same_thread": False})),
+            ("db cascade", db_cascade, create_db_engine),
+        ):
+            results = []
+            for traced in (False, True):
+                engine = factory(f"sqlite:///{os.path.join(tmp, f'{name}-{traced}.db')}")
+                user_id = fill(engine)
+                statements = []
+                event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+                session_factory = sessionmaker(autoflush=False, bind=engine)
+                with session_factory() as db:
+                    if traced:
+                        tracemalloc.start()
+                    started = time.perf_counter()
+                    delete(db, user_id)
+                    results.append(time.perf_counter() - started)
+                    if traced:
+                        results.append(tracemalloc.get_traced_memory()[1])
+                        tracemalloc.stop()
+                    results.append(len(statements))
+                    assert db.scalar(select(func.count()).select_from(Note)) == 0
+                engine.dispose()
+            elapsed, statement_count, _, peak, _ = results
+            print(f"{name:>12} {elapsed:>7.2f} {statement_count:>11} {peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
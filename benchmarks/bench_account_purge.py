@@ -0,0 +1,88 @@
+"""
+Задержка записи других пользователей во время удаления тяжелого аккаунта
+(50k записей сна, 100k заметок): один DELETE с каскадом против фонового
+удаления порциями (app/account_deletion.py).
+
+Запуск: python -m benchmarks.bench_account_purge
+"""
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import OperationalError
+
+from app.account_deletion import purge_user
+from app.database import create_db_engine
+from app.models import User, SleepRecord
+from benchmarks.bench_account_delete import fill
+
+
+def single_delete(engine, user_id):
+    with engine.begin() as conn:
+        conn.execute(delete(User).where(User.id == user_id))
+
+
+def measure_writes(engine, remove):
+    heavy_id = fill(engine)
+    with engine.begin() as conn:
+        other_id = conn.execute(
+            insert(User).values(username="other", email="other@example.com", password="x")
+        ).inserted_primary_key[0]
+    latencies = []
+    errors = 0
+    done = threading.Event()
+
+    def writer():
+        nonlocal errors
+        start = datetime(2030, 1, 1, 23, 0)
+        while not done.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(SleepRecord).values(
+                        user_id=other_id, sleep_start=start, sleep_end=start + timedelta(hours=8),
+                        duration=8.0, quality=7
+                    ))
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                errors += 1
+            time.sleep(0.002)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.2)
+    started = time.perf_counter()
+    remove(engine, heavy_id)
+    elapsed = time.perf_counter() - started
+    done.set()
+    thread.join()
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "writes": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    print(f"{'variant':>14} {'delete, s':>10} {'writes':>7} {'p50, ms':>8} {'p99, ms':>8} {'max, ms':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, remove in (("single delete", single_delete), ("chunked purge", purge_user)):
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, name.replace(' ', '_') + '.db')}")
+            result = measure_writes(engine, remove)
+            print(
+                f"{name:>14} {result['elapsed']:>10.2f} {result['writes']:>7} {result['p50_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {result['max_ms']:>8.2f} {result['errors']:>7}"
+            )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Пропускная способность синхронного и async-стека (DB_ASYNC) при задержке БД.
+
+В синхронном режиме каждый запрос к БД занимает поток из пула Starlette
+(THREADPOOL_SIZE), в async-режиме обработчик ждет драйвер (aiosqlite) на event loop.
+Задержка сетевой БД имитируется паузой в потоке драйвера перед каждым SQL-запросом.
+
+Запуск: python -m benchmarks.bench_async_stack
+"""
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from anyio import to_thread
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.util import await_only
+
+from app.auth import create_access_token
+from app.config import settings
+from app.database import Base, get_async_db, get_db
+from app.main import create_app
+from app.models import User, SleepRecord
+
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 3
+DB_LATENCIES = (0.005, 0.2)
+
+latency = {"seconds": 0.0}
+
+
+def simulate_network_latency(statement):
+    time.sleep(latency["seconds"])
+
+
+async def run_scenario(app, record_id, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in range(REQUESTS_PER_CLIENT):
+                response = await client.get(f"/api/sleep/{record_id}", headers=headers)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CLIENTS)))
+        return CLIENTS * REQUESTS_PER_CLIENT / (time.perf_counter() - started)
+
+
+async def main():
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=CLIENTS)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=CLIENTS)
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+        with session_factory() as db:
+            user = User(username="bench", email="bench@example.com", password="x")
+            db.add(user)
+            db.flush()
+            start = datetime(2024, 1, 1, 23, 0)
+            record = SleepRecord(
+                user_id=user.id, sleep_start=start, sleep_end=start + timedelta(hours=8), duration=8.0, quality=7
+            )
+            db.add(record)
+            db.commit()
+            record_id = record.id
+
+        @event.listens_for(engine, "connect")
+        def trace_sync(dbapi_connection, connection_record):
+            dbapi_connection.set_trace_callback(simulate_network_latency)
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def trace_async(dbapi_connection, connection_record):
+            # Колбэк выполняется в потоке aiosqlite, event loop не блокируется
+            await_only(dbapi_connection.driver_connection.set_trace_callback(simulate_network_latency))
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_get_async_db():
+            async with async_session_factory() as db:
+                yield db
+
+        apps = {"sync": create_app(async_db=False), "async": create_app(async_db=True)}
+        apps["sync"].dependency_overrides[get_db] = override_get_db
+        apps["async"].dependency_overrides[get_async_db] = override_get_async_db
+        token = create_access_token({"sub": "bench"})
+        print(f"threadpool: {settings.THREADPOOL_SIZE}, clients: {CLIENTS}")
+        print(f"{'db latency, ms':>14} {'stack':>6} {'req/s':>8}")
+        for seconds in DB_LATENCIES:
+            latency["seconds"] = seconds
+            for name, app in apps.items():
+                throughput = await run_scenario(app, record_id, token)
+                print(f"{seconds * 1000:>14.0f} {name:>6} {throughput:>8.0f}")
+        await async_engine.dispose()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
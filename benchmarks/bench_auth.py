@@ -0,0 +1,58 @@
+"""
+Накладные расходы get_current_user на один запрос:
+без кэшей, с кэшем пользователя и с кэшем пользователя и токенов.
+
+Запуск: python -m benchmarks.bench_auth
+"""
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import auth
+from app.database import Base
+from app.models import User
+
+ITERATIONS = 5_000
+
+
+def measure(session_factory, credentials, caches):
+    db = session_factory()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for cache in caches:
+            cache.clear()
+        auth.get_current_user(credentials, db)
+        db.expunge_all()
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed / ITERATIONS * 1_000_000
+
+
+def main():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        db.add(User(username="bench", email="bench@example.com", password="x"))
+        db.commit()
+
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=auth.create_access_token({"sub": "bench"})
+    )
+    variants = (
+        ("no cache", [auth.principal_cache, auth.token_cache]),
+        ("principal cache", [auth.token_cache]),
+        ("principal + token cache", []),
+    )
+    print(f"{'variant':>24} {'us/request':>11}")
+    for name, cleared in variants:
+        auth.principal_cache.clear()
+        auth.token_cache.clear()
+        print(f"{name:>24} {measure(session_factory, credentials, cleared):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
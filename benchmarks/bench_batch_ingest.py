@@ -0,0 +1,79 @@
+"""
+Загрузка 1000 ночей: отдельными POST /api/sleep против одного POST /api/sleep/batch.
+
+Запуск: python -m benchmarks.bench_batch_ingest
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_access_token
+from app.database import Base, create_db_engine, get_db
+from app.main import app
+from app.models import User
+
+NIGHTS = 1000
+
+
+def nights():
+    base = datetime(2024, 1, 1, 23, 0, tzinfo=timezone.utc)
+    return [
+        {
+            "sleep_start": (base + timedelta(days=i)).isoformat(),
+            "sleep_end": (base + timedelta(days=i, hours=7, minutes=i % 60)).isoformat(),
+            "quality": 1 + i % 10,
+            "deep_sleep": 1.5,
+            "light_sleep": 4.0,
+            "rem_sleep": 1.0,
+        }
+        for i in range(NIGHTS)
+    ]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            db.add_all([
+                User(username="single", email="single@example.com", password="x"),
+                User(username="batch", email="batch@example.com", password="x"),
+            ])
+            db.commit()
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        payload = nights()
+        with TestClient(app) as client:
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': 'single'})}"}
+            started = time.perf_counter()
+            for night in payload:
+                client.post("/api/sleep", headers=headers, json=night).raise_for_status()
+            single = time.perf_counter() - started
+
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': 'batch'})}"}
+            started = time.perf_counter()
+            response = client.post("/api/sleep/batch", headers=headers, json={"records": payload})
+            response.raise_for_status()
+            batch = time.perf_counter() - started
+            assert response.json()["created"] == NIGHTS
+
+        print(f"{NIGHTS} x POST /api/sleep:      {single * 1000:8.0f} ms")
+        print(f"1 x POST /api/sleep/batch:     {batch * 1000:8.0f} ms")
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
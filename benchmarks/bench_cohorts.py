@@ -0,0 +1,105 @@
+"""
+Сравнение с возрастной группой: пакетный пересчет cohort_rollups в текущем
+процессе и в пуле процессов, и запрос перцентиля пользователя - по строке
+группы против чтения средних всех ровесников из sleep_records.
+
+Запуск: python -m benchmarks.bench_cohorts
+"""
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.cohorts import AGE_BUCKETS, age_bucket, cohort_cache, cohort_comparison, rebuild_cohorts
+from app.database import Base, create_db_engine
+from app.models import User, SleepRecord
+
+USERS = 20_000
+NIGHTS = 30
+CHUNK_SIZE = 1000
+REPEATS = 20
+
+
+def fill(engine):
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1, 23, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"username": f"bench{n}", "email": f"bench{n}@example.com", "password": "x", "age": 14 + n % 70}
+            for n in range(USERS)
+        ])
+        user_ids = conn.scalars(select(User.id)).all()
+        for offset in range(0, len(user_ids), 1000):
+            conn.execute(insert(SleepRecord), [
+                {
+                    "user_id": user_id,
+                    "sleep_date": start + timedelta(days=night),
+                    "sleep_start": start + timedelta(days=night),
+                    "sleep_end": start + timedelta(days=night, hours=6),
+                    "duration": 5.0 + (user_id * 7 + night) % 50 / 10,
+                    "quality": 1 + (user_id + night) % 10,
+                }
+                for user_id in user_ids[offset:offset + 1000]
+                for night in range(NIGHTS)
+            ])
+
+
+def exact_percentile(db, age, average_duration):
+    # Без свертки: средние всех ровесников из их записей
+    low = age_bucket(age)
+    index = AGE_BUCKETS.index(low)
+    ages = User.age >= low
+    if index + 1 < len(AGE_BUCKETS):
+        ages &= User.age < AGE_BUCKETS[index + 1]
+    averages = db.scalars(
+        select(func.avg(SleepRecord.duration))
+        .join(User, User.id == SleepRecord.user_id)
+        .where(ages, User.deletion_requested_at.is_(None))
+        .group_by(SleepRecord.user_id)
+    ).all()
+    return round(sum(value < average_duration for value in averages) / len(averages) * 100)
+
+
+def measure(func, *args, repeats=REPEATS, before=None):
+    timings = []
+    for _ in range(repeats):
+        if before:
+            before()
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    workers = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        fill(engine)
+        session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+        with session_factory() as db:
+            serial_ms, expected = measure(rebuild_cohorts, db, 0, CHUNK_SIZE, repeats=3)
+            pool_ms, cohorts = measure(rebuild_cohorts, db, workers, CHUNK_SIZE, repeats=3)
+            assert cohorts == expected
+
+            exact_ms, exact = measure(exact_percentile, db, 30, 7.2, repeats=5)
+            cold_ms, result = measure(cohort_comparison, db, 30, 7.2, 5.5, before=cohort_cache.clear)
+            warm_ms, _ = measure(cohort_comparison, db, 30, 7.2, 5.5)
+            assert abs(result["duration_percentile"] - exact) <= 2
+        engine.dispose()
+
+    print(f"{USERS} users, {NIGHTS} nights each, {workers} workers")
+    print(f"{'step':>28} {'median, ms':>11}")
+    print(f"{'rebuild, in process':>28} {serial_ms:>11.1f}")
+    print(f"{'rebuild, process pool':>28} {pool_ms:>11.1f}")
+    print(f"{'percentile, all peers':>28} {exact_ms:>11.1f}")
+    print(f"{'percentile, rollup row':>28} {cold_ms:>11.2f}")
+    print(f"{'percentile, cached':>28} {warm_ms:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Перцентили длительности сна на 100k ночей: точный расчет (выборка всех
+длительностей и сортировка) против скетча из строки user_sleep_stats.
+Отдельно - цена обновления скетча на запись (распаковка, изменение, упаковка).
+
+Запуск: python -m benchmarks.bench_duration_percentiles
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.duration_sketch import BIN_WIDTH, DurationSketch
+from app.models import User, SleepRecord, UserSleepStats
+from app.sleep_stats import SUMMARY_PERCENTILES, rebuild_stats
+
+NIGHTS = 100_000
+REPEATS = 20
+
+
+def fill(engine):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(1)
+    start = datetime(1750, 1, 1, 23, 0)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(username="bench", email="bench@example.com", password="x")
+        ).inserted_primary_key[0]
+        conn.execute(insert(SleepRecord), [
+            {
+                "user_id": user_id,
+                "sleep_date": start + timedelta(days=i),
+                "sleep_start": start + timedelta(days=i),
+                "sleep_end": start + timedelta(days=i, hours=8),
+                "duration": max(rng.gauss(7.5, 1.2), 0.2),
+                "quality": 7,
+            }
+            for i in range(NIGHTS)
+        ])
+    return user_id
+
+
+def exact(db, user_id):
+    durations = sorted(db.scalars(select(SleepRecord.duration).where(SleepRecord.user_id == user_id)))
+    return [statistics.quantiles(durations, n=100, method="inclusive")[p - 1] for p in SUMMARY_PERCENTILES]
+
+
+def from_sketch(db, user_id):
+    stats = db.get(UserSleepStats, user_id, populate_existing=True)
+    return DurationSketch.loads(stats.duration_sketch).percentiles(
+        SUMMARY_PERCENTILES, stats.min_duration, stats.max_duration
+    )
+
+
+def sketch_update(data):
+    sketch = DurationSketch.loads(data)
+    sketch.add([7.5])
+    return sketch.dumps()
+
+
+def measure(func, *args):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        user_id = fill(engine)
+        with sessionmaker(bind=engine)() as db:
+            rebuild_stats(db, [user_id])
+            db.commit()
+            exact_ms, expected = measure(exact, db, user_id)
+            sketch_ms, approx = measure(from_sketch, db, user_id)
+            data = db.get(UserSleepStats, user_id).duration_sketch
+        engine.dispose()
+
+    update_ms, _ = measure(sketch_update, data)
+    error = max(abs(a - e) for a, e in zip(approx, expected))
+    assert error <= BIN_WIDTH
+    print(f"{NIGHTS} nights, sketch {len(data)} bytes, max error {error * 60:.1f} min (bound {BIN_WIDTH * 60:.0f} min)")
+    print(f"{'variant':>16} {'median, ms':>11}")
+    print(f"{'exact':>16} {exact_ms:>11.2f}")
+    print(f"{'sketch':>16} {sketch_ms:>11.2f}")
+    print(f"{'sketch update':>16} {update_ms:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Пиковая память выгрузки истории: потоковый экспорт против списка ORM-объектов,
+как в GET /api/sleep, при росте истории.
+
+Запуск: python -m benchmarks.bench_export
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.models import User, SleepRecord
+from app.sleep_export import stream_records
+
+HISTORY_SIZES = (10_000, 100_000)
+
+
+def fill(engine, nights):
+    Base.metadata.create_all(bind=engine)
+    start = datetime(1900, 1, 1, 23, 0)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(username="bench", email="bench@example.com", password="x")
+        ).inserted_primary_key[0]
+        conn.execute(insert(SleepRecord), [
+            {
+                "user_id": user_id,
+                "sleep_date": start + timedelta(days=i),
+                "sleep_start": start + timedelta(days=i),
+                "sleep_end": start + timedelta(days=i, hours=8),
+                "duration": 8.0,
+                "quality": 7,
+                "deep_sleep": 1.5,
+                "light_sleep": 4.0,
+                "rem_sleep": 1.0,
+            }
+            for i in range(nights)
+        ])
+    return user_id
+
+
+def measure(func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    print(f"{'nights':>8} {'variant':>12} {'ms':>8} {'peak, MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for nights in HISTORY_SIZES:
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, f'bench{nights}.db')}")
+            user_id = fill(engine, nights)
+            session_factory = sessionmaker(bind=engine)
+
+            def orm_list():
+                with session_factory() as db:
+                    records = db.query(SleepRecord).filter(SleepRecord.user_id == user_id).all()
+                    assert len(records) == nights
+
+            def export(fmt, gzip=False):
+                def run():
+                    with session_factory() as db:
+                        for _ in stream_records(db, user_id, fmt, gzip):
+                            pass
+                return run
+
+            for name, func in (
+                ("orm list", orm_list),
+                ("ndjson", export("ndjson")),
+                ("csv", export("csv")),
+                ("ndjson+gzip", export("ndjson", gzip=True)),
+            ):
+                elapsed, peak = measure(func)
+                print(f"{nights:>8} {name:>12} {elapsed * 1000:>8.0f} {peak / 2 ** 20:>10.1f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
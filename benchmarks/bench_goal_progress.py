@@ -0,0 +1,112 @@
+"""
+Прогресс цели (/api/goals/{id}/progress) по истории в 5 лет с несколькими
+записями в день: расчет по всем записям сна против пересборки по дневным
+сверткам и чтения готовой строки goal_progress. Отдельно - цена хука на
+запись сна (приращение счетчиков по одной строке свертки).
+
+Запуск: python -m benchmarks.bench_goal_progress
+"""
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app import goal_progress
+from app.database import Base, create_db_engine
+from app.models import Goal, User, SleepRecord
+from app.sleep_rollups import rebuild as rebuild_rollups
+
+DAYS = 5 * 365
+RECORDS_PER_DAY = 3
+REPEATS = 20
+
+
+def fill(engine):
+    Base.metadata.create_all(bind=engine)
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=1, minute=0, second=0, microsecond=0)
+    first = today - timedelta(days=DAYS - 1)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(username="bench", email="bench@example.com", password="x")
+        ).inserted_primary_key[0]
+        goal_id = conn.execute(
+            insert(Goal).values(user_id=user_id, target_duration=8.0, target_quality=6, created_at=first)
+        ).inserted_primary_key[0]
+        conn.execute(insert(SleepRecord), [
+            {
+                "user_id": user_id,
+                "sleep_date": first + timedelta(days=day, minutes=n),
+                "sleep_start": first + timedelta(days=day),
+                "sleep_end": first + timedelta(days=day, hours=3),
+                "duration": 2.0 + (day * 7 + n) % 5 * 0.5,
+                "quality": 4 + (day + n) % 6,
+            }
+            for day in range(DAYS)
+            for n in range(RECORDS_PER_DAY)
+        ])
+    return user_id, goal_id
+
+
+def scan_records(db, goal):
+    # Без счетчиков: дневные суммы по всем записям с момента создания цели
+    day = func.date(SleepRecord.sleep_date)
+    rows = db.execute(
+        select(day, func.count(), func.sum(SleepRecord.duration), func.sum(SleepRecord.quality))
+        .where(SleepRecord.user_id == goal.user_id, SleepRecord.sleep_date >= goal.created_at)
+        .group_by(day)
+        .order_by(day)
+    ).all()
+    hits = longest = run = 0
+    previous = None
+    for value, count, duration_sum, quality_sum in rows:
+        current = datetime.strptime(value, "%Y-%m-%d").date()
+        if duration_sum >= goal.target_duration and quality_sum >= goal.target_quality * count:
+            hits += 1
+            run = run + 1 if previous == current - timedelta(days=1) else 1
+            previous = current
+            longest = max(longest, run)
+    return len(rows), hits, longest
+
+
+def measure(func, *args):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        user_id, goal_id = fill(engine)
+        session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+        with session_factory() as db:
+            rebuild_rollups(db, [user_id])
+            db.commit()
+            goal = db.get(Goal, goal_id)
+            today = datetime.now(timezone.utc).date()
+
+            scan_ms, expected = measure(scan_records, db, goal)
+            rebuild_ms, _ = measure(goal_progress.rebuild, db, [goal_id])
+            db.commit()
+            read_ms, progress = measure(goal_progress.get_progress, db, goal)
+            hook_ms, _ = measure(goal_progress.days_changed, db, user_id, [today])
+            assert (progress["tracked_days"], progress["hit_days"], progress["longest_streak"]) == expected
+        engine.dispose()
+
+    print(f"{DAYS} days, {RECORDS_PER_DAY} records per day")
+    print(f"{'step':>26} {'median, ms':>11}")
+    print(f"{'scan sleep records':>26} {scan_ms:>11.2f}")
+    print(f"{'rebuild from rollups':>26} {rebuild_ms:>11.2f}")
+    print(f"{'read progress row':>26} {read_ms:>11.2f}")
+    print(f"{'write hook, one day':>26} {hook_ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
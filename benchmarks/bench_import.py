@@ -0,0 +1,80 @@
+"""
+Импорт файла на 100k ночей: время и пиковая память потокового импорта
+для CSV, NDJSON и JSON-массива. Память замеряется отдельным прогоном.
+
+Запуск: python -m benchmarks.bench_import
+"""
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app.models import User
+from app.sleep_import import import_sleep_records, iter_rows
+
+NIGHTS = 100_000
+FIELDS = ["sleep_start", "sleep_end", "quality", "deep_sleep", "light_sleep", "rem_sleep"]
+
+
+def nights():
+    base = datetime(1800, 1, 1, 23, 0, tzinfo=timezone.utc)
+    for i in range(NIGHTS):
+        yield {
+            "sleep_start": (base + timedelta(days=i)).isoformat(),
+            "sleep_end": (base + timedelta(days=i, hours=7, minutes=i % 60)).isoformat(),
+            "quality": 1 + i % 10,
+            "deep_sleep": 1.5,
+            "light_sleep": 4.0,
+            "rem_sleep": 1.0,
+        }
+
+
+def write_files(tmp):
+    paths = {fmt: os.path.join(tmp, f"export.{fmt}") for fmt in ("csv", "ndjson", "json")}
+    with open(paths["csv"], "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(nights())
+    with open(paths["ndjson"], "w") as f:
+        f.writelines(json.dumps(night) + "\n" for night in nights())
+    with open(paths["json"], "w") as f:
+        json.dump(list(nights()), f)
+    return paths
+
+
+def run_import(session_factory, username, fmt, path):
+    with session_factory() as db:
+        user = User(username=username, email=f"{username}@example.com", password="x")
+        db.add(user)
+        db.commit()
+        with open(path, "rb") as stream:
+            report = import_sleep_records(db, user.id, iter_rows(stream, fmt))
+        assert report["created"] == NIGHTS
+
+
+def main():
+    print(f"{'format':>8} {'size, MiB':>10} {'s':>6} {'peak, MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, path in write_files(tmp).items():
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, fmt + '.db')}")
+            Base.metadata.create_all(bind=engine)
+            session_factory = sessionmaker(bind=engine)
+            started = time.perf_counter()
+            run_import(session_factory, "timed", fmt, path)
+            elapsed = time.perf_counter() - started
+            tracemalloc.start()
+            run_import(session_factory, "traced", fmt, path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{fmt:>8} {os.path.getsize(path) / 2 ** 20:>10.1f} {elapsed:>6.1f} {peak / 2 ** 20:>10.1f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
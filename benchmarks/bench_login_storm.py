@@ -0,0 +1,121 @@
+"""
+Нагрузочный тест: задержка CRUD-запросов во время шторма логинов.
+
+Сравниваются прежний синхронный логин (bcrypt в общем пуле потоков Starlette)
+и асинхронный /api/users/login с отдельным пулом для bcrypt.
+
+Запуск: python -m benchmarks.bench_login_storm
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import Depends, HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_access_token, get_password_hash, password_pool, verify_password
+from app.database import Base, get_db
+from app.main import app
+from app.models import User, SleepRecord
+from app.schemas import user as user_schemas
+
+STORM_CONCURRENCY = 64
+CRUD_CONCURRENCY = 4
+DURATION = 5.0
+
+
+@app.post("/bench/login-sync")
+def legacy_login(login_data: user_schemas.LoginRequest, db=Depends(get_db)):
+    user = db.query(User).filter(User.username == login_data.username).first()
+    if not user or not verify_password(login_data.password, user.password):
+        raise HTTPException(status_code=401)
+    return {"access_token": create_access_token(data={"sub": user.username}), "token_type": "bearer"}
+
+
+def prepare(session_factory):
+    with session_factory() as db:
+        user = User(username="bench", email="bench@example.com", password=get_password_hash("password123"))
+        db.add(user)
+        db.flush()
+        start = datetime(2024, 1, 1, 23, 0)
+        record = SleepRecord(
+            user_id=user.id, sleep_start=start, sleep_end=start + timedelta(hours=8), duration=8.0, quality=7
+        )
+        db.add(record)
+        db.commit()
+        return record.id, create_access_token({"sub": "bench"})
+
+
+async def run_scenario(client, login_path, record_id, token):
+    stop = time.perf_counter() + DURATION
+    latencies = []
+    logins = 0
+
+    async def storm():
+        nonlocal logins
+        while time.perf_counter() < stop:
+            await client.post(login_path, json={"username": "bench", "password": "password123"})
+            logins += 1
+
+    async def crud():
+        headers = {"Authorization": f"Bearer {token}"}
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            response = await client.get(f"/api/sleep/{record_id}", headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    storm_tasks = [storm() for _ in range(STORM_CONCURRENCY if login_path else 0)]
+    await asyncio.gather(*storm_tasks, *(crud() for _ in range(CRUD_CONCURRENCY)))
+    latencies.sort()
+    return {
+        "crud_requests": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "logins": logins,
+    }
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        record_id, token = prepare(session_factory)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        transport = httpx.ASGITransport(app=app)
+        print(f"{'scenario':>22} {'crud req':>9} {'p50, ms':>8} {'p99, ms':>8} {'logins':>7}")
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, path in (
+                ("no storm", None),
+                ("sync login storm", "/bench/login-sync"),
+                ("async login storm", "/api/users/login"),
+            ):
+                result = await run_scenario(client, path, record_id, token)
+                print(
+                    f"{name:>22} {result['crud_requests']:>9} {result['p50_ms']:>8.1f} "
+                    f"{result['p99_ms']:>8.1f} {result['logins']:>7}"
+                )
+        print(f"bcrypt pool: {password_pool.stats()}")
+        password_pool.shutdown()
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
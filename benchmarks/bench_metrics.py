@@ -0,0 +1,104 @@
+"""
+Накладные расходы сбора метрик: пропускная способность с MetricsMiddleware и без
+него, стоимость observe_request и время отрисовки /metrics.
+
+Запуск: python -m benchmarks.bench_metrics
+"""
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_access_token
+from app.database import Base, get_db
+from app.main import app
+from app.metrics import MetricsMiddleware, MetricsRegistry
+from app.models import User, SleepRecord
+
+CLIENTS = 20
+REQUESTS_PER_CLIENT = 100
+OBSERVATIONS = 1_000_000
+ROUTES = 50
+
+
+METRICS_MIDDLEWARE = next(m for m in app.user_middleware if m.cls is MetricsMiddleware)
+
+
+def set_metrics_middleware(enabled):
+    # add_middleware после старта запрещен: правим список и пересобираем стек
+    if METRICS_MIDDLEWARE in app.user_middleware:
+        app.user_middleware.remove(METRICS_MIDDLEWARE)
+    if enabled:
+        app.user_middleware.insert(0, METRICS_MIDDLEWARE)
+    app.middleware_stack = None
+
+
+async def throughput(client, path, headers):
+    async def worker():
+        for _ in range(REQUESTS_PER_CLIENT):
+            (await client.get(path, headers=headers)).raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CLIENTS)))
+    return CLIENTS * REQUESTS_PER_CLIENT / (time.perf_counter() - started)
+
+
+def micro():
+    registry = MetricsRegistry()
+    started = time.perf_counter()
+    for i in range(OBSERVATIONS):
+        registry.observe_request("GET", f"/api/route/{i % ROUTES}", 200, 0.003)
+    per_call = (time.perf_counter() - started) / OBSERVATIONS
+    started = time.perf_counter()
+    text = registry.render()
+    render = time.perf_counter() - started
+    print(f"observe_request: {per_call * 1e6:.2f} us; render {ROUTES} routes: {render * 1000:.1f} ms, {len(text)} bytes")
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            user = User(username="bench", email="bench@example.com", password="x")
+            db.add(user)
+            db.flush()
+            start = datetime(2024, 1, 1, 23, 0)
+            record = SleepRecord(
+                user_id=user.id, sleep_start=start, sleep_end=start + timedelta(hours=8), duration=8.0, quality=7
+            )
+            db.add(record)
+            db.commit()
+            record_id = record.id
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+        transport = httpx.ASGITransport(app=app)
+        print(f"{'path':>16} {'metrics':>8} {'req/s':>8}")
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path in ("/", f"/api/sleep/{record_id}"):
+                for enabled in (False, True, False, True):
+                    set_metrics_middleware(enabled)
+                    await throughput(client, path, headers)  # прогрев
+                    result = await throughput(client, path, headers)
+                    print(f"{path:>16} {'on' if enabled else 'off':>8} {result:>8.0f}")
+        app.dependency_overrides.clear()
+        engine.dispose()
+    micro()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
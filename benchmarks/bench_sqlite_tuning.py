@@ -0,0 +1,117 @@
+"""
+Конкурентные чтение и запись в SQLite: настройки по умолчанию
+против профиля из create_db_engine (WAL, synchronous=NORMAL, mmap, cache, busy_timeout).
+
+Запуск: python -m benchmarks.bench_sqlite_tuning
+"""
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base, create_db_engine
+from app.models import User, SleepRecord
+
+READERS = 4
+DURATION = 5.0
+INITIAL_RECORDS = 20_000
+
+
+def fill(engine):
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2020, 1, 1, 23, 0)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(username="bench", email="bench@example.com", password="x")
+        ).inserted_primary_key[0]
+        conn.execute(insert(SleepRecord), [
+            {
+                "user_id": user_id,
+                "sleep_date": start + timedelta(days=i),
+                "sleep_start": start + timedelta(days=i),
+                "sleep_end": start + timedelta(days=i, hours=8),
+                "duration": 8.0,
+                "quality": 7,
+            }
+            for i in range(INITIAL_RECORDS)
+        ])
+    return user_id
+
+
+def run(engine, user_id):
+    stop = time.perf_counter() + DURATION
+    read_latencies = []
+    counters = {"writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        latencies = []
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        select(SleepRecord).where(SleepRecord.id == random.randint(1, INITIAL_RECORDS))
+                    ).all()
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                with lock:
+                    counters["errors"] += 1
+        with lock:
+            read_latencies.extend(latencies)
+
+    def writer():
+        start = datetime(2030, 1, 1, 23, 0)
+        while time.perf_counter() < stop:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(SleepRecord).values(
+                        user_id=user_id, sleep_date=start, sleep_start=start,
+                        sleep_end=start + timedelta(hours=8), duration=8.0, quality=7
+                    ))
+                counters["writes"] += 1
+            except OperationalError:
+                with lock:
+                    counters["errors"] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    read_latencies.sort()
+    return {
+        "reads_per_s": len(read_latencies) / DURATION,
+        "read_p99_ms": read_latencies[int(len(read_latencies) * 0.99) - 1] * 1000 if read_latencies else 0.0,
+        "read_p50_ms": statistics.median(read_latencies) * 1000 if read_latencies else 0.0,
+        "writes_per_s": counters["writes"] / DURATION,
+        "errors": counters["errors"],
+    }
+
+
+def main():
+    print(f"{'profile':>8} {'reads/s':>8} {'p50, ms':>8} {'p99, ms':>8} {'writes/s':>9} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (
+            ("default", lambda url: create_engine(url, connect_args={"check_same_thread": False})),
+            ("tuned", create_db_engine),
+        ):
+            engine = factory(f"sqlite:///{os.path.join(tmp, name + '.db')}")
+            user_id = fill(engine)
+            result = run(engine, user_id)
+            print(
+                f"{name:>8} {result['reads_per_s']:>8.0f} {result['read_p50_ms']:>8.2f} "
+                f"{result['read_p99_ms']:>8.2f} {result['writes_per_s']:>9.0f} {result['errors']:>7}"
+            )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
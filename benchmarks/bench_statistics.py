@@ -0,0 +1,96 @@
+"""
+Сравнение расчета /api/statistics: загрузка всех SleepRecord в Python
+против одного агрегирующего SELECT.
+
+Запуск: python -m benchmarks.bench_statistics
+"""
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, SleepRecord
+from app.aggregates import get_sleep_aggregates
+
+SIZES = (10_000, 100_000)
+REPEATS = 5
+
+
+def old_statistics(db, user_id):
+    records = db.query(SleepRecord).filter(SleepRecord.user_id == user_id).all()
+    total_records = len(records)
+    return {
+        "total_records": total_records,
+        "average_duration": sum(r.duration for r in records) / total_records,
+        "average_quality": sum(r.quality for r in records) / total_records,
+        "max_duration": max(r.duration for r in records),
+        "min_duration": min(r.duration for r in records),
+    }
+
+
+def new_statistics(db, user_id):
+    return get_sleep_aggregates(db, user_id)
+
+
+def fill(engine, size):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2020, 1, 1, 23, 0)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(username="bench", email="bench@example.com", password="x")
+        ).inserted_primary_key[0]
+        conn.execute(insert(SleepRecord), [
+            {
+                "user_id": user_id,
+                "sleep_date": start + timedelta(days=i),
+                "sleep_start": start + timedelta(days=i),
+                "sleep_end": start + timedelta(days=i, hours=7 + i % 3),
+                "duration": 7.0 + i % 3,
+                "quality": 1 + i % 10,
+            }
+            for i in range(size)
+        ])
+    return user_id
+
+
+def measure(session_factory, func, user_id):
+    timings = []
+    for _ in range(REPEATS):
+        db = session_factory()
+        started = time.perf_counter()
+        func(db, user_id)
+        timings.append(time.perf_counter() - started)
+        db.close()
+
+    # Память меряем отдельным прогоном: tracemalloc сильно замедляет код.
+    db = session_factory()
+    tracemalloc.start()
+    func(db, user_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.close()
+    return statistics.median(timings) * 1000, peak / 1024 / 1024
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        session_factory = sessionmaker(bind=engine)
+        print(f"{'records':>8} {'variant':>10} {'median, ms':>11} {'peak, MiB':>10}")
+        for size in SIZES:
+            user_id = fill(engine, size)
+            for name, func in (("python", old_statistics), ("sql", new_statistics)):
+                ms, mib = measure(session_factory, func, user_id)
+                print(f"{size:>8} {name:>10} {ms:>11.1f} {mib:>10.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
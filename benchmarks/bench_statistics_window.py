@@ -0,0 +1,99 @@
+"""
+Статистика за последние 7/30/90/365 дней: агрегирующий SELECT по sleep_records
+за период против суммы дневных сверток (не больше одной строки на день окна).
+
+Пользователь с несколькими записями за ночь (сон, дневной сон, ручные правки),
+рядом - другие пользователи, чтобы таблица была не только его.
+
+Запуск: python -m benchmarks.bench_statistics_window
+"""
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.aggregates import sleep_aggregates_statement
+from app.database import Base, create_db_engine
+from app.models import User, SleepRecord
+from app.sleep_rollups import rebuild, window_totals
+
+DAYS = 3 * 365
+RECORDS_PER_DAY = 24
+USERS = 20
+WINDOWS = (7, 30, 90, 365)
+REPEATS = 20
+
+
+def fill(engine):
+    Base.metadata.create_all(bind=engine)
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    with engine.begin() as conn:
+        for n in range(USERS):
+            user_id = conn.execute(
+                insert(User).values(username=f"bench{n}", email=f"bench{n}@example.com", password="x")
+            ).inserted_primary_key[0]
+            conn.execute(insert(SleepRecord), [
+                {
+                    "user_id": user_id,
+                    "sleep_date": today - timedelta(days=day, hours=i),
+                    "sleep_start": today - timedelta(days=day, hours=i + 1),
+                    "sleep_end": today - timedelta(days=day, hours=i),
+                    "duration": 0.5 + i % 3,
+                    "quality": 1 + (day + i) % 10,
+                    "rem_sleep": 0.2 if i % 2 else None,
+                }
+                for day in range(DAYS)
+                for i in range(RECORDS_PER_DAY)
+            ])
+    return user_id
+
+
+def raw_window(db, user_id, since):
+    stmt = sleep_aggregates_statement().where(
+        SleepRecord.user_id == user_id,
+        SleepRecord.sleep_date >= datetime.combine(since, datetime.min.time()),
+    )
+    return dict(db.execute(stmt).one()._mapping)
+
+
+def measure(session_factory, func, user_id, since):
+    timings = []
+    with session_factory() as db:
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            func(db, user_id, since)
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        user_id = fill(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            started = time.perf_counter()
+            rebuild(db, db.scalars(select(User.id)).all())
+            db.commit()
+            print(f"rollup rebuild, {USERS} users: {time.perf_counter() - started:.2f} s")
+        today = datetime.now(timezone.utc).date()
+        print(f"{'window':>7} {'records':>8} {'raw, ms':>8} {'rollup, ms':>11}")
+        for window in WINDOWS:
+            since = today - timedelta(days=window - 1)
+            with session_factory() as db:
+                expected = raw_window(db, user_id, since)
+                totals = window_totals(db, user_id, since)
+            assert expected["total_records"] == totals["record_count"]
+            assert abs(expected["duration_sum"] - totals["duration_sum"]) < 1e-6
+            raw_ms = measure(session_factory, raw_window, user_id, since)
+            rollup_ms = measure(session_factory, window_totals, user_id, since)
+            print(f"{window:>7} {totals['record_count']:>8} {raw_ms:>8.2f} {rollup_ms:>11.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Пропускная способность синхронных роутов в зависимости от THREADPOOL_SIZE.
+
+Обработчики и зависимости с get_db выполняются в пуле потоков Starlette, поэтому
+при ожидании БД число одновременно обслуживаемых запросов ограничено его размером.
+Задержка сетевой БД имитируется паузой перед каждым SQL-запросом.
+
+Запуск: python -m benchmarks.bench_threadpool
+"""
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from anyio import to_thread
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import create_access_token
+from app.database import Base, get_db
+from app.main import app
+from app.models import User, SleepRecord
+
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 3
+DB_LATENCIES = (0.005, 0.2)
+THREADPOOL_SIZES = (40, 200)
+
+
+async def run_scenario(client, record_id, token, threadpool_size):
+    to_thread.current_default_thread_limiter().total_tokens = threadpool_size
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def worker():
+        for _ in range(REQUESTS_PER_CLIENT):
+            response = await client.get(f"/api/sleep/{record_id}", headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CLIENTS)))
+    return CLIENTS * REQUESTS_PER_CLIENT / (time.perf_counter() - started)
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+            pool_size=max(THREADPOOL_SIZES),
+        )
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            user = User(username="bench", email="bench@example.com", password="x")
+            db.add(user)
+            db.flush()
+            start = datetime(2024, 1, 1, 23, 0)
+            record = SleepRecord(
+                user_id=user.id, sleep_start=start, sleep_end=start + timedelta(hours=8), duration=8.0, quality=7
+            )
+            db.add(record)
+            db.commit()
+            record_id = record.id
+
+        latency = {"seconds": 0.0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def simulate_network_latency(*args):
+            time.sleep(latency["seconds"])
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        token = create_access_token({"sub": "bench"})
+        transport = httpx.ASGITransport(app=app)
+        print(f"{'db latency, ms':>14} {'threadpool':>10} {'req/s':>8}")
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for seconds in DB_LATENCIES:
+                latency["seconds"] = seconds
+                for size in THREADPOOL_SIZES:
+                    throughput = await run_scenario(client, record_id, token, size)
+                    print(f"{seconds * 1000:>14.0f} {size:>10} {throughput:>8.0f}")
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Расчет трендов сна (/api/statistics/trends) на 100k ночей: векторный NumPy
+против того же расчета циклами на чистом Python. Выборка из БД общая и
+меряется отдельно.
+
+Запуск: python -m benchmarks.bench_trends
+"""
+import math
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, SleepRecord
+from app.sleep_trends import METRICS, PERCENTILES, WINDOWS, compute_trends, load_series
+
+NIGHTS = 100_000
+REPEATS = 5
+
+
+def fill(engine):
+    Base.metadata.create_all(bind=engine)
+    start = datetime(1750, 1, 1, 23, 0)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            insert(User).values(username="bench", email="bench@example.com", password="x")
+        ).inserted_primary_key[0]
+        conn.execute(insert(SleepRecord), [
+            {
+                "user_id": user_id,
+                "sleep_date": start + timedelta(days=i + i // 50),
+                "sleep_start": start + timedelta(days=i),
+                "sleep_end": start + timedelta(days=i, hours=6 + i % 4),
+                "duration": 6.0 + i % 4 + (i % 7) / 10,
+                "quality": 1 + i % 10,
+                "deep_sleep": 1.5 if i % 3 else None,
+                "light_sleep": 4.0 if i % 3 else None,
+                "rem_sleep": 1.0 + (i % 5) / 10 if i % 3 else None,
+            }
+            for i in range(NIGHTS)
+        ])
+    return user_id
+
+
+def _percentile(ordered, p):
+    # Линейная интерполяция, как np.percentile по умолчанию
+    position = (len(ordered) - 1) * p / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def python_trends(rows):
+    first = rows[0][0].date()
+    days = [(row[0].date() - first).days for row in rows]
+    total_days = days[-1] + 1
+    metrics = {}
+    for index, name in enumerate(METRICS, start=1):
+        points = [(day, row[index]) for day, row in zip(days, rows) if row[index] is not None]
+        values = [value for _, value in points]
+        daily_sums = defaultdict(float)
+        daily_counts = defaultdict(int)
+        for day, value in points:
+            daily_sums[day] += value
+            daily_counts[day] += 1
+        rolling = {}
+        for window in WINDOWS:
+            window_days = range(max(total_days - window, 0), total_days)
+            count = sum(daily_counts[day] for day in window_days)
+            rolling[window] = sum(daily_sums[day] for day in window_days) / count if count else None
+        x_mean = sum(day for day, _ in points) / len(points)
+        y_mean = statistics.fmean(values)
+        x_variance = sum((day - x_mean) ** 2 for day, _ in points)
+        ordered = sorted(values)
+        metrics[name] = {
+            "mean": y_mean,
+            "std": statistics.pstdev(values),
+            "percentiles": [_percentile(ordered, p) for p in PERCENTILES],
+            "slope": sum((day - x_mean) * (value - y_mean) for day, value in points) / x_variance,
+            "rolling": rolling,
+        }
+    return metrics
+
+
+def measure(func, *args):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        user_id = fill(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            stmt = (
+                select(SleepRecord.sleep_date, *(getattr(SleepRecord, name) for name in METRICS))
+                .where(SleepRecord.user_id == user_id)
+                .order_by(SleepRecord.sleep_date, SleepRecord.id)
+            )
+            rows_ms, rows = measure(lambda: db.execute(stmt).all())
+            load_ms, series = measure(load_series, db, user_id)
+        engine.dispose()
+
+    python_ms, expected = measure(python_trends, rows)
+    numpy_ms, trends = measure(compute_trends, series)
+    for name in METRICS:
+        assert math.isclose(trends["metrics"][name]["mean"], expected[name]["mean"], abs_tol=0.005)
+        assert math.isclose(trends["metrics"][name]["rolling_30d"], expected[name]["rolling"][30], abs_tol=0.005)
+
+    print(f"{NIGHTS} nights")
+    print(f"{'step':>24} {'median, ms':>11}")
+    print(f"{'select rows, datetime':>24} {rows_ms:>11.1f}")
+    print(f"{'select into arrays':>24} {load_ms:>11.1f}")
+    print(f"{'compute, python':>24} {python_ms:>11.1f}")
+    print(f"{'compute, numpy':>24} {numpy_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,20 @@
 """
 Конфигурация pytest и общие фикстуры для тестов.
 """
+from collections import namedtuple
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from datetime import datetime, timezone, timedelta
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, configure_sqlite_connection, get_db
 from app.auth import get_password_hash, create_access_token
 from app.models import User, SleepRecord, Goal, Reminder, Note
+from app.cache import clear_all as clear_caches
 
 
 # Создаем тестовую базу данных в памяти
@@ -22,7 +25,31 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+event.listen(engine, "connect", configure_sqlite_connection)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+# Оператор, выполненный через тестовый engine; sql - текст с нормализованными пробелами
+CapturedStatement = namedtuple("CapturedStatement", ["sql", "parameters", "executemany"])
+
+
+def sleep_payload(hours=8.0, quality=7, days_ago=0, **phases):
+    """Тело POST /api/sleep: ночь длительностью hours, закончившаяся days_ago дней назад."""
+    sleep_end = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return {
+        "sleep_start": (sleep_end - timedelta(hours=hours)).isoformat(),
+        "sleep_end": sleep_end.isoformat(),
+        "quality": quality,
+        **phases,
+    }
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Сбрасывает процессные кэши: id пользователей повторяются между тестами."""
+    clear_caches()
+    yield
+    clear_caches()
 
 
 @pytest.fixture(scope="function")
@@ -37,8 +64,21 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def sql_statements(db_session):
+    """Собирает SQL-операторы, выполненные через тестовый engine (список CapturedStatement)."""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(CapturedStatement(" ".join(statement.split()), parameters, executemany))
+    
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_session, monkeypatch):
     """Создает тестовый клиент FastAPI."""
     def override_get_db():
         try:
@@ -46,6 +86,8 @@ def client(db_session):
         finally:
             pass
     
+    # Задачи запуска (возобновление удалений) работают с engine приложения
+    monkeypatch.setattr("app.main.engine", engine)
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
@@ -2,6 +2,7 @@
 Интеграционные тесты для API endpoints аналитики (app/routes/analytics.py).
 """
 import pytest
+from datetime import datetime, timezone, timedelta
 from fastapi import status
 
 
@@ -45,6 +46,19 @@ class TestStatistics:
         expected_avg_quality = (5 + 6 + 7 + 8 + 9) / 5
         assert data["average_quality"] == pytest.approx(expected_avg_quality, rel=0.01)
     
+    def test_get_statistics_percentiles(self, client, auth_headers, multiple_sleep_records):
+        """Приближенные перцентили длительности в пределах погрешности скетча."""
+        import numpy as np
+        from app.duration_sketch import BIN_WIDTH
+        
+        data = client.get("/api/statistics", headers=auth_headers).json()
+        
+        durations = [r.duration for r in multiple_sleep_records]
+        for name, percent in (("p10", 10), ("p50", 50), ("p90", 90)):
+            assert data["duration_percentiles"][name] == pytest.approx(
+                np.percentile(durations, percent), abs=BIN_WIDTH + 0.01
+            )
+    
     def test_get_statistics_unauthorized(self, client):
         """Получение статистики без авторизации."""
         response = client.get("/api/statistics")
@@ -63,6 +77,211 @@ class TestStatistics:
         assert data["min_duration"] == test_sleep_record.duration
 
 
+class TestStatisticsWindow:
+    """Тесты статистики за последние N дней."""
+    
+    def _add_night(self, db_session, user_id, days_ago, duration, quality, rem_sleep=None):
+        from app.models import SleepRecord
+        from datetime import datetime, timezone, timedelta
+        
+        night = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days_ago)
+        db_session.add(SleepRecord(
+            user_id=user_id, sleep_date=night, sleep_start=night - timedelta(hours=duration),
+            sleep_end=night, duration=duration, quality=quality, rem_sleep=rem_sleep,
+        ))
+        db_session.commit()
+    
+    def test_window_filters_days(self, client, auth_headers, db_session, test_user):
+        """Окно учитывает только записи последних window дней."""
+        self._add_night(db_session, test_user.id, 0, 8.0, 8, rem_sleep=2.0)
+        self._add_night(db_session, test_user.id, 3, 6.0, 6)
+        self._add_night(db_session, test_user.id, 20, 4.0, 2, rem_sleep=1.0)
+        
+        week = client.get("/api/statistics?window=7", headers=auth_headers).json()
+        month = client.get("/api/statistics?window=30", headers=auth_headers).json()
+        total = client.get("/api/statistics", headers=auth_headers).json()
+        
+        assert week["window"] == 7
+        assert week["total_records"] == 2
+        assert week["average_duration"] == 7.0
+        assert week["min_duration"] == 6.0
+        assert week["average_rem_sleep"] == 2.0
+        assert week["average_deep_sleep"] is None
+        assert month["total_records"] == 3
+        assert month["average_rem_sleep"] == 1.5
+        assert total["total_records"] == 3
+        assert "window" not in total
+    
+    def test_window_without_recent_data(self, client, auth_headers, db_session, test_user):
+        """Окно без записей."""
+        self._add_night(db_session, test_user.id, 40, 8.0, 8)
+        
+        data = client.get("/api/statistics?window=30", headers=auth_headers).json()
+        
+        assert data["total_records"] == 0
+        assert data["window"] == 30
+        assert "message" in data
+    
+    def test_window_follows_writes(self, client, auth_headers, db_session, test_user):
+        """Новая запись попадает в окно, несмотря на кэш."""
+        self._add_night(db_session, test_user.id, 1, 8.0, 8)
+        client.get("/api/statistics?window=7", headers=auth_headers)
+        
+        sleep_end = datetime.now(timezone.utc)
+        client.post("/api/sleep", headers=auth_headers, json={
+            "sleep_start": (sleep_end - timedelta(hours=6)).isoformat(),
+            "sleep_end": sleep_end.isoformat(),
+            "quality": 6,
+        })
+        data = client.get("/api/statistics?window=7", headers=auth_headers).json()
+        
+        assert data["total_records"] == 2
+        assert data["average_duration"] == pytest.approx(7.0)
+    
+    def test_past_nights_by_night_date(self, client, auth_headers, db_session, test_user):
+        """Прошлые ночи попадают в окна и серии цели по дню пробуждения, а не по дню записи."""
+        from app.models import Goal
+        
+        today = datetime.now(timezone.utc).date()
+        goal = Goal(user_id=test_user.id, target_duration=8.0, target_quality=7,
+                    created_at=datetime.combine(today - timedelta(days=5), datetime.min.time()))
+        db_session.add(goal)
+        db_session.commit()
+        
+        def wake(days_ago):
+            if days_ago == 0:
+                return datetime.now(timezone.utc)
+            return datetime.combine(today - timedelta(days=days_ago), datetime.min.time(), timezone.utc) + timedelta(hours=6)
+        
+        ids = {}
+        for days_ago in (10, 4, 3, 1, 0):
+            response = client.post("/api/sleep", headers=auth_headers, json={
+                "sleep_start": (wake(days_ago) - timedelta(hours=8.5)).isoformat(),
+                "sleep_end": wake(days_ago).isoformat(),
+                "quality": 8,
+            })
+            assert response.status_code == status.HTTP_201_CREATED
+            assert datetime.fromisoformat(response.json()["sleep_date"]).date() == today - timedelta(days=days_ago)
+            ids[days_ago] = response.json()["id"]
+        
+        def window(days):
+            return client.get(f"/api/statistics?window={days}", headers=auth_headers).json()["total_records"]
+        
+        def progress():
+            return client.get(f"/api/goals/{goal.id}/progress", headers=auth_headers).json()
+        
+        assert [window(days) for days in (1, 2, 3, 4, 5, 11)] == [1, 2, 2, 3, 4, 5]
+        # Ночь 10 дней назад раньше цели; дни 4-3 и 1-0 - две серии по два дня
+        result = progress()
+        assert result["tracked_days"] == result["hit_days"] == 4
+        assert result["longest_streak"] == result["current_streak"] == 2
+        assert result["last_day"] == today.isoformat()
+        
+        # Ночь 3 дня назад переносится на день позже и закрывает пропуск
+        response = client.put(f"/api/sleep/{ids[3]}", headers=auth_headers, json={
+            "sleep_start": (wake(2) - timedelta(hours=8.5)).isoformat(),
+            "sleep_end": wake(2).isoformat(),
+        })
+        assert datetime.fromisoformat(response.json()["sleep_date"]).date() == today - timedelta(days=2)
+        
+        assert [window(days) for days in (3, 4)] == [3, 3]
+        result = progress()
+        assert result["tracked_days"] == 4
+        assert result["longest_streak"] == result["current_streak"] == 3
+    
+    @pytest.mark.parametrize("window", [0, 366])
+    def test_invalid_window(self, client, auth_headers, window):
+        """Недопустимое окно."""
+        response = client.get(f"/api/statistics?window={window}", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+class TestTrends:
+    """Тесты трендов сна."""
+    
+    def _add_nights(self, db_session, user_id, durations, start=None):
+        from app.models import SleepRecord
+        from datetime import datetime, timedelta
+        
+        start = start or datetime(2024, 5, 1, 23, 0)
+        for day, duration in enumerate(durations):
+            night = start + timedelta(days=day)
+            db_session.add(SleepRecord(
+                user_id=user_id, sleep_date=night, sleep_start=night,
+                sleep_end=night + timedelta(hours=duration), duration=duration, quality=6,
+                deep_sleep=1.5, light_sleep=duration - 3.0, rem_sleep=1.5,
+            ))
+        db_session.commit()
+    
+    def test_get_trends_no_data(self, client, auth_headers):
+        """Тренды без данных."""
+        response = client.get("/api/statistics/trends", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["total_records"] == 0
+        assert "message" in data
+    
+    def test_get_trends_with_data(self, client, auth_headers, db_session, test_user):
+        """Тренды по двум неделям записей."""
+        self._add_nights(db_session, test_user.id, [6.0] * 7 + [8.0] * 7)
+        
+        response = client.get("/api/statistics/trends", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["total_records"] == 14
+        assert data["first_date"] == "2024-05-01"
+        assert data["last_date"] == "2024-05-14"
+        duration = data["metrics"]["duration"]
+        assert duration["mean"] == 7.0
+        assert duration["std"] == 1.0
+        assert duration["rolling_7d"] == 8.0
+        assert duration["rolling_30d"] == 7.0
+        assert duration["week_over_week"] == {"current": 8.0, "previous": 6.0, "delta": 2.0}
+        assert duration["slope_per_day"] > 0
+        assert data["metrics"]["rem_sleep"]["percentiles"]["p90"] == 1.5
+        assert len(data["daily"]) == 14
+    
+    def test_get_trends_days(self, client, auth_headers, db_session, test_user):
+        """Параметр days ограничивает ряд по дням."""
+        self._add_nights(db_session, test_user.id, [7.0] * 10)
+        
+        data = client.get("/api/statistics/trends?days=3", headers=auth_headers).json()
+        
+        assert [day["date"] for day in data["daily"]] == ["2024-05-08", "2024-05-09", "2024-05-10"]
+    
+    def test_get_trends_invalid_days(self, client, auth_headers):
+        """Недопустимое значение days."""
+        response = client.get("/api/statistics/trends?days=0", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_get_trends_unauthorized(self, client):
+        """Получение трендов без авторизации."""
+        response = client.get("/api/statistics/trends")
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_sleep_write_invalidates_trends(self, client, auth_headers, db_session, test_user):
+        """Новая запись сна сбрасывает кэш трендов."""
+        from app.sleep_trends import trends_cache
+        
+        self._add_nights(db_session, test_user.id, [7.0] * 3)
+        client.get("/api/statistics/trends", headers=auth_headers)
+        client.get("/api/statistics/trends", headers=auth_headers)
+        assert trends_cache.stats()["hits"] == 1
+        
+        client.post("/api/sleep", headers=auth_headers, json={
+            "sleep_start": "2024-05-04T23:00:00",
+            "sleep_end": "2024-05-05T04:00:00",
+            "quality": 5,
+        })
+        data = client.get("/api/statistics/trends", headers=auth_headers).json()
+        
+        assert data["total_records"] == 4
+
+
 class TestRecommendations:
     """Тесты рекомендаций."""
     
@@ -198,6 +417,75 @@ class TestRecommendations:
         assert "отлично" in recommendations_text or "продолжайте" in recommendations_text
 
 
+class TestCohortRecommendations:
+    """Тесты сравнения с пользователями своего возраста в рекомендациях."""
+    
+    @pytest.fixture
+    def cohort(self, db_session, test_user, monkeypatch):
+        """Записи пяти ровесников и текущего пользователя, пересчитанные группы."""
+        from app.config import settings
+        from app.cohorts import rebuild_cohorts
+        from app.models import SleepRecord, User
+        
+        monkeypatch.setattr(settings, "COHORT_MIN_USERS", 5)
+        users = [test_user]
+        for i in range(5):
+            user = User(username=f"peer{i}", email=f"peer{i}@example.com", password="x", age=26 + i)
+            db_session.add(user)
+            users.append(user)
+        db_session.flush()
+        now = datetime.now(timezone.utc)
+        for i, user in enumerate(users):
+            # Текущий пользователь спит 8.5 ч, ровесники 6.5-8.5 ч с шагом 0.5
+            duration = 8.5 if i == 0 else 6.0 + i * 0.5
+            db_session.add(SleepRecord(
+                user_id=user.id, sleep_start=now - timedelta(hours=duration), sleep_end=now,
+                duration=duration, quality=8 if i == 0 else 5 + i % 2,
+            ))
+        db_session.commit()
+        rebuild_cohorts(db_session)
+    
+    def test_cohort_comparison(self, client, auth_headers, cohort):
+        """Рекомендации содержат перцентили в возрастной группе."""
+        response = client.get("/api/recommendations", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["cohort"] == {
+            "age_group": "25-34", "users": 6, "duration_percentile": 67, "quality_percentile": 83,
+        }
+        assert any("25-34" in text for text in data["recommendations"])
+    
+    def test_cohort_reads_only_rollup(self, client, auth_headers, cohort, sql_statements):
+        """Сравнение читает строку группы, а не записи других пользователей."""
+        client.get("/api/recommendations", headers=auth_headers)
+        from app.cohorts import cohort_cache
+        cohort_cache.clear()
+        sql_statements.clear()
+        
+        response = client.get("/api/recommendations", headers=auth_headers)
+        
+        assert "cohort" in response.json()
+        assert any("cohort_rollups" in s.sql for s in sql_statements)
+        assert not any("sleep_records" in s.sql for s in sql_statements)
+    
+    def test_small_cohort_is_hidden(self, client, auth_headers, cohort, monkeypatch):
+        """Группа меньше COHORT_MIN_USERS не показывается."""
+        from app.config import settings
+        
+        monkeypatch.setattr(settings, "COHORT_MIN_USERS", 7)
+        response = client.get("/api/recommendations", headers=auth_headers)
+        
+        assert "cohort" not in response.json()
+    
+    def test_no_rollups(self, client, auth_headers, multiple_sleep_records):
+        """Без пересчитанных групп сравнения нет."""
+        response = client.get("/api/recommendations", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert "cohort" not in response.json()
+
+
 class TestUserIsolation:
     """Тесты изоляции данных между пользователями."""
     
@@ -257,3 +545,92 @@ class TestUserIsolation:
         # Рекомендации должны отражать плохой сон второго пользователя
         assert data["average_duration"] == pytest.approx(4.0, rel=0.1)
         assert data["average_quality"] == pytest.approx(2.0, rel=0.1)
+
+
+class TestAnalyticsCache:
+    """Тесты кэширования аналитики."""
+    
+    def test_repeated_statistics_hit_cache(self, client, auth_headers, multiple_sleep_records):
+        """Повторный запрос статистики берется из кэша."""
+        from app.sleep_stats import stats_cache
+        
+        first = client.get("/api/statistics", headers=auth_headers).json()
+        second = client.get("/api/statistics", headers=auth_headers).json()
+        
+        assert first == second
+        assert stats_cache.stats()["hits"] == 1
+        assert stats_cache.stats()["misses"] == 1
+    
+    def test_recommendations_reuse_statistics(self, client, auth_headers, multiple_sleep_records):
+        """Рекомендации используют ту же кэшированную сводку."""
+        from app.sleep_stats import stats_cache
+        
+        client.get("/api/statistics", headers=auth_headers)
+        data = client.get("/api/recommendations", headers=auth_headers).json()
+        
+        assert stats_cache.stats()["hits"] == 1
+        assert data["average_duration"] == pytest.approx(7.0)
+    
+    def test_sleep_write_invalidates_cache(self, client, auth_headers, test_sleep_record):
+        """Запись сна поднимает версию данных и сбрасывает кэш."""
+        from datetime import datetime, timezone, timedelta
+        
+        before = client.get("/api/statistics", headers=auth_headers).json()
+        sleep_end = datetime.now(timezone.utc)
+        client.post("/api/sleep", headers=auth_headers, json={
+            "sleep_start": (sleep_end - timedelta(hours=6)).isoformat(),
+            "sleep_end": sleep_end.isoformat(),
+            "quality": 5,
+        })
+        after = client.get("/api/statistics", headers=auth_headers).json()
+        
+        assert before["total_records"] == 1
+        assert after["total_records"] == 2
+        assert after["min_duration"] == pytest.approx(6.0)
+        
+        client.delete(f"/api/sleep/{test_sleep_record.id}", headers=auth_headers)
+        assert client.get("/api/statistics", headers=auth_headers).json()["total_records"] == 1
+    
+    def test_write_outside_api_invalidates_cache(self, client, auth_headers, db_session, test_user, test_sleep_record):
+        """Запись в обход роутов (импорт, другой процесс) тоже меняет версию данных."""
+        from app import sleep_stats
+        from app.models import SleepRecord
+        
+        assert client.get("/api/statistics", headers=auth_headers).json()["total_records"] == 1
+        night = datetime.now(timezone.utc) - timedelta(hours=6)
+        record = SleepRecord(
+            user_id=test_user.id, sleep_start=night, sleep_end=night + timedelta(hours=6), duration=6.0, quality=5
+        )
+        db_session.add(record)
+        db_session.flush()
+        sleep_stats.record_added(db_session, record)
+        db_session.commit()
+        
+        assert client.get("/api/statistics", headers=auth_headers).json()["total_records"] == 2
+    
+    def test_reused_user_id_gets_own_statistics(self, client):
+        """Новый пользователь с id удаленного не получает его кэшированную сводку."""
+        from app.auth import create_access_token
+        
+        def register(name):
+            response = client.post("/api/users/register", json={
+                "username": name, "email": f"{name}@example.com", "password": "password123"
+            })
+            return response.json()["id"], {"Authorization": f"Bearer {create_access_token({'sub': name})}"}
+        
+        alice_id, alice = register("alice")
+        sleep_end = datetime.now(timezone.utc)
+        client.post("/api/sleep", headers=alice, json={
+            "sleep_start": (sleep_end - timedelta(hours=3)).isoformat(),
+            "sleep_end": sleep_end.isoformat(),
+            "quality": 5,
+        })
+        assert client.get("/api/statistics", headers=alice).json()["total_records"] == 1
+        client.delete("/api/users/profile", headers=alice)
+        
+        bob_id, bob = register("bob")
+        data = client.get("/api/statistics", headers=bob).json()
+        
+        assert bob_id == alice_id
+        assert data["total_records"] == 0
+        assert "average_duration" not in data
@@ -0,0 +1,104 @@
+"""
+Интеграционные тесты async-режима (DB_ASYNC): обработчики на AsyncSession и aiosqlite.
+"""
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.database import Base, create_async_db_engine, create_db_engine, get_async_db
+from app.main import create_app
+from app.models import SleepRecord, User
+from tests.conftest import sleep_payload
+from tests.integration.test_query_plans import _call, _exercise_api
+
+
+@pytest.fixture
+def async_client(tmp_path, monkeypatch):
+    """Клиент приложения в async-режиме на файловой SQLite."""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_db_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    async_engine = create_async_db_engine(url)
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with sessions() as db:
+            yield db
+
+    # Задачи запуска и фоновое удаление работают в потоках через синхронный engine
+    monkeypatch.setattr("app.main.engine", sync_engine)
+    monkeypatch.setattr("app.database.engine", sync_engine)
+    app = create_app(async_db=True)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as client:
+        client.sync_engine = sync_engine
+        client.async_engine = async_engine
+        yield client
+        # aiosqlite-соединения привязаны к event loop клиента
+        client.portal.call(async_engine.dispose)
+    sync_engine.dispose()
+
+
+def _register(client, username="asyncuser"):
+    _call(client, "POST", "/api/users/register", json={
+        "username": username, "email": f"{username}@example.com", "password": "password123"
+    })
+    token = _call(client, "POST", "/api/users/login", json={
+        "username": username, "password": "password123"
+    }).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestAsyncStack:
+    """Проверка API поверх AsyncSession."""
+
+    def test_all_endpoints(self, async_client):
+        """Все роуты отвечают в async-режиме так же, как в синхронном."""
+        _exercise_api(async_client)
+
+    def test_queries_run_on_event_loop(self, async_client):
+        """Запросы обработчиков выполняются через async-драйвер, а не в пуле потоков."""
+        threads = set()
+
+        def before_cursor_execute(*args):
+            threads.add(threading.get_ident())
+
+        headers = _register(async_client)
+        event.listen(async_client.async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            _call(async_client, "POST", "/api/sleep", headers=headers, json=sleep_payload())
+            _call(async_client, "GET", "/api/sleep", headers=headers)
+            _call(async_client, "GET", "/api/statistics", headers=headers)
+        finally:
+            event.remove(async_client.async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+        assert threads == {async_client.portal.call(threading.get_ident)}
+
+    def test_export_streams(self, async_client):
+        """Экспорт читает курсор порциями через AsyncSession."""
+        headers = _register(async_client)
+        for days_ago in range(3):
+            _call(async_client, "POST", "/api/sleep", headers=headers, json=sleep_payload(days_ago=days_ago))
+
+        ndjson = _call(async_client, "GET", "/api/sleep/export", headers=headers)
+        assert len(ndjson.text.splitlines()) == 3
+
+        csv = _call(async_client, "GET", "/api/sleep/export", headers=headers, params={"format": "csv"})
+        compressed = _call(async_client, "GET", "/api/sleep/export", headers=headers, params={"format": "csv", "gzip": True})
+        assert len(csv.text.splitlines()) == 4
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.content == csv.content
+
+    def test_delete_profile_purges(self, async_client):
+        """Фоновое удаление данных работает через синхронный engine."""
+        headers = _register(async_client)
+        _call(async_client, "POST", "/api/sleep", headers=headers, json=sleep_payload())
+        _call(async_client, "DELETE", "/api/users/profile", headers=headers)
+
+        with Session(async_client.sync_engine) as db:
+            assert db.scalar(select(func.count()).select_from(SleepRecord)) == 0
+            assert db.scalar(select(func.count()).select_from(User)) == 0
@@ -113,6 +113,31 @@ class TestGetGoals:
         data = response.json()
         assert data == []
     
+    def test_get_goals_paginated(self, client, auth_headers, db_session, test_user):
+        """Постраничное получение целей по курсору."""
+        from app.models import Goal
+        from datetime import datetime, timedelta
+        
+        for i in range(3):
+            db_session.add(Goal(
+                user_id=test_user.id,
+                target_duration=7.0 + i,
+                target_quality=8,
+                created_at=datetime(2024, 1, 1) + timedelta(days=i)
+            ))
+        db_session.commit()
+        
+        first = client.get("/api/goals", headers=auth_headers, params={"limit": 2})
+        second = client.get(
+            "/api/goals",
+            headers=auth_headers,
+            params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}
+        )
+        
+        assert [g["target_duration"] for g in first.json()] == [9.0, 8.0]
+        assert [g["target_duration"] for g in second.json()] == [7.0]
+        assert "X-Next-Cursor" not in second.headers
+    
     def test_get_single_goal(self, client, auth_headers, test_goal):
         """Получение одной цели."""
         response = client.get(
@@ -256,3 +281,82 @@ class TestDeleteGoal:
         response = client.delete(f"/api/goals/{test_goal.id}")
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestGoalProgress:
+    """Тесты прогресса выполнения цели."""
+    
+    def _add_sleep(self, client, auth_headers, hours, quality):
+        from datetime import datetime, timezone, timedelta
+        
+        sleep_end = datetime.now(timezone.utc)
+        response = client.post("/api/sleep", headers=auth_headers, json={
+            "sleep_start": (sleep_end - timedelta(hours=hours)).isoformat(),
+            "sleep_end": sleep_end.isoformat(),
+            "quality": quality,
+        })
+        return response.json()["id"]
+    
+    def test_progress_empty(self, client, auth_headers, test_goal):
+        """Прогресс цели без записей сна."""
+        response = client.get(f"/api/goals/{test_goal.id}/progress", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "goal_id": test_goal.id, "tracked_days": 0, "hit_days": 0, "hit_rate": None,
+            "current_streak": 0, "longest_streak": 0, "last_day": None,
+        }
+    
+    def test_progress_follows_sleep_writes(self, client, auth_headers, test_goal):
+        """Прогресс меняется вместе с записями сна."""
+        from datetime import datetime, timezone
+        
+        url = f"/api/goals/{test_goal.id}/progress"
+        client.get(url, headers=auth_headers)
+        record_id = self._add_sleep(client, auth_headers, 8.5, 9)
+        
+        data = client.get(url, headers=auth_headers).json()
+        assert data["hit_days"] == data["tracked_days"] == 1
+        assert data["hit_rate"] == 1.0
+        assert data["current_streak"] == data["longest_streak"] == 1
+        assert data["last_day"] == datetime.now(timezone.utc).date().isoformat()
+        
+        client.put(f"/api/sleep/{record_id}", headers=auth_headers, json={"quality": 5})
+        data = client.get(url, headers=auth_headers).json()
+        assert data["hit_days"] == 0
+        assert data["longest_streak"] == 0
+        
+        client.delete(f"/api/sleep/{record_id}", headers=auth_headers)
+        assert client.get(url, headers=auth_headers).json()["tracked_days"] == 0
+    
+    def test_progress_recomputed_on_goal_update(self, client, auth_headers, test_goal):
+        """Изменение целей пересчитывает прогресс."""
+        url = f"/api/goals/{test_goal.id}/progress"
+        self._add_sleep(client, auth_headers, 7.0, 8)
+        assert client.get(url, headers=auth_headers).json()["hit_days"] == 0
+        
+        client.put(f"/api/goals/{test_goal.id}", headers=auth_headers, json={"target_duration": 6.5})
+        
+        assert client.get(url, headers=auth_headers).json()["hit_days"] == 1
+    
+    def test_progress_nonexistent_goal(self, client, auth_headers):
+        """Прогресс несуществующей цели."""
+        response = client.get("/api/goals/99999/progress", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_progress_other_user_goal(self, client, test_goal, test_user2):
+        """Прогресс цели другого пользователя."""
+        from app.auth import create_access_token
+        token = create_access_token(data={"sub": test_user2.username})
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        response = client.get(f"/api/goals/{test_goal.id}/progress", headers=headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_progress_unauthorized(self, client, test_goal):
+        """Прогресс цели без авторизации."""
+        response = client.get(f"/api/goals/{test_goal.id}/progress")
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,91 @@
+"""
+Интеграционные тесты эндпоинта метрик (app/metrics.py, GET /metrics).
+"""
+import re
+
+import pytest
+
+from app.metrics import CONTENT_TYPE, registry
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Счетчики процессные: сбрасываем их между тестами."""
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def _sample(text, name, **labels):
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(f"{name}{{{label_text}}}" if labels else name) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+class TestMetricsEndpoint:
+    """Тесты GET /metrics."""
+    
+    def test_prometheus_format(self, client):
+        """Ответ в текстовом формате Prometheus."""
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == CONTENT_TYPE
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+    
+    def test_requests_counted_by_route_template(self, client, auth_headers, test_sleep_record):
+        """Запросы группируются по шаблону маршрута, а не по конкретному пути."""
+        client.get(f"/api/sleep/{test_sleep_record.id}", headers=auth_headers)
+        client.get("/api/sleep/999999", headers=auth_headers)
+        
+        text = client.get("/metrics").text
+        
+        route = "/api/sleep/{record_id}"
+        assert _sample(text, "http_requests_total", method="GET", route=route, status=200) == 1
+        assert _sample(text, "http_requests_total", method="GET", route=route, status=404) == 1
+        assert _sample(text, "http_request_duration_seconds_count", method="GET", route=route) == 2
+        assert _sample(text, "http_request_duration_seconds_bucket", method="GET", route=route, le="+Inf") == 2
+    
+    def test_unmatched_paths_share_one_label(self, client):
+        """Несуществующие пути не создают отдельных рядов."""
+        client.get("/unknown/1")
+        client.get("/unknown/2")
+        
+        text = client.get("/metrics").text
+        
+        assert _sample(text, "http_requests_total", method="GET", route="unmatched", status=404) == 2
+        assert "/unknown" not in text
+    
+    def test_histogram_buckets_are_cumulative(self, client):
+        """Корзины гистограммы накопительные."""
+        for _ in range(3):
+            client.get("/")
+        
+        text = client.get("/metrics").text
+        
+        counts = [
+            float(value) for value in
+            re.findall(r'^http_request_duration_seconds_bucket\{method="GET",route="/",le="[^"]+"\} (\S+)$', text, re.MULTILINE)
+        ]
+        assert counts == sorted(counts)
+        assert counts[-1] == 3
+    
+    def test_cache_and_pool_metrics(self, client, auth_headers):
+        """Экспортируются попадания в кэш и выдачи соединений из пула."""
+        client.get("/api/users/profile", headers=auth_headers)
+        client.get("/api/users/profile", headers=auth_headers)
+        
+        text = client.get("/metrics").text
+        
+        assert _sample(text, "cache_hits_total", cache="principal") >= 1
+        assert 0 < _sample(text, "cache_hit_ratio", cache="principal") <= 1
+        assert _sample(text, "db_pool_checkouts_total") >= 1
+        assert _sample(text, "threadpool_saturation") is not None
+        assert _sample(text, "password_hash_queue_depth") == 0
+    
+    def test_no_requests_in_flight_after_responses(self, client):
+        """Счетчик запросов в обработке учитывает только сам запрос метрик."""
+        client.get("/")
+        
+        assert _sample(client.get("/metrics").text, "http_requests_in_flight") == 1
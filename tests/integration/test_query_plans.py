@@ -0,0 +1,126 @@
+"""
+Регрессионные тесты планов запросов.
+
+Прогоняет все endpoints API, собирает выполненные SQL-запросы и проверяет
+через EXPLAIN QUERY PLAN, что ни один из них не читает таблицу целиком.
+"""
+from datetime import datetime, timezone, timedelta
+
+
+def _is_full_scan(detail: str) -> bool:
+    # "SCAN sleep_records" - полный проход; "SCAN ... USING INDEX" - обход индекса
+    return detail.startswith("SCAN ") and "USING" not in detail and "CONSTANT ROW" not in detail
+
+
+def _call(client, method, url, **kwargs):
+    response = client.request(method, url, **kwargs)
+    assert response.status_code < 400, f"{method} {url}: {response.status_code} {response.text}"
+    return response
+
+
+def _exercise_api(client):
+    _call(client, "POST", "/api/users/register", json={
+        "username": "planuser", "email": "plan@example.com", "password": "password123", "age": 30
+    })
+    token = _call(client, "POST", "/api/users/login", json={
+        "username": "planuser", "password": "password123"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    _call(client, "GET", "/api/users/profile", headers=headers)
+    _call(client, "PUT", "/api/users/profile", headers=headers, json={"email": "plan2@example.com", "age": 31})
+
+    sleep_end = datetime.now(timezone.utc)
+    sleep_ids = []
+    for i in range(3):
+        response = _call(client, "POST", "/api/sleep", headers=headers, json={
+            "sleep_start": (sleep_end - timedelta(days=i, hours=7 + i)).isoformat(),
+            "sleep_end": (sleep_end - timedelta(days=i)).isoformat(),
+            "quality": 6 + i,
+        })
+        sleep_ids.append(response.json()["id"])
+    first_page = _call(client, "GET", "/api/sleep", headers=headers, params={"limit": 1})
+    _call(client, "GET", "/api/sleep", headers=headers, params={
+        "limit": 1, "cursor": first_page.headers["X-Next-Cursor"]
+    })
+    _call(client, "GET", "/api/sleep", headers=headers, params={
+        "from": (sleep_end - timedelta(days=7)).isoformat(), "to": sleep_end.isoformat()
+    })
+    _call(client, "GET", f"/api/sleep/{sleep_ids[0]}", headers=headers)
+    _call(client, "PUT", f"/api/sleep/{sleep_ids[0]}", headers=headers, json={
+        "sleep_start": (sleep_end - timedelta(hours=9)).isoformat(),
+        "sleep_end": sleep_end.isoformat(),
+        "quality": 4,
+    })
+    _call(client, "POST", "/api/sleep/batch", headers=headers, json={"records": [
+        {
+            "sleep_start": (sleep_end - timedelta(days=i, hours=8)).isoformat(),
+            "sleep_end": (sleep_end - timedelta(days=i)).isoformat(),
+            "quality": 7,
+        }
+        for i in (3, 4)
+    ]})
+    history = "sleep_start,sleep_end,quality\n2024-02-01T23:00:00+00:00,2024-02-02T07:00:00+00:00,8\n"
+    _call(client, "POST", "/api/sleep/import", headers=headers, files={"file": ("history.csv", history, "text/csv")})
+    _call(client, "GET", "/api/sleep/export", headers=headers)
+    _call(client, "GET", "/api/sleep/export", headers=headers, params={"format": "csv", "gzip": True})
+    _call(client, "POST", f"/api/sleep/{sleep_ids[1]}/note", headers=headers, json={"content": "Заметка"})
+    _call(client, "DELETE", f"/api/sleep/{sleep_ids[1]}", headers=headers)
+
+    goal_ids = [
+        _call(client, "POST", "/api/goals", headers=headers, json={"target_duration": 8.0, "target_quality": 7}).json()["id"]
+        for _ in range(2)
+    ]
+    first_page = _call(client, "GET", "/api/goals", headers=headers, params={"limit": 1})
+    _call(client, "GET", "/api/goals", headers=headers, params={
+        "limit": 1, "cursor": first_page.headers["X-Next-Cursor"]
+    })
+    _call(client, "GET", f"/api/goals/{goal_ids[0]}", headers=headers)
+    _call(client, "GET", f"/api/goals/{goal_ids[0]}/progress", headers=headers)
+    _call(client, "PUT", f"/api/goals/{goal_ids[0]}", headers=headers, json={"target_quality": 9})
+    _call(client, "DELETE", f"/api/goals/{goal_ids[1]}", headers=headers)
+
+    reminder_id = _call(client, "POST", "/api/reminders", headers=headers, json={"reminder_time": "22:30"}).json()["id"]
+    _call(client, "PUT", f"/api/reminders/{reminder_id}", headers=headers, json={"message": "Спать"})
+    _call(client, "DELETE", f"/api/reminders/{reminder_id}", headers=headers)
+
+    cursor = _call(client, "GET", "/api/sync", headers=headers).json()["cursor"]
+    _call(client, "GET", "/api/sync", headers=headers, params={"since": cursor})
+
+    _call(client, "GET", "/api/statistics", headers=headers)
+    _call(client, "GET", "/api/statistics", headers=headers, params={"window": 7})
+    _call(client, "GET", "/api/statistics/trends", headers=headers)
+    _call(client, "GET", "/api/recommendations", headers=headers)
+
+    _call(client, "DELETE", "/api/users/profile", headers=headers)
+
+
+class TestQueryPlans:
+    """Проверка, что запросы роутеров используют индексы."""
+
+    def test_no_full_table_scans(self, client, db_session, sql_statements):
+        """Ни один запрос API не выполняет полный просмотр таблицы."""
+        from app import account_deletion
+        
+        _exercise_api(client)
+        # Выполняется при каждом старте приложения
+        account_deletion.pending_user_ids(db_session.get_bind())
+        # INSERT ... SELECT (пересборка сверток) читает таблицы так же, как SELECT
+        statements = [
+            s for s in sql_statements
+            if s.sql.split(" ", 1)[0].upper() in ("SELECT", "UPDATE", "DELETE")
+            or s.sql.upper().startswith("INSERT") and " SELECT " in s.sql.upper()
+        ]
+        assert any(s.sql.upper().startswith("INSERT") for s in statements)
+
+        connection = db_session.connection().connection.driver_connection
+        offenders = []
+        for statement in statements:
+            # У executemany план одинаков для всех наборов параметров
+            parameters = statement.parameters[0] if statement.executemany else statement.parameters
+            plan = connection.execute(f"EXPLAIN QUERY PLAN {statement.sql}", parameters).fetchall()
+            scans = [row[-1] for row in plan if _is_full_scan(row[-1])]
+            if scans:
+                offenders.append(f"{statement.sql}\n  -> {'; '.join(scans)}")
+
+        assert not offenders, "Полный просмотр таблицы:\n" + "\n".join(offenders)
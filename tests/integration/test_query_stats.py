@@ -0,0 +1,72 @@
+"""
+Интеграционные тесты учета SQL-запросов по HTTP-запросам (app/query_stats.py).
+"""
+import logging
+import re
+
+from app.config import settings
+
+
+def _server_timing(response):
+    match = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) queries"', response.headers["server-timing"])
+    return float(match.group(1)), int(match.group(2))
+
+
+class TestServerTiming:
+    """Тесты заголовка Server-Timing."""
+    
+    def test_counts_request_queries(self, client, auth_headers, test_sleep_record):
+        """Запрос с кэшированным пользователем - один SELECT записи."""
+        client.get("/api/users/profile", headers=auth_headers)
+        
+        response = client.get(f"/api/sleep/{test_sleep_record.id}", headers=auth_headers)
+        
+        duration, count = _server_timing(response)
+        assert count == 1
+        assert duration > 0
+    
+    def test_counts_are_per_request(self, client, auth_headers):
+        """Счетчики не накапливаются между запросами."""
+        client.get("/api/users/profile", headers=auth_headers)
+        
+        _, first = _server_timing(client.get("/api/goals", headers=auth_headers))
+        _, second = _server_timing(client.get("/api/goals", headers=auth_headers))
+        
+        assert first == second == 1
+    
+    def test_no_queries(self, client):
+        """Запрос без обращения к БД."""
+        assert _server_timing(client.get("/")) == (0.0, 0)
+
+
+class TestQueryLog:
+    """Тесты журнала запросов."""
+    
+    def test_request_summary_logged(self, client, auth_headers, test_sleep_record, caplog):
+        """Итог по запросу пишется с шаблоном маршрута."""
+        with caplog.at_level(logging.INFO, logger="app.query_stats"):
+            client.get(f"/api/sleep/{test_sleep_record.id}", headers=auth_headers)
+        
+        summary = [r for r in caplog.records if r.levelno == logging.INFO][-1]
+        assert summary.route == "/api/sleep/{record_id}"
+        assert summary.status == 200
+        assert summary.queries >= 1
+    
+    def test_slow_query_logged_with_route(self, client, auth_headers, monkeypatch, caplog):
+        """Медленные операторы пишутся в лог вместе с маршрутом."""
+        monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+        
+        with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+            client.get("/api/goals", headers=auth_headers)
+        
+        slow = [r for r in caplog.records if r.levelno == logging.WARNING]
+        assert slow
+        assert all(r.route == "/api/goals" for r in slow)
+        assert any("FROM goals" in r.statement for r in slow)
+    
+    def test_fast_queries_not_logged(self, client, auth_headers, caplog):
+        """При пороге по умолчанию обычные запросы не считаются медленными."""
+        with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+            client.get("/api/goals", headers=auth_headers)
+        
+        assert not [r for r in caplog.records if r.levelno == logging.WARNING]
@@ -1,10 +1,16 @@
 """
 Интеграционные тесты для API endpoints записей о сне (app/routes/sleep.py).
 """
+import csv
+import io
+import json
+
 import pytest
 from fastapi import status
 from datetime import datetime, timezone, timedelta
 
+from tests.conftest import sleep_payload
+
 
 class TestCreateSleepRecord:
     """Тесты создания записей о сне."""
@@ -125,6 +131,73 @@ class TestGetSleepRecords:
         data = response.json()
         assert data == []
     
+    def _create_dated_records(self, db_session, user, count):
+        from app.models import SleepRecord
+        from datetime import datetime, timedelta
+        
+        base = datetime(2024, 1, 1, 7, 0)
+        for i in range(count):
+            db_session.add(SleepRecord(
+                user_id=user.id,
+                sleep_date=base + timedelta(days=i),
+                sleep_start=base + timedelta(days=i, hours=-8),
+                sleep_end=base + timedelta(days=i),
+                duration=8.0,
+                quality=7
+            ))
+        db_session.commit()
+    
+    def test_get_sleep_records_paginated(self, client, auth_headers, db_session, test_user):
+        """Постраничное получение записей по курсору."""
+        self._create_dated_records(db_session, test_user, 5)
+        
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/sleep", headers=auth_headers, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(record["sleep_date"] for record in response.json())
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        
+        assert pages == 3
+        assert len(seen) == 5
+        assert seen == sorted(seen, reverse=True)
+    
+    def test_get_sleep_records_last_page_without_cursor(self, client, auth_headers, db_session, test_user):
+        """Если записей не больше лимита, курсор не возвращается."""
+        self._create_dated_records(db_session, test_user, 2)
+        
+        response = client.get("/api/sleep", headers=auth_headers, params={"limit": 2})
+        
+        assert len(response.json()) == 2
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_get_sleep_records_date_range(self, client, auth_headers, db_session, test_user):
+        """Фильтрация записей по диапазону дат."""
+        self._create_dated_records(db_session, test_user, 5)
+        
+        response = client.get(
+            "/api/sleep",
+            headers=auth_headers,
+            params={"from": "2024-01-02T00:00:00", "to": "2024-01-04T00:00:00"}
+        )
+        
+        dates = [record["sleep_date"][:10] for record in response.json()]
+        assert dates == ["2024-01-03", "2024-01-02"]
+    
+    def test_get_sleep_records_invalid_cursor(self, client, auth_headers):
+        """Некорректный курсор."""
+        response = client.get("/api/sleep", headers=auth_headers, params={"cursor": "not-a-cursor"})
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
     def test_get_single_sleep_record(self, client, auth_headers, test_sleep_record):
         """Получение одной записи о сне."""
         response = client.get(
@@ -305,3 +378,209 @@ class TestSleepNotes:
         )
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestSleepBatch:
+    """Тесты пакетной загрузки записей о сне."""
+    
+    def test_batch_create_success(self, client, auth_headers):
+        """Все записи пакета создаются и возвращаются в исходном порядке."""
+        nights = [sleep_payload(days_ago=i, hours=6 + i) for i in range(3)]
+        
+        response = client.post("/api/sleep/batch", headers=auth_headers, json={"records": nights})
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["created"] == 3
+        assert data["failed"] == 0
+        assert [r["index"] for r in data["results"]] == [0, 1, 2]
+        assert all(r["status"] == "created" for r in data["results"])
+        
+        record = client.get(f"/api/sleep/{data['results'][2]['id']}", headers=auth_headers).json()
+        assert record["duration"] == pytest.approx(8.0)
+    
+    def test_batch_partial_failure(self, client, auth_headers):
+        """Невалидные элементы отклоняются, остальные сохраняются."""
+        nights = [
+            sleep_payload(),
+            sleep_payload(days_ago=1, quality=11),
+            sleep_payload(days_ago=2, hours=5, deep_sleep=3.0, light_sleep=2.0, rem_sleep=1.0),
+            sleep_payload(days_ago=3),
+        ]
+        
+        data = client.post("/api/sleep/batch", headers=auth_headers, json={"records": nights}).json()
+        
+        assert data["created"] == 2
+        assert data["failed"] == 2
+        assert [r["status"] for r in data["results"]] == ["created", "invalid", "invalid", "created"]
+        assert "quality" in data["results"][1]["errors"][0]
+        assert len(client.get("/api/sleep", headers=auth_headers).json()) == 2
+    
+    def test_batch_updates_statistics(self, client, auth_headers):
+        """Статистика учитывает записи, загруженные пакетом."""
+        client.get("/api/statistics", headers=auth_headers)
+        nights = [sleep_payload(days_ago=i, hours=hours) for i, hours in enumerate((6.0, 7.0, 9.0))]
+        
+        client.post("/api/sleep/batch", headers=auth_headers, json={"records": nights})
+        data = client.get("/api/statistics", headers=auth_headers).json()
+        
+        assert data["total_records"] == 3
+        assert data["average_duration"] == pytest.approx(22.0 / 3, rel=0.01)
+        assert data["max_duration"] == pytest.approx(9.0)
+        assert data["min_duration"] == pytest.approx(6.0)
+    
+    def test_batch_keeps_night_dates(self, client, auth_headers):
+        """Прошлые ночи получают sleep_date своей ночи, а не время загрузки."""
+        nights = [sleep_payload(days_ago=days_ago) for days_ago in range(14, 28)]
+        
+        data = client.post("/api/sleep/batch", headers=auth_headers, json={"records": nights}).json()
+        
+        records = client.get("/api/sleep", headers=auth_headers).json()
+        assert data["created"] == 14
+        assert sorted(r["sleep_date"][:10] for r in records) == sorted(n["sleep_end"][:10] for n in nights)
+        assert client.get("/api/statistics?window=7", headers=auth_headers).json()["total_records"] == 0
+        assert client.get("/api/statistics?window=30", headers=auth_headers).json()["total_records"] == 14
+        trends = client.get("/api/statistics/trends", headers=auth_headers).json()
+        assert trends["first_date"] == min(n["sleep_end"][:10] for n in nights)
+    
+    def test_batch_empty(self, client, auth_headers):
+        """Пустой пакет отклоняется."""
+        response = client.post("/api/sleep/batch", headers=auth_headers, json={"records": []})
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_batch_unauthorized(self, client):
+        """Пакетная загрузка без авторизации."""
+        response = client.post("/api/sleep/batch", json={"records": [sleep_payload()]})
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestSleepExport:
+    """Тесты потоковой выгрузки записей о сне."""
+    
+    def test_export_ndjson(self, client, auth_headers, multiple_sleep_records):
+        """Выгрузка в NDJSON: одна запись на строку в порядке дат."""
+        response = client.get("/api/sleep/export", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == len(multiple_sleep_records)
+        assert [row["sleep_date"] for row in rows] == sorted(row["sleep_date"] for row in rows)
+        assert {"id", "duration", "quality", "updated_at"} <= rows[0].keys()
+    
+    def test_export_csv(self, client, auth_headers, multiple_sleep_records):
+        """Выгрузка в CSV с заголовком."""
+        response = client.get("/api/sleep/export", headers=auth_headers, params={"format": "csv"})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert "sleep_records.csv" in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == len(multiple_sleep_records)
+        assert float(rows[0]["duration"]) > 0
+    
+    def test_export_gzip(self, client, auth_headers, multiple_sleep_records):
+        """Сжатая выгрузка распаковывается в тот же NDJSON."""
+        plain = client.get("/api/sleep/export", headers=auth_headers).content
+        response = client.get("/api/sleep/export", headers=auth_headers, params={"gzip": True})
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.content == plain
+    
+    def test_export_only_own_records(self, client, db_session, test_user2, multiple_sleep_records):
+        """Выгружаются только записи текущего пользователя."""
+        from app.auth import create_access_token
+        token = create_access_token({"sub": test_user2.username})
+        
+        response = client.get("/api/sleep/export", headers={"Authorization": f"Bearer {token}"})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.text == ""
+    
+    def test_export_invalid_format(self, client, auth_headers):
+        """Неизвестный формат отклоняется."""
+        response = client.get("/api/sleep/export", headers=auth_headers, params={"format": "xml"})
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_export_unauthorized(self, client):
+        """Выгрузка без авторизации."""
+        response = client.get("/api/sleep/export")
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestSleepImport:
+    """Тесты импорта файлов с историей сна."""
+    
+    def _night(self, i, quality=7):
+        return {
+            "sleep_start": f"2024-02-{i + 1:02d}T23:00:00+00:00",
+            "sleep_end": f"2024-02-{i + 2:02d}T07:00:00+00:00",
+            "quality": quality,
+        }
+    
+    def test_import_csv(self, client, auth_headers):
+        """Импорт CSV с пустыми фазами и одной невалидной строкой."""
+        lines = ["sleep_start,sleep_end,quality,deep_sleep,light_sleep,rem_sleep"]
+        lines += [f"{n['sleep_start']},{n['sleep_end']},{n['quality']},1.5,,1.0" for n in map(self._night, range(3))]
+        lines.append("2024-02-10T23:00:00+00:00,2024-02-10T22:00:00+00:00,7,,,")
+        files = {"file": ("export.csv", "\n".join(lines), "text/csv")}
+        
+        response = client.post("/api/sleep/import", headers=auth_headers, files=files)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["processed"] == 4
+        assert data["created"] == 3
+        assert data["failed"] == 1
+        assert data["errors"][0]["index"] == 3
+        assert len(client.get("/api/sleep", headers=auth_headers).json()) == 3
+    
+    def test_import_json_array(self, client, auth_headers):
+        """Импорт JSON-массива обновляет статистику."""
+        client.get("/api/statistics", headers=auth_headers)
+        files = {"file": ("export.json", json.dumps([self._night(i) for i in range(4)]), "application/json")}
+        
+        data = client.post("/api/sleep/import", headers=auth_headers, files=files).json()
+        
+        assert data["created"] == 4
+        assert client.get("/api/statistics", headers=auth_headers).json()["total_records"] == 4
+    
+    def test_import_roundtrip_export(self, client, auth_headers, multiple_sleep_records):
+        """Выгрузка NDJSON загружается обратно без ошибок."""
+        exported = client.get("/api/sleep/export", headers=auth_headers).content
+        files = {"file": ("history.txt", exported, "application/octet-stream")}
+        
+        data = client.post(
+            "/api/sleep/import", headers=auth_headers, files=files, params={"format": "ndjson"}
+        ).json()
+        
+        assert data["created"] == len(multiple_sleep_records)
+        assert data["failed"] == 0
+    
+    def test_import_unknown_format(self, client, auth_headers):
+        """Формат не задан и не определяется по имени файла."""
+        files = {"file": ("export.txt", "{}", "text/plain")}
+        
+        response = client.post("/api/sleep/import", headers=auth_headers, files=files)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_import_malformed_file(self, client, auth_headers):
+        """Битый JSON отклоняется с ошибкой 400."""
+        files = {"file": ("export.json", '[{"quality": 7}', "application/json")}
+        
+        response = client.post("/api/sleep/import", headers=auth_headers, files=files)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Загружено записей: 0" in response.json()["detail"]
+    
+    def test_import_unauthorized(self, client):
+        """Импорт без авторизации."""
+        files = {"file": ("export.json", "[]", "application/json")}
+        
+        response = client.post("/api/sleep/import", files=files)
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
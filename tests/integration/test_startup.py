@@ -0,0 +1,22 @@
+"""
+Интеграционные тесты запуска приложения (lifespan в app/main.py).
+"""
+from anyio import to_thread
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+
+
+class TestStartup:
+    """Тесты настроек, применяемых при старте."""
+    
+    def test_threadpool_size_applied(self, client, monkeypatch):
+        """Лимит потоков для синхронных обработчиков берется из THREADPOOL_SIZE."""
+        monkeypatch.setattr(settings, "THREADPOOL_SIZE", 7)
+        
+        async def total_tokens():
+            return to_thread.current_default_thread_limiter().total_tokens
+        
+        with TestClient(app) as test_client:
+            assert test_client.portal.call(total_tokens) == 7
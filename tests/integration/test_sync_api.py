@@ -0,0 +1,145 @@
+"""
+Интеграционные тесты для API синхронизации изменений (app/routes/sync.py).
+"""
+from fastapi import status
+from datetime import datetime, timezone, timedelta
+
+from tests.conftest import sleep_payload
+
+
+def _age_rows(db_session):
+    """Сдвигает updated_at существующих строк за пределы перекрытия курсора."""
+    from app.models import SleepRecord, Note, Goal, Reminder
+    
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    for model in (SleepRecord, Note, Goal, Reminder):
+        db_session.query(model).update({model.updated_at: past}, synchronize_session=False)
+    db_session.commit()
+
+
+class TestSync:
+    """Тесты получения изменений по курсору."""
+    
+    def test_initial_sync_returns_everything(self, client, auth_headers, test_sleep_record, test_note, test_goal, test_reminder):
+        """Без курсора возвращаются все данные пользователя."""
+        response = client.get("/api/sync", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [r["id"] for r in data["sleep_records"]] == [test_sleep_record.id]
+        assert [n["id"] for n in data["notes"]] == [test_note.id]
+        assert [g["id"] for g in data["goals"]] == [test_goal.id]
+        assert [r["id"] for r in data["reminders"]] == [test_reminder.id]
+        assert data["deleted"] == []
+        assert data["cursor"]
+    
+    def test_initial_sync_rows_without_updated_at(self, client, auth_headers, db_session, test_sleep_record, test_note, test_goal, test_reminder):
+        """Строки без updated_at (столбец добавлен в существующую базу) входят в полный снимок."""
+        from app.models import SleepRecord, Note, Goal, Reminder
+        
+        for model in (SleepRecord, Note, Goal, Reminder):
+            db_session.query(model).update({model.updated_at: None}, synchronize_session=False)
+        db_session.commit()
+        
+        data = client.get("/api/sync", headers=auth_headers).json()
+        
+        assert [r["id"] for r in data["sleep_records"]] == [test_sleep_record.id]
+        assert [n["id"] for n in data["notes"]] == [test_note.id]
+        assert [g["id"] for g in data["goals"]] == [test_goal.id]
+        assert [r["id"] for r in data["reminders"]] == [test_reminder.id]
+    
+    def test_sync_without_changes(self, client, auth_headers, db_session, test_sleep_record, test_goal):
+        """Повторная синхронизация без изменений возвращает пустые списки."""
+        _age_rows(db_session)
+        cursor = client.get("/api/sync", headers=auth_headers).json()["cursor"]
+        
+        data = client.get("/api/sync", headers=auth_headers, params={"since": cursor}).json()
+        
+        assert data["sleep_records"] == []
+        assert data["goals"] == []
+        assert data["deleted"] == []
+    
+    def test_sync_returns_only_changes(self, client, auth_headers, db_session, test_sleep_record, test_goal, test_reminder):
+        """После курсора возвращаются только созданные и измененные строки."""
+        _age_rows(db_session)
+        cursor = client.get("/api/sync", headers=auth_headers).json()["cursor"]
+        
+        new_id = client.post("/api/sleep", headers=auth_headers, json=sleep_payload()).json()["id"]
+        client.put(f"/api/goals/{test_goal.id}", headers=auth_headers, json={"target_quality": 9})
+        client.delete(f"/api/reminders/{test_reminder.id}", headers=auth_headers)
+        data = client.get("/api/sync", headers=auth_headers, params={"since": cursor}).json()
+        
+        assert [r["id"] for r in data["sleep_records"]] == [new_id]
+        assert [g["target_quality"] for g in data["goals"]] == [9]
+        assert [r["is_active"] for r in data["reminders"]] == [False]
+    
+    def test_sync_reports_deletions(self, client, auth_headers, test_sleep_record, test_goal):
+        """Удаления передаются как tombstone-записи."""
+        cursor = client.get("/api/sync", headers=auth_headers).json()["cursor"]
+        
+        client.delete(f"/api/sleep/{test_sleep_record.id}", headers=auth_headers)
+        client.delete(f"/api/goals/{test_goal.id}", headers=auth_headers)
+        data = client.get("/api/sync", headers=auth_headers, params={"since": cursor}).json()
+        
+        deleted = {(d["entity"], d["entity_id"]) for d in data["deleted"]}
+        assert deleted == {("sleep_record", test_sleep_record.id), ("goal", test_goal.id)}
+        assert data["sleep_records"] == []
+    
+    def test_sync_new_note(self, client, auth_headers, test_sleep_record):
+        """Новая заметка попадает в изменения."""
+        cursor = client.get("/api/sync", headers=auth_headers).json()["cursor"]
+        
+        client.post(f"/api/sleep/{test_sleep_record.id}/note", headers=auth_headers, json={"content": "Заметка"})
+        data = client.get("/api/sync", headers=auth_headers, params={"since": cursor}).json()
+        
+        assert [n["content"] for n in data["notes"]] == ["Заметка"]
+    
+    def test_sync_repeats_recent_changes(self, client, auth_headers, test_sleep_record):
+        """Строки, измененные в пределах перекрытия курсора, приходят повторно."""
+        cursor = client.get("/api/sync", headers=auth_headers).json()["cursor"]
+        
+        data = client.get("/api/sync", headers=auth_headers, params={"since": cursor}).json()
+        
+        assert [r["id"] for r in data["sleep_records"]] == [test_sleep_record.id]
+    
+    def test_sync_in_flight_write(self, client, auth_headers, db_session, test_user):
+        """Запись с updated_at до выборки, зафиксированная после нее, не теряется."""
+        from app.models import SleepRecord
+        
+        _age_rows(db_session)
+        flushed_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        cursor = client.get("/api/sync", headers=auth_headers).json()["cursor"]
+        sleep_end = datetime.now(timezone.utc)
+        record = SleepRecord(
+            user_id=test_user.id, sleep_start=sleep_end - timedelta(hours=8), sleep_end=sleep_end,
+            duration=8.0, quality=7, updated_at=flushed_at
+        )
+        db_session.add(record)
+        db_session.commit()
+        
+        data = client.get("/api/sync", headers=auth_headers, params={"since": cursor}).json()
+        
+        assert [r["id"] for r in data["sleep_records"]] == [record.id]
+    
+    def test_sync_user_isolation(self, client, auth_headers, test_user2, db_session):
+        """Изменения других пользователей не возвращаются."""
+        from app.models import Goal
+        
+        db_session.add(Goal(user_id=test_user2.id, target_duration=8.0, target_quality=8))
+        db_session.commit()
+        
+        data = client.get("/api/sync", headers=auth_headers).json()
+        
+        assert data["goals"] == []
+    
+    def test_sync_invalid_cursor(self, client, auth_headers):
+        """Некорректный курсор."""
+        response = client.get("/api/sync", headers=auth_headers, params={"since": "broken"})
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_sync_unauthorized(self, client):
+        """Синхронизация без авторизации."""
+        response = client.get("/api/sync")
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -247,6 +247,52 @@ class TestUserProfile:
         response = client.get("/api/users/profile", headers=auth_headers)
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
     
+    def test_delete_profile_cascades(self, client, db_session, test_user, auth_headers, test_note, test_goal, test_reminder):
+        """Записи, заметки, цели и напоминания удаляются вместе с профилем на стороне БД."""
+        from app.models import SleepRecord, Note, Goal, Reminder
+        client.get("/api/statistics", headers=auth_headers)
+        
+        response = client.delete("/api/users/profile", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        for model in (SleepRecord, Note, Goal, Reminder):
+            assert db_session.query(model).count() == 0
+    
+    def test_delete_profile_drops_analytics_cache(self, client, test_user, test_user2, auth_headers, multiple_sleep_records):
+        """Кэшированная статистика и тренды удаленного пользователя сбрасываются, чужие остаются."""
+        from app.auth import create_access_token
+        from app.sleep_stats import stats_cache
+        from app.sleep_trends import trends_cache
+        other_headers = {"Authorization": f"Bearer {create_access_token({'sub': test_user2.username})}"}
+        for headers in (auth_headers, other_headers):
+            client.get("/api/statistics", headers=headers)
+        client.get("/api/statistics/trends", headers=auth_headers)
+        
+        client.delete("/api/users/profile", headers=auth_headers)
+        
+        assert len(stats_cache) == 1
+        assert len(trends_cache) == 0
+    
+    def test_delete_profile_does_not_load_children(self, client, db_session, test_user, auth_headers, multiple_sleep_records, sql_statements):
+        """Удаление профиля не загружает дочерние строки: только множественные DELETE."""
+        db_session.expunge_all()
+        sql_statements.clear()
+        
+        client.delete("/api/users/profile", headers=auth_headers)
+        
+        statements = [s.sql.split(" ", 1)[0].upper() for s in sql_statements]
+        assert statements.count("SELECT") == 1  # только загрузка пользователя в get_current_user
+        assert statements.count("UPDATE") == 1  # пометка об удалении
+    
+    def test_deleted_profile_cannot_login(self, client, test_user, auth_headers):
+        """После удаления профиля вход и старый токен отклоняются."""
+        client.delete("/api/users/profile", headers=auth_headers)
+        
+        response = client.post("/api/users/login", json={"username": "testuser", "password": "testpassword123"})
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.get("/api/users/profile", headers=auth_headers).status_code == status.HTTP_401_UNAUTHORIZED
+    
     def test_delete_profile_unauthorized(self, client):
         """Удаление профиля без авторизации."""
         response = client.delete("/api/users/profile")
@@ -0,0 +1,80 @@
+"""
+Число SQL-операторов на операции записи.
+
+Каждое создание и изменение - один INSERT/UPDATE ... RETURNING без повторного
+SELECT после commit; изменения и удаления проверяют владельца в том же операторе.
+"""
+import re
+
+import pytest
+
+from tests.conftest import sleep_payload
+
+
+def _table_statements(statements, table):
+    pattern = re.compile(rf"(SELECT .* FROM|INSERT INTO|UPDATE|DELETE FROM) {table}\b")
+    return [s.sql.split(" ", 1)[0] for s in statements if pattern.match(s.sql)]
+
+
+@pytest.mark.parametrize("method, url, payload, table, fixture, expected", [
+    ("POST", "/api/sleep", sleep_payload(), "sleep_records", None, ["INSERT"]),
+    ("PUT", "/api/sleep/{id}", {"deep_sleep": 2.0, "rem_sleep": 1.0}, "sleep_records", "test_sleep_record", ["UPDATE"]),
+    # Для пересчета статистики нужны прежние duration и quality
+    ("PUT", "/api/sleep/{id}", {"quality": 9}, "sleep_records", "test_sleep_record", ["SELECT", "UPDATE"]),
+    ("DELETE", "/api/sleep/{id}", None, "sleep_records", "test_sleep_record", ["DELETE"]),
+    # Дневная свертка: приращение, если строка дня уже есть, иначе пересборка дня
+    ("POST", "/api/sleep", sleep_payload(), "sleep_daily_rollups", "test_sleep_record", ["UPDATE"]),
+    ("POST", "/api/sleep", sleep_payload(), "sleep_daily_rollups", None, ["UPDATE", "DELETE", "INSERT"]),
+    ("PUT", "/api/sleep/{id}", {"deep_sleep": 2.0}, "sleep_daily_rollups", "test_sleep_record", ["DELETE", "INSERT"]),
+    ("DELETE", "/api/sleep/{id}", None, "sleep_daily_rollups", "test_sleep_record", ["DELETE", "INSERT"]),
+    # Прогресс цели: новый день - одно приращение, правка целей - пересборка по сверткам
+    ("POST", "/api/sleep", sleep_payload(), "goal_progress", "test_goal", ["UPDATE"]),
+    ("PUT", "/api/goals/{id}", {"target_duration": 6.0}, "goal_progress", "test_goal", ["DELETE", "INSERT"]),
+    ("PUT", "/api/goals/{id}", {"description": "Новая цель"}, "goal_progress", "test_goal", []),
+    ("POST", "/api/sleep/{id}/note", {"content": "Заметка"}, "notes", "test_sleep_record", ["INSERT"]),
+    ("POST", "/api/goals", {"target_duration": 8.0, "target_quality": 8}, "goals", None, ["INSERT"]),
+    ("PUT", "/api/goals/{id}", {"description": "Новая цель"}, "goals", "test_goal", ["UPDATE"]),
+    ("DELETE", "/api/goals/{id}", None, "goals", "test_goal", ["DELETE"]),
+    ("POST", "/api/reminders", {"reminder_time": "22:30", "message": "Спать"}, "reminders", None, ["INSERT"]),
+    ("PUT", "/api/reminders/{id}", {"message": "Пора спать"}, "reminders", "test_reminder", ["UPDATE"]),
+    ("DELETE", "/api/reminders/{id}", None, "reminders", "test_reminder", ["UPDATE"]),
+    ("PUT", "/api/users/profile", {"age": 40}, "users", None, ["UPDATE"]),
+])
+def test_statements_per_write(request, client, auth_headers, sql_statements, method, url, payload, table, fixture, expected):
+    """Запись в таблицу - один оператор, без SELECT до и после него."""
+    if fixture:
+        url = url.format(id=request.getfixturevalue(fixture).id)
+    # Прогрев: пользователь в кэше, строка статистики уже построена
+    client.get("/api/statistics", headers=auth_headers)
+    sql_statements.clear()
+    
+    response = client.request(method, url, headers=auth_headers, json=payload)
+    
+    assert response.status_code < 400, response.text
+    assert _table_statements(sql_statements, table) == expected
+
+
+@pytest.mark.parametrize("method, url", [
+    ("PUT", "/api/goals/{id}"),
+    ("DELETE", "/api/goals/{id}"),
+])
+def test_foreign_row_not_found(client, db_session, test_user2, test_goal, method, url):
+    """Чужая строка не изменяется и дает 404."""
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': test_user2.username})}"}
+    
+    response = client.request(method, url.format(id=test_goal.id), headers=headers, json={"description": "Чужая"})
+    
+    assert response.status_code == 404
+    db_session.expire_all()
+    assert db_session.get(type(test_goal), test_goal.id).description != "Чужая"
+
+
+def test_register_single_insert(client, sql_statements):
+    """Регистрация - один INSERT без повторного SELECT."""
+    response = client.post("/api/users/register", json={
+        "username": "newuser", "email": "new@example.com", "password": "password123", "age": 30
+    })
+    
+    assert response.status_code == 201
+    assert _table_statements(sql_statements, "users")[-1:] == ["INSERT"]
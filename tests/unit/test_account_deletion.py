@@ -0,0 +1,113 @@
+"""
+Unit-тесты для фонового удаления аккаунтов (app/account_deletion.py).
+"""
+import threading
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import account_deletion
+from app.main import app
+from app.models import User, SleepRecord, Note, Goal, Reminder, UserSleepStats
+from app.sleep_stats import get_user_stats
+
+
+def _mark_pending(db_session, user):
+    user.deletion_requested_at = datetime.now(timezone.utc)
+    db_session.commit()
+
+
+class TestPurgeUser:
+    """Тесты удаления данных пользователя порциями."""
+    
+    def test_purge_removes_all_user_rows(self, db_session, test_user, test_user2, multiple_sleep_records, test_note, test_goal, test_reminder):
+        """Удаляются записи, заметки, цели, напоминания, статистика и сам пользователь."""
+        user_id = test_user.id
+        get_user_stats(db_session, user_id)
+        db_session.add(SleepRecord(user_id=test_user2.id, duration=7.0, quality=6))
+        db_session.commit()
+        
+        account_deletion.purge_user(db_session.get_bind(), user_id, chunk_size=2, pause=0)
+        
+        db_session.expire_all()
+        assert db_session.get(User, user_id) is None
+        assert db_session.query(SleepRecord).filter(SleepRecord.user_id == user_id).count() == 0
+        for model in (Note, Goal, Reminder, UserSleepStats):
+            assert db_session.query(model).count() == 0
+        assert db_session.query(SleepRecord).filter(SleepRecord.user_id == test_user2.id).count() == 1
+    
+    def test_purge_commits_each_chunk(self, db_session, test_user, multiple_sleep_records):
+        """Каждая порция фиксируется отдельной транзакцией."""
+        engine = db_session.get_bind()
+        commits = []
+        listener = lambda conn: commits.append(1)
+        event.listen(engine, "commit", listener)
+        try:
+            account_deletion.purge_user(engine, test_user.id, chunk_size=2, pause=0)
+        finally:
+            event.remove(engine, "commit", listener)
+        
+        # 5 записей порциями по 2 - три транзакции, плюс удаление пользователя
+        assert len(commits) == 4
+    
+    def test_purge_stops_after_chunk(self, db_session, test_user, multiple_sleep_records):
+        """Остановленное удаление фиксирует текущую порцию и оставляет пользователя помеченным."""
+        _mark_pending(db_session, test_user)
+        stop = threading.Event()
+        stop.set()
+        
+        assert account_deletion.purge_user(db_session.get_bind(), test_user.id, chunk_size=2, pause=0, stop=stop) is False
+        
+        db_session.expire_all()
+        assert db_session.get(User, test_user.id) is not None
+        assert db_session.query(SleepRecord).count() == len(multiple_sleep_records) - 2
+
+
+class TestResumePending:
+    """Тесты возобновления незавершенных удалений."""
+    
+    def test_pending_user_ids(self, db_session, test_user, test_user2):
+        """Находятся только помеченные на удаление пользователи."""
+        _mark_pending(db_session, test_user)
+        
+        assert account_deletion.pending_user_ids(db_session.get_bind()) == [test_user.id]
+    
+    def test_purge_pending(self, db_session, test_user, test_user2):
+        """Удаляются все помеченные пользователи."""
+        _mark_pending(db_session, test_user)
+        
+        account_deletion.purge_pending(db_session.get_bind())
+        
+        assert [user.username for user in db_session.query(User).all()] == [test_user2.username]
+    
+    def test_resumed_on_startup(self, db_session, test_user, monkeypatch):
+        """При старте приложения незавершенные удаления ставятся в работу."""
+        _mark_pending(db_session, test_user)
+        calls = []
+        monkeypatch.setattr("app.main.engine", db_session.get_bind())
+        monkeypatch.setattr(account_deletion, "purge_pending", lambda bind, user_ids, stop: calls.append(user_ids))
+        
+        async def wait_for_purge():
+            await app.state.account_purge
+        
+        with TestClient(app) as client:
+            client.portal.call(wait_for_purge)
+        
+        assert calls == [[test_user.id]]
+    
+    def test_stopped_on_shutdown(self, db_session, test_user, monkeypatch):
+        """При остановке приложения задача удаления прерывается и дожидается завершения."""
+        _mark_pending(db_session, test_user)
+        started, finished = threading.Event(), []
+        monkeypatch.setattr("app.main.engine", db_session.get_bind())
+        
+        def purge_pending(bind, user_ids, stop):
+            started.set()
+            finished.append(stop.wait(5))
+        
+        monkeypatch.setattr(account_deletion, "purge_pending", purge_pending)
+        with TestClient(app):
+            assert started.wait(5)
+        
+        assert finished == [True]
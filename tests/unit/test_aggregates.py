@@ -0,0 +1,41 @@
+"""
+Unit-тесты для агрегирующих запросов аналитики (app/aggregates.py).
+"""
+import pytest
+
+from app.aggregates import get_sleep_aggregates
+
+
+class TestSleepAggregates:
+    """Тесты агрегатов по записям сна."""
+    
+    def test_aggregates_without_records(self, db_session, test_user):
+        """Без записей count равен нулю, остальные агрегаты пустые."""
+        stats = get_sleep_aggregates(db_session, test_user.id)
+        
+        assert stats["total_records"] == 0
+        assert stats["average_duration"] is None
+        assert stats["max_duration"] is None
+    
+    def test_aggregates_values(self, db_session, test_user, multiple_sleep_records):
+        """Агрегаты совпадают с расчетом по записям."""
+        stats = get_sleep_aggregates(db_session, test_user.id)
+        
+        durations = [r.duration for r in multiple_sleep_records]
+        assert stats["total_records"] == 5
+        assert stats["average_duration"] == pytest.approx(sum(durations) / 5)
+        assert stats["average_quality"] == pytest.approx(7.0)
+        assert stats["max_duration"] == max(durations)
+        assert stats["min_duration"] == min(durations)
+    
+    def test_aggregates_selected_fields(self, db_session, test_user, multiple_sleep_records):
+        """Можно запросить только часть агрегатов."""
+        stats = get_sleep_aggregates(db_session, test_user.id, ["total_records", "max_duration"])
+        
+        assert stats == {"total_records": 5, "max_duration": 8.0}
+    
+    def test_aggregates_user_isolation(self, db_session, test_user, test_user2, multiple_sleep_records):
+        """Агрегаты считаются только по записям указанного пользователя."""
+        stats = get_sleep_aggregates(db_session, test_user2.id)
+        
+        assert stats["total_records"] == 0
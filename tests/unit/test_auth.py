@@ -2,6 +2,7 @@
 Unit-тесты для модуля аутентификации (app/auth.py).
 Тестируют функции хеширования паролей, создания и проверки токенов.
 """
+import hashlib
 import pytest
 from datetime import datetime, timezone, timedelta
 from jose import jwt, JWTError
@@ -159,3 +160,154 @@ class TestAccessToken:
         
         assert data == original_data
         assert "exp" not in data
+
+
+def _user_selects(statements):
+    return [s for s in statements if s.sql.startswith("SELECT") and "FROM users" in s.sql]
+
+
+class TestPrincipalCache:
+    """Тесты кэша аутентифицированного пользователя."""
+    
+    def test_repeated_requests_skip_user_lookup(self, client, auth_headers, sql_statements):
+        """Повторный запрос с тем же токеном не читает таблицу users."""
+        client.get("/api/users/profile", headers=auth_headers)
+        client.get("/api/users/profile", headers=auth_headers)
+        response = client.get("/api/users/profile", headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert len(_user_selects(sql_statements)) == 1
+    
+    def test_cached_user_can_be_updated(self, client, auth_headers):
+        """Пользователь из кэша изменяется и сохраняется как обычный."""
+        client.get("/api/users/profile", headers=auth_headers)
+        client.put("/api/users/profile", headers=auth_headers, json={"age": 42})
+        
+        response = client.get("/api/users/profile", headers=auth_headers)
+        
+        assert response.json()["age"] == 42
+    
+    def test_update_profile_invalidates_cache(self, client, auth_headers):
+        """Изменение профиля сбрасывает запись в кэше."""
+        from app.auth import principal_cache
+        
+        client.get("/api/users/profile", headers=auth_headers)
+        client.put("/api/users/profile", headers=auth_headers, json={"email": "changed@example.com"})
+        
+        assert principal_cache.get("testuser") is None
+    
+    def test_deleted_user_is_not_served_from_cache(self, client, auth_headers):
+        """После удаления пользователь не аутентифицируется из кэша."""
+        client.get("/api/users/profile", headers=auth_headers)
+        client.delete("/api/users/profile", headers=auth_headers)
+        
+        response = client.get("/api/users/profile", headers=auth_headers)
+        
+        assert response.status_code == 401
+    
+    def test_cache_entry_expires(self, client, auth_headers, sql_statements, monkeypatch):
+        """По истечении TTL пользователь снова читается из базы."""
+        import time
+        from app.auth import principal_cache
+        
+        client.get("/api/users/profile", headers=auth_headers)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + principal_cache.ttl + 1)
+        client.get("/api/users/profile", headers=auth_headers)
+        
+        assert len(_user_selects(sql_statements)) == 2
+
+
+class TestTokenCache:
+    """Тесты кэша проверенных токенов."""
+    
+    def test_decode_caches_claims(self, monkeypatch):
+        """Повторная проверка того же токена не вызывает jwt.decode."""
+        from app import auth
+        
+        token = create_access_token(data={"sub": "cached"})
+        assert auth.decode_access_token(token)["sub"] == "cached"
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("jwt.decode не должен вызываться")
+        
+        monkeypatch.setattr(auth.jwt, "decode", fail)
+        assert auth.decode_access_token(token)["sub"] == "cached"
+    
+    def test_invalid_token_not_cached(self):
+        """Невалидный токен не попадает в кэш и каждый раз отклоняется."""
+        from app.auth import decode_access_token, token_cache
+        
+        for _ in range(2):
+            with pytest.raises(JWTError):
+                decode_access_token("invalid.token.value")
+        
+        assert len(token_cache) == 0
+    
+    def test_cache_respects_expiration(self, monkeypatch):
+        """Запись в кэше не переживает exp токена."""
+        import time
+        from app.auth import decode_access_token, token_cache
+        
+        token = create_access_token(data={"sub": "expiring"})
+        decode_access_token(token)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 3601)
+        
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        assert token_cache.get(digest) is None
+    
+    def test_expired_token_rejected(self):
+        """Просроченный токен отклоняется и не кэшируется."""
+        from app.auth import decode_access_token, token_cache
+        
+        expired = jwt.encode(
+            {"sub": "old", "exp": datetime.now(timezone.utc) - timedelta(minutes=1)},
+            SECRET_KEY,
+            algorithm=ALGORITHM
+        )
+        
+        with pytest.raises(JWTError):
+            decode_access_token(expired)
+        assert len(token_cache) == 0
+
+
+class TestPasswordHashPool:
+    """Тесты отдельного пула для bcrypt."""
+    
+    def test_async_hash_and_verify(self):
+        """Асинхронные обертки хешируют и проверяют пароль в пуле."""
+        import asyncio
+        from app.auth import get_password_hash_async, verify_password_async, password_pool
+        
+        async def scenario():
+            hashed = await get_password_hash_async("secret123")
+            return await verify_password_async("secret123", hashed), await verify_password_async("wrong", hashed)
+        
+        completed = password_pool.stats()["completed"]
+        assert asyncio.run(scenario()) == (True, False)
+        assert password_pool.stats()["completed"] == completed + 3
+        assert password_pool.stats()["in_flight"] == 0
+    
+    @pytest.mark.parametrize("kind", ["thread", "process"])
+    def test_queue_depth(self, kind):
+        """Задачи сверх числа воркеров учитываются как очередь."""
+        import asyncio
+        from app.auth import PasswordHashPool
+        
+        pool = PasswordHashPool(kind, workers=1)
+        hashed = get_password_hash("secret123")
+        depths = []
+        
+        async def scenario():
+            tasks = [asyncio.ensure_future(pool.run(verify_password, "secret123", hashed)) for _ in range(3)]
+            await asyncio.sleep(0)
+            depths.append(pool.stats()["queue_depth"])
+            return await asyncio.gather(*tasks)
+        
+        try:
+            assert asyncio.run(scenario()) == [True, True, True]
+        finally:
+            pool.shutdown()
+        assert depths == [2]
+        assert pool.stats()["completed"] == 3
@@ -0,0 +1,83 @@
+"""
+Unit-тесты для LRU-кэша (app/cache.py).
+"""
+import time
+
+from app.cache import CACHES, LRUCache, cache_stats, clear_all
+
+
+class TestLRUCache:
+    """Тесты LRU-кэша."""
+    
+    def test_get_missing_key(self):
+        """Отсутствующий ключ возвращает default и считается промахом."""
+        cache = LRUCache("test_missing", maxsize=2)
+        
+        assert cache.get("a") is None
+        assert cache.get("a", 0) == 0
+        assert cache.stats()["misses"] == 2
+    
+    def test_set_and_get(self):
+        """Сохраненное значение возвращается и считается попаданием."""
+        cache = LRUCache("test_set", maxsize=2)
+        cache.set("a", 1)
+        
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["hit_ratio"] == 1.0
+    
+    def test_evicts_least_recently_used(self):
+        """При переполнении вытесняется давно не использованный ключ."""
+        cache = LRUCache("test_evict", maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+    
+    def test_pop(self):
+        """pop удаляет ключ и не падает на отсутствующем."""
+        cache = LRUCache("test_pop", maxsize=2)
+        cache.set("a", 1)
+        cache.pop("a")
+        cache.pop("missing")
+        
+        assert cache.get("a") is None
+    
+    def test_pop_where(self):
+        """pop_where удаляет все ключи, подходящие под условие."""
+        cache = LRUCache("test_pop_where", maxsize=4)
+        for key in ((1, 0), (1, 1), (2, 0)):
+            cache.set(key, key)
+        
+        assert cache.pop_where(lambda key: key[0] == 1) == 2
+        assert len(cache) == 1
+        assert cache.get((2, 0)) == (2, 0)
+    
+    def test_ttl_expiry(self, monkeypatch):
+        """Запись с истекшим TTL считается промахом и удаляется."""
+        cache = LRUCache("test_ttl", maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 50)
+        
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert len(cache) == 1
+    
+    def test_registry_and_clear_all(self):
+        """Кэши регистрируются по имени и сбрасываются вместе."""
+        cache = LRUCache("test_registry", maxsize=2)
+        cache.set("a", 1)
+        cache.get("a")
+        
+        assert CACHES["test_registry"] is cache
+        assert cache_stats()["test_registry"]["hits"] == 1
+        clear_all()
+        assert len(cache) == 0
+        assert cache.stats()["hits"] == 0
@@ -0,0 +1,154 @@
+"""
+Unit-тесты для сравнения с возрастной группой (app/cohorts.py).
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.cohorts import (
+    QualitySketch, age_bucket, age_group_label, cohort_comparison, rebuild_cohorts,
+)
+from app.config import settings
+from app.database import Base, create_db_engine
+from app.duration_sketch import DurationSketch
+from app.models import CohortRollup, SleepRecord, User
+
+
+def _add_user(db_session, name, age, durations=(), quality=7, deletion_requested=False):
+    user = User(username=name, email=f"{name}@example.com", password="x", age=age)
+    if deletion_requested:
+        user.deletion_requested_at = datetime.now(timezone.utc)
+    db_session.add(user)
+    db_session.flush()
+    night = datetime(2024, 1, 1, 23, 0)
+    for i, duration in enumerate(durations):
+        start = night + timedelta(days=i)
+        db_session.add(SleepRecord(
+            user_id=user.id, sleep_date=start, sleep_start=start,
+            sleep_end=start + timedelta(hours=duration), duration=duration, quality=quality,
+        ))
+    db_session.commit()
+    return user
+
+
+def _fill(db_session):
+    for i in range(5):
+        _add_user(db_session, f"young{i}", 20 + i, [6.0 + i, 7.0 + i], quality=4 + i)
+    _add_user(db_session, "adult", 40, [8.0])
+    _add_user(db_session, "senior", 80, [9.0])
+    # Не попадают в группы
+    _add_user(db_session, "deleted", 20, [8.0], deletion_requested=True)
+    _add_user(db_session, "no_age", None, [8.0])
+    _add_user(db_session, "no_records", 20)
+
+
+def _rows(db_session):
+    return {
+        row.age_bucket: (row.user_count, list(DurationSketch.loads(row.duration_sketch).counts),
+                         list(QualitySketch.loads(row.quality_sketch).counts))
+        for row in db_session.query(CohortRollup)
+    }
+
+
+class TestAgeBuckets:
+    """Тесты возрастных групп."""
+
+    @pytest.mark.parametrize("age, bucket", [(0, 0), (17, 0), (18, 18), (24, 18), (25, 25), (64, 55), (90, 65), (-1, 0)])
+    def test_age_bucket(self, age, bucket):
+        """Возраст попадает в группу по нижней границе."""
+        assert age_bucket(age) == bucket
+
+    def test_labels(self):
+        """Подписи групп."""
+        assert age_group_label(0) == "0-17"
+        assert age_group_label(25) == "25-34"
+        assert age_group_label(65) == "65+"
+
+
+class TestRank:
+    """Тесты доли значений ниже заданного."""
+
+    def test_empty(self):
+        """Пустой скетч не дает ранга."""
+        assert DurationSketch().rank(8.0) is None
+
+    def test_rank(self):
+        """Ранг считается по корзинам с интерполяцией внутри корзины."""
+        sketch = DurationSketch()
+        sketch.add([6.0, 7.0, 8.0, 9.0])
+        assert sketch.rank(5.0) == 0
+        assert sketch.rank(10.0) == 1
+        assert sketch.rank(7.5) == pytest.approx(0.5)
+        assert sketch.rank(8.0) == pytest.approx(0.5)
+
+    def test_quality_grid(self):
+        """Скетч качества использует сетку 0.1 от 0 до 10."""
+        sketch = QualitySketch()
+        sketch.add([3.0, 5.5, 9.0, 10.0])
+        assert len(sketch.counts) == 101
+        assert sketch.rank(6.0) == pytest.approx(0.5)
+        assert sketch.rank(10.0) == pytest.approx(0.875)
+
+
+class TestRebuildCohorts:
+    """Тесты пакетного пересчета cohort_rollups."""
+
+    def test_counts_users_per_bucket(self, db_session):
+        """В группы попадают пользователи с возрастом и записями, без ожидающих удаления."""
+        _fill(db_session)
+
+        assert rebuild_cohorts(db_session, chunk_size=2) == {18: 5, 35: 1, 65: 1}
+        rows = _rows(db_session)
+        assert set(rows) == {18, 35, 65}
+        assert sum(rows[18][1]) == sum(rows[18][2]) == 5
+
+    def test_rebuild_replaces_rows(self, db_session):
+        """Повторный пересчет заменяет строки целиком."""
+        _fill(db_session)
+        rebuild_cohorts(db_session)
+        db_session.query(SleepRecord).delete()
+        db_session.commit()
+
+        assert rebuild_cohorts(db_session) == {}
+        assert db_session.query(CohortRollup).count() == 0
+
+    def test_process_pool_matches_in_process(self, tmp_path):
+        """Пул процессов дает те же гистограммы, что и расчет в текущем процессе."""
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'cohorts.db'}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+        try:
+            with session_factory() as db:
+                _fill(db)
+                expected = rebuild_cohorts(db, workers=0, chunk_size=3)
+                expected_rows = _rows(db)
+
+                assert rebuild_cohorts(db, workers=2, chunk_size=3) == expected
+                assert _rows(db) == expected_rows
+        finally:
+            engine.dispose()
+
+
+class TestCohortComparison:
+    """Тесты перцентиля пользователя в группе."""
+
+    def test_percentiles(self, db_session, monkeypatch):
+        """Перцентиль считается по гистограмме своей группы."""
+        monkeypatch.setattr(settings, "COHORT_MIN_USERS", 5)
+        _fill(db_session)
+        rebuild_cohorts(db_session)
+
+        # Средние длительности группы 18-24: 6.5 ... 10.5, качество 4 ... 8
+        result = cohort_comparison(db_session, 21, 8.5, 9.0)
+        assert result == {"age_group": "18-24", "users": 5, "duration_percentile": 40, "quality_percentile": 100}
+
+    def test_small_or_missing_cohort(self, db_session, monkeypatch):
+        """Маленькие и пустые группы и неизвестный возраст не сравниваются."""
+        monkeypatch.setattr(settings, "COHORT_MIN_USERS", 5)
+        _fill(db_session)
+        rebuild_cohorts(db_session)
+
+        assert cohort_comparison(db_session, None, 8.0, 7.0) is None
+        assert cohort_comparison(db_session, 40, 8.0, 7.0) is None  # один пользователь
+        assert cohort_comparison(db_session, 50, 8.0, 7.0) is None  # строки нет
@@ -0,0 +1,85 @@
+"""
+Unit-тесты для фабрики движка БД (app/database.py).
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_database_url, create_async_db_engine, create_db_engine
+
+
+class TestCreateDbEngine:
+    """Тесты настройки движка."""
+    
+    def _pragma(self, engine, name):
+        with engine.connect() as conn:
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+    
+    def test_sqlite_file_pragmas(self, tmp_path):
+        """Для файловой SQLite каждое соединение получает настройки из Settings."""
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+        try:
+            assert self._pragma(engine, "journal_mode") == settings.SQLITE_JOURNAL_MODE.lower()
+            assert self._pragma(engine, "synchronous") == 1  # NORMAL
+            assert self._pragma(engine, "mmap_size") == settings.SQLITE_MMAP_SIZE
+            assert self._pragma(engine, "cache_size") == settings.SQLITE_CACHE_SIZE
+            assert self._pragma(engine, "busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+            assert self._pragma(engine, "foreign_keys") == 1
+        finally:
+            engine.dispose()
+    
+    def test_sqlite_file_pool_size(self, tmp_path):
+        """Размер пула соединений берется из Settings."""
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+        try:
+            assert engine.pool.size() == settings.DB_POOL_SIZE
+        finally:
+            engine.dispose()
+    
+    def test_sqlite_memory(self):
+        """In-memory база создается без параметров пула."""
+        engine = create_db_engine("sqlite://")
+        try:
+            assert self._pragma(engine, "busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+        finally:
+            engine.dispose()
+
+
+class TestAsyncEngine:
+    """Тесты async-движка (DB_ASYNC)."""
+    
+    def test_driver_from_database_url(self):
+        """Async-драйвер выбирается по бэкенду DATABASE_URL."""
+        assert async_database_url("sqlite:///./sleep.db").drivername == "sqlite+aiosqlite"
+        assert async_database_url("postgresql://user:secret@db/sleep").drivername == "postgresql+asyncpg"
+        assert async_database_url("postgresql://user:secret@db/sleep").database == "sleep"
+    
+    def test_explicit_async_url(self, monkeypatch):
+        """ASYNC_DATABASE_URL имеет приоритет над выводом из DATABASE_URL."""
+        monkeypatch.setattr(settings, "ASYNC_DATABASE_URL", "postgresql+psycopg://user@db/sleep")
+        assert async_database_url().drivername == "postgresql+psycopg"
+    
+    def test_unknown_backend(self):
+        """Для бэкенда без async-драйвера нужен явный ASYNC_DATABASE_URL."""
+        with pytest.raises(ValueError):
+            async_database_url("mysql://user@db/sleep")
+    
+    def test_sqlite_file_pragmas(self, tmp_path):
+        """Соединения aiosqlite получают те же PRAGMA, что и синхронные."""
+        engine = create_async_db_engine(f"sqlite:///{tmp_path / 'async.db'}")
+        
+        async def pragmas():
+            try:
+                async with engine.connect() as conn:
+                    return [
+                        (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                        for name in ("journal_mode", "busy_timeout", "foreign_keys")
+                    ]
+            finally:
+                await engine.dispose()
+        
+        assert asyncio.run(pragmas()) == [
+            settings.SQLITE_JOURNAL_MODE.lower(), settings.SQLITE_BUSY_TIMEOUT_MS, 1
+        ]
@@ -0,0 +1,102 @@
+"""
+Unit-тесты для скетча длительности сна (app/duration_sketch.py).
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.duration_sketch import BIN_WIDTH, BINS, MAX_HOURS, DurationSketch
+
+PERCENTS = (1, 10, 25, 50, 75, 90, 99)
+
+
+def _durations(seed, size):
+    rng = random.Random(seed)
+    # Основной сон, дневной сон и редкие очень длинные записи
+    return [
+        rng.choice((
+            lambda: max(rng.gauss(7.5, 1.1), 0.1),
+            lambda: rng.uniform(0.3, 2.0),
+            lambda: rng.uniform(10.0, 30.0),
+        ))()
+        for _ in range(size)
+    ]
+
+
+def _sketch(values):
+    sketch = DurationSketch()
+    sketch.add(values)
+    return sketch
+
+
+class TestDurationSketch:
+    """Тесты приближенных перцентилей."""
+    
+    @pytest.mark.parametrize("seed, size", [(1, 1), (2, 2), (3, 7), (4, 100), (5, 5000)])
+    def test_error_bound(self, seed, size):
+        """Ошибка не превышает ширины корзины относительно np.percentile."""
+        values = [v for v in _durations(seed, size) if v < MAX_HOURS] or [8.0]
+        
+        approx = _sketch(values).percentiles(PERCENTS, min(values), max(values))
+        exact = np.percentile(values, PERCENTS)
+        
+        for estimate, expected in zip(approx, exact):
+            assert abs(estimate - expected) <= BIN_WIDTH + 1e-9
+    
+    def test_overflow_bin_bounded_by_max(self):
+        """Значения длиннее MAX_HOURS оцениваются в пределах [MAX_HOURS, max]."""
+        values = _durations(6, 2000)
+        
+        approx = _sketch(values).percentiles(PERCENTS, min(values), max(values))
+        exact = np.percentile(values, PERCENTS)
+        
+        for estimate, expected in zip(approx, exact):
+            bound = BIN_WIDTH if expected < MAX_HOURS else max(values) - MAX_HOURS
+            assert abs(estimate - expected) <= bound + 1e-9
+    
+    def test_remove_values(self):
+        """Удаление значений дает тот же скетч, что и построение без них."""
+        values = _durations(7, 500)
+        sketch = _sketch(values)
+        
+        sketch.add(values[100:], sign=-1)
+        
+        assert sketch.counts == _sketch(values[:100]).counts
+    
+    def test_remove_missing_value(self):
+        """Удаление отсутствующего значения не уводит счетчик в минус."""
+        sketch = _sketch([8.0])
+        
+        sketch.add([3.0], sign=-1)
+        
+        assert sketch.count == 1
+    
+    def test_merge(self):
+        """Слияние скетчей равно скетчу объединения значений."""
+        first, second = _durations(8, 300), _durations(9, 200)
+        merged = _sketch(first)
+        
+        merged.merge(_sketch(second))
+        
+        assert merged.counts == _sketch(first + second).counts
+    
+    def test_serialization(self):
+        """Скетч переживает сериализацию и занимает немного места."""
+        sketch = _sketch(_durations(10, 3000))
+        
+        data = sketch.dumps()
+        
+        assert DurationSketch.loads(data).counts == sketch.counts
+        assert len(data) < 4 * BINS
+    
+    def test_from_bins_clamps_overflow(self):
+        """Номера корзин за пределами диапазона попадают в крайние корзины."""
+        sketch = DurationSketch.from_bins({DurationSketch().bin_index(8.0): 2, BINS + 50: 1})
+        
+        assert sketch.count == 3
+        assert sketch.counts[BINS - 1] == 1
+    
+    def test_empty(self):
+        """Пустой скетч перцентилей не дает."""
+        assert DurationSketch().percentiles((50,)) == [None]
@@ -0,0 +1,199 @@
+"""
+Unit-тесты для прогресса целей сна (app/goal_progress.py).
+"""
+import random
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from app import goal_progress, sleep_stats
+from app.goal_progress import PROGRESS_FIELDS, get_progress
+from app.models import Goal, GoalProgress, SleepRecord
+
+TODAY = datetime.now(timezone.utc).date()
+
+
+def _goal(db_session, user_id, created, target_duration=8.0, target_quality=7):
+    goal = Goal(
+        user_id=user_id, target_duration=target_duration, target_quality=target_quality,
+        created_at=datetime.combine(created, time(12, 0)),
+    )
+    db_session.add(goal)
+    db_session.commit()
+    return goal
+
+
+def _add(db_session, user_id, day, duration, quality=8):
+    night = datetime.combine(day, time(1, 0))
+    record = SleepRecord(
+        user_id=user_id, sleep_date=night, sleep_start=night, sleep_end=night + timedelta(hours=duration),
+        duration=duration, quality=quality,
+    )
+    db_session.add(record)
+    db_session.flush()
+    sleep_stats.record_added(db_session, record)
+    db_session.commit()
+    return record
+
+
+def _remove(db_session, record):
+    db_session.delete(record)
+    db_session.flush()
+    sleep_stats.record_removed(db_session, record)
+    db_session.commit()
+
+
+def _change(db_session, record, duration, quality):
+    old = sleep_stats.snapshot(record)
+    record.duration = duration
+    record.quality = quality
+    db_session.flush()
+    sleep_stats.record_changed(db_session, old, record)
+    db_session.commit()
+
+
+def _state(db_session, goal_id):
+    progress = db_session.get(GoalProgress, goal_id, populate_existing=True)
+    return {field: getattr(progress, field) for field in PROGRESS_FIELDS}
+
+
+def _assert_consistent(db_session, goal):
+    """Счетчики совпадают с пересборкой и с прямым подсчетом по записям."""
+    state = _state(db_session, goal.id)
+    goal_progress.rebuild(db_session, [goal.id])
+    db_session.commit()
+    assert state == _state(db_session, goal.id)
+
+    days = defaultdict(list)
+    for record in db_session.query(SleepRecord).filter(SleepRecord.user_id == goal.user_id):
+        if record.sleep_date.date() >= goal.created_at.date():
+            days[record.sleep_date.date()].append(record)
+    hits = sorted(
+        day for day, records in days.items()
+        if sum(r.duration for r in records) >= goal.target_duration
+        and sum(r.quality for r in records) >= goal.target_quality * len(records)
+    )
+    longest = run = 0
+    for previous, day in zip([None] + hits, hits):
+        run = run + 1 if previous == day - timedelta(days=1) else 1
+        longest = max(longest, run)
+
+    result = get_progress(db_session, goal)
+    assert result["tracked_days"] == len(days)
+    assert result["hit_days"] == len(hits)
+    assert result["longest_streak"] == longest
+    assert result["last_day"] == max(days, default=None)
+
+
+class TestGoalProgress:
+    """Тесты счетчиков и серий."""
+
+    def test_streaks(self, db_session, test_user):
+        """Доля выполнения и серии считаются по дням начиная с дня создания цели."""
+        start = TODAY - timedelta(days=9)
+        goal = _goal(db_session, test_user.id, start)
+        sleep_stats.get_user_stats(db_session, test_user.id)
+        _add(db_session, test_user.id, start - timedelta(days=1), 9.0)  # до создания цели
+        # Дни 0-1 выполнены, 2 нет, 3-5 выполнены, 6 без записей, 9 (сегодня) выполнен
+        for offset, duration in ((0, 8.0), (1, 9.0), (2, 6.0), (3, 8.5), (4, 8.0), (5, 8.0), (9, 8.0)):
+            _add(db_session, test_user.id, start + timedelta(days=offset), duration)
+
+        result = get_progress(db_session, goal)
+
+        assert result == {
+            "goal_id": goal.id, "tracked_days": 7, "hit_days": 6, "hit_rate": pytest.approx(6 / 7),
+            "current_streak": 1, "longest_streak": 3, "last_day": TODAY,
+        }
+        _assert_consistent(db_session, goal)
+
+    def test_day_totals(self, db_session, test_user):
+        """День выполняет цель по суммарной длительности и среднему качеству."""
+        goal = _goal(db_session, test_user.id, TODAY)
+        sleep_stats.get_user_stats(db_session, test_user.id)
+        _add(db_session, test_user.id, TODAY, 6.0, quality=9)
+        assert get_progress(db_session, goal)["hit_days"] == 0
+
+        _add(db_session, test_user.id, TODAY, 2.0, quality=6)
+        assert get_progress(db_session, goal)["hit_days"] == 1
+
+        _add(db_session, test_user.id, TODAY, 1.0, quality=3)
+        assert get_progress(db_session, goal)["hit_days"] == 0
+        _assert_consistent(db_session, goal)
+
+    @pytest.mark.parametrize("last_offset, last_hit, expected", [
+        (0, True, 3), (0, False, 2), (1, True, 3), (2, True, 0),
+    ])
+    def test_current_streak(self, db_session, test_user, last_offset, last_hit, expected):
+        """Текущая серия: незаконченный сегодняшний день ее не прерывает, пропущенный вчерашний прерывает."""
+        last_day = TODAY - timedelta(days=last_offset)
+        goal = _goal(db_session, test_user.id, last_day - timedelta(days=2))
+        sleep_stats.get_user_stats(db_session, test_user.id)
+        for offset in (2, 1):
+            _add(db_session, test_user.id, last_day - timedelta(days=offset), 8.0)
+        _add(db_session, test_user.id, last_day, 8.0 if last_hit else 5.0)
+
+        assert get_progress(db_session, goal)["current_streak"] == expected
+
+    def test_no_records(self, db_session, test_goal):
+        """Цель без записей."""
+        result = get_progress(db_session, test_goal)
+
+        assert result["tracked_days"] == 0
+        assert result["hit_rate"] is None
+        assert result["current_streak"] == result["longest_streak"] == 0
+        assert result["last_day"] is None
+
+    def test_random_changes(self, db_session, test_user):
+        """Приращения, изменения и удаления дают те же счетчики, что и пересборка."""
+        rng = random.Random(7)
+        start = TODAY - timedelta(days=40)
+        goal = _goal(db_session, test_user.id, start, target_duration=7.5, target_quality=6)
+        sleep_stats.get_user_stats(db_session, test_user.id)
+        get_progress(db_session, goal)
+        records = []
+        day = start - timedelta(days=2)
+        for step in range(60):
+            action = rng.random()
+            if records and action < 0.15:
+                _remove(db_session, records.pop(rng.randrange(len(records))))
+            elif records and action < 0.3:
+                _change(db_session, rng.choice(records), rng.uniform(5, 10), rng.randint(3, 10))
+            else:
+                day += timedelta(days=rng.choice((0, 0, 1, 1, 2)))
+                records.append(_add(db_session, test_user.id, day, rng.uniform(5, 10), rng.randint(3, 10)))
+            _assert_consistent(db_session, goal)
+
+
+class TestGoalProgressRebuild:
+    """Тесты пересборки прогресса."""
+
+    def test_built_on_first_read(self, db_session, test_user):
+        """Для данных, загруженных в обход API, прогресс собирается при первом чтении."""
+        goal = _goal(db_session, test_user.id, date(2024, 1, 1))
+        for day in (1, 2, 3):
+            night = datetime(2024, 1, day, 1, 0)
+            db_session.add(SleepRecord(
+                user_id=test_user.id, sleep_date=night, sleep_start=night,
+                sleep_end=night + timedelta(hours=8), duration=8.0, quality=8,
+            ))
+        db_session.commit()
+        sleep_stats.get_user_stats(db_session, test_user.id)
+
+        result = get_progress(db_session, goal)
+
+        assert result["tracked_days"] == result["hit_days"] == 3
+        assert result["longest_streak"] == 3
+        assert result["current_streak"] == 0
+
+    def test_hooks_skip_missing_row(self, db_session, test_user):
+        """Хуки не создают строку прогресса, которой еще нет."""
+        goal = _goal(db_session, test_user.id, TODAY)
+        sleep_stats.get_user_stats(db_session, test_user.id)
+        db_session.query(GoalProgress).delete()
+        db_session.commit()
+
+        _add(db_session, test_user.id, TODAY, 8.0)
+
+        assert db_session.get(GoalProgress, goal.id) is None
+        assert get_progress(db_session, goal)["hit_days"] == 1
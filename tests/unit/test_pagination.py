@@ -0,0 +1,35 @@
+"""
+Unit-тесты для курсорной пагинации (app/pagination.py).
+"""
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+
+from app.models import SleepRecord
+from app.pagination import decode_cursor, encode_cursor
+
+COLUMNS = [SleepRecord.sleep_date, SleepRecord.id]
+
+
+class TestCursor:
+    """Тесты кодирования курсора."""
+    
+    def test_round_trip(self):
+        """Курсор декодируется в исходные значения с нужными типами."""
+        values = [datetime(2024, 5, 1, 23, 30, 15, 123456), 42]
+        
+        assert decode_cursor(encode_cursor(values), COLUMNS) == values
+    
+    def test_cursor_is_url_safe(self):
+        """Курсор можно передавать в query-параметре без экранирования."""
+        cursor = encode_cursor([datetime(2024, 5, 1), 1])
+        
+        assert all(c.isalnum() or c in "-_" for c in cursor)
+    
+    @pytest.mark.parametrize("cursor", ["???", "bm90LWpzb24", encode_cursor([1]), encode_cursor(["x", 1])])
+    def test_invalid_cursor(self, cursor):
+        """Некорректный курсор приводит к ошибке 400."""
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor, COLUMNS)
+        
+        assert exc_info.value.status_code == 400
@@ -0,0 +1,127 @@
+"""
+Unit-тесты для потокового импорта записей сна (app/sleep_import.py).
+"""
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+
+from app import sleep_import
+from app.models import SleepRecord, SleepDailyRollup
+from app.sleep_import import ImportFormatError, import_sleep_records, iter_csv, iter_json_array, iter_ndjson
+
+
+def _night(i, hours=8.0, **extra):
+    night = {
+        "sleep_start": f"2024-01-{i + 1:02d}T23:00:00+00:00",
+        "sleep_end": f"2024-01-{i + 2:02d}T{hours - 1:02.0f}:00:00+00:00",
+        "quality": 7,
+    }
+    night.update(extra)
+    return night
+
+
+@pytest.fixture
+def small_reads(monkeypatch):
+    """Маленькие блоки чтения, чтобы элементы разрывались между блоками."""
+    monkeypatch.setattr(sleep_import, "READ_SIZE", 5)
+
+
+class TestParsers:
+    """Тесты потокового разбора форматов."""
+    
+    def test_json_array_split_across_reads(self, small_reads):
+        """JSON-массив собирается из блоков, разрывающих элементы и числа."""
+        items = [_night(i) for i in range(5)] + [12345, "строка"]
+        
+        assert list(iter_json_array(io.BytesIO(json.dumps(items, ensure_ascii=False).encode()))) == items
+    
+    def test_json_array_empty(self):
+        """Пустой массив не содержит записей."""
+        assert list(iter_json_array(io.BytesIO(b" [ ] "))) == []
+    
+    @pytest.mark.parametrize("content", [b"", b"{}", b"[1 2]", b"[1,", b'[{"a": }]'])
+    def test_json_array_malformed(self, content):
+        """Битый JSON приводит к ошибке формата."""
+        with pytest.raises(ImportFormatError):
+            list(iter_json_array(io.BytesIO(content)))
+    
+    def test_ndjson_skips_blank_lines(self, small_reads):
+        """Пустые строки NDJSON пропускаются."""
+        content = b'{"quality": 1}\n\n{"quality": 2}'
+        
+        assert list(iter_ndjson(io.BytesIO(content))) == [{"quality": 1}, {"quality": 2}]
+    
+    def test_ndjson_malformed_line(self):
+        """Ошибка указывает номер битой строки."""
+        with pytest.raises(ImportFormatError, match="строка 2"):
+            list(iter_ndjson(io.BytesIO(b'{"quality": 1}\n{oops\n')))
+    
+    def test_csv_empty_cells_are_none(self, small_reads):
+        """Пустые ячейки CSV становятся None, переносы в кавычках сохраняются."""
+        content = 'quality,rem_sleep,comment\r\n7,,"две\nстроки"\n'.encode()
+        
+        assert list(iter_csv(io.BytesIO(content))) == [{"quality": "7", "rem_sleep": None, "comment": "две\nстроки"}]
+    
+    def test_invalid_encoding(self):
+        """Файл не в UTF-8 отклоняется."""
+        with pytest.raises(ImportFormatError):
+            list(iter_ndjson(io.BytesIO("кириллица".encode("cp1251"))))
+
+
+class TestImportSleepRecords:
+    """Тесты загрузки записей порциями."""
+    
+    def test_import_in_chunks(self, db_session, test_user):
+        """Записи вставляются порциями с отчетом о прогрессе."""
+        progress = []
+        
+        report = import_sleep_records(
+            db_session, test_user.id, [_night(i) for i in range(7)], chunk_size=3,
+            progress=lambda r: progress.append(r["processed"])
+        )
+        
+        assert report["created"] == 7
+        assert report["failed"] == 0
+        assert progress == [3, 6, 7]
+        assert db_session.query(SleepRecord).filter(SleepRecord.user_id == test_user.id).count() == 7
+    
+    def test_invalid_rows_reported_with_global_index(self, db_session, test_user):
+        """Невалидные строки отклоняются с номером во всем файле."""
+        rows = [_night(0), _night(1), _night(2, quality=11), _night(3, rem_sleep=9.0), _night(4)]
+        
+        report = import_sleep_records(db_session, test_user.id, rows, chunk_size=2)
+        
+        assert report["created"] == 3
+        assert report["failed"] == 2
+        assert [error["index"] for error in report["errors"]] == [2, 3]
+        assert "quality" in report["errors"][0]["errors"][0]
+    
+    def test_format_error_keeps_committed_chunks(self, db_session, test_user):
+        """Порции до ошибки формата остаются загруженными."""
+        content = "\n".join(json.dumps(_night(i)) for i in range(4)) + "\n{oops\n"
+        
+        with pytest.raises(ImportFormatError) as exc_info:
+            import_sleep_records(db_session, test_user.id, iter_ndjson(io.BytesIO(content.encode())), chunk_size=2)
+        
+        assert exc_info.value.created == 4
+        assert db_session.query(SleepRecord).filter(SleepRecord.user_id == test_user.id).count() == 4
+    
+    def test_history_keeps_night_dates(self, db_session, test_user):
+        """Импортированная история датируется днями пробуждения (UTC), а не днем загрузки."""
+        content = (
+            "sleep_start,sleep_end,quality\n"
+            "2022-06-30T23:00:00+00:00,2022-07-01T07:00:00+00:00,7\n"
+            "2023-12-31T22:30:00+00:00,2024-01-01T06:30:00+00:00,8\n"
+            "2024-02-29T18:00:00+03:00,2024-03-01T02:00:00+03:00,6\n"
+        )
+        
+        import_sleep_records(db_session, test_user.id, iter_csv(io.BytesIO(content.encode())))
+        
+        records = db_session.query(SleepRecord).order_by(SleepRecord.id).all()
+        assert [record.sleep_date for record in records] == [
+            datetime(2022, 7, 1, 7, 0), datetime(2024, 1, 1, 6, 30), datetime(2024, 2, 29, 23, 0),
+        ]
+        days = sorted(rollup.day for rollup in db_session.query(SleepDailyRollup))
+        assert days == [date(2022, 7, 1), date(2024, 1, 1), date(2024, 2, 29)]
@@ -0,0 +1,148 @@
+"""
+Unit-тесты для дневных сверток записей сна (app/sleep_rollups.py).
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models import SleepRecord, SleepDailyRollup
+from app.sleep_rollups import window_totals
+from app.sleep_stats import get_user_stats
+from tests.conftest import sleep_payload
+
+
+def _add_record(db_session, user_id, day, duration, quality=7, rem_sleep=None):
+    night = datetime.combine(day, datetime.min.time()) + timedelta(hours=1)
+    record = SleepRecord(
+        user_id=user_id, sleep_date=night, sleep_start=night, sleep_end=night + timedelta(hours=duration),
+        duration=duration, quality=quality, rem_sleep=rem_sleep,
+    )
+    db_session.add(record)
+    db_session.commit()
+    return record
+
+
+def _assert_consistent(db_session, user_id):
+    expected = defaultdict(list)
+    for record in db_session.query(SleepRecord).filter(SleepRecord.user_id == user_id):
+        expected[record.sleep_date.date()].append(record)
+    rollups = {
+        rollup.day: rollup for rollup in
+        db_session.query(SleepDailyRollup).filter(SleepDailyRollup.user_id == user_id).populate_existing()
+    }
+    
+    assert rollups.keys() == expected.keys()
+    for day, records in expected.items():
+        rollup = rollups[day]
+        durations = [r.duration for r in records]
+        rem = [r.rem_sleep for r in records if r.rem_sleep is not None]
+        assert rollup.record_count == len(records)
+        assert rollup.duration_sum == pytest.approx(sum(durations))
+        assert rollup.duration_sq_sum == pytest.approx(sum(d * d for d in durations))
+        assert rollup.min_duration == pytest.approx(min(durations))
+        assert rollup.max_duration == pytest.approx(max(durations))
+        assert rollup.quality_sum == sum(r.quality for r in records)
+        assert rollup.rem_sleep_sum == pytest.approx(sum(rem))
+        assert rollup.rem_sleep_count == len(rem)
+
+
+class TestIncrementalRollups:
+    """Тесты поддержки сверток при изменениях записей через API."""
+    
+    def test_create_records(self, client, auth_headers, db_session, test_user):
+        """Записи одного дня суммируются в одну строку."""
+        for hours, quality in ((7, 6), (9, 8), (5, 4)):
+            client.post("/api/sleep", headers=auth_headers, json=sleep_payload(hours, quality, rem_sleep=1.0))
+        
+        _assert_consistent(db_session, test_user.id)
+        assert db_session.query(SleepDailyRollup).count() == 1
+    
+    def test_batch_create(self, client, auth_headers, db_session, test_user):
+        """Пакетная вставка обновляет свертку."""
+        client.post("/api/sleep/batch", headers=auth_headers, json={
+            "records": [sleep_payload(6, 5), sleep_payload(8, 9, rem_sleep=2.0)]
+        })
+        
+        _assert_consistent(db_session, test_user.id)
+    
+    def test_update_phases(self, client, auth_headers, db_session, test_user):
+        """Изменение только фаз пересчитывает свертку дня."""
+        record_id = client.post("/api/sleep", headers=auth_headers, json=sleep_payload(8, 7)).json()["id"]
+        
+        client.put(f"/api/sleep/{record_id}", headers=auth_headers, json={"rem_sleep": 1.5})
+        
+        _assert_consistent(db_session, test_user.id)
+    
+    def test_update_duration(self, client, auth_headers, db_session, test_user):
+        """Изменение длительности обновляет экстремумы дня."""
+        ids = [
+            client.post("/api/sleep", headers=auth_headers, json=sleep_payload(hours, 7)).json()["id"]
+            for hours in (6, 9)
+        ]
+        sleep_end = datetime.now(timezone.utc)
+        client.put(f"/api/sleep/{ids[1]}", headers=auth_headers, json={
+            "sleep_start": (sleep_end - timedelta(hours=5)).isoformat(),
+            "sleep_end": sleep_end.isoformat(),
+        })
+        
+        _assert_consistent(db_session, test_user.id)
+    
+    def test_delete_records(self, client, auth_headers, db_session, test_user):
+        """После удаления последней записи дня строка дня исчезает."""
+        ids = [
+            client.post("/api/sleep", headers=auth_headers, json=sleep_payload(hours, 7)).json()["id"]
+            for hours in (6, 9)
+        ]
+        client.delete(f"/api/sleep/{ids[1]}", headers=auth_headers)
+        _assert_consistent(db_session, test_user.id)
+        
+        client.delete(f"/api/sleep/{ids[0]}", headers=auth_headers)
+        _assert_consistent(db_session, test_user.id)
+        assert db_session.query(SleepDailyRollup).count() == 0
+    
+    def test_only_touched_day_changes(self, client, auth_headers, db_session, test_user):
+        """Удаление записи прошлого дня пересчитывает только этот день."""
+        old = _add_record(db_session, test_user.id, date(2024, 1, 10), 6.0)
+        _add_record(db_session, test_user.id, date(2024, 1, 11), 8.0)
+        get_user_stats(db_session, test_user.id)
+        
+        client.delete(f"/api/sleep/{old.id}", headers=auth_headers)
+        
+        _assert_consistent(db_session, test_user.id)
+        assert [r.day for r in db_session.query(SleepDailyRollup)] == [date(2024, 1, 11)]
+
+
+class TestRollupRebuild:
+    """Тесты пересборки и чтения сверток."""
+    
+    def test_built_with_missing_stats_row(self, db_session, test_user):
+        """Свертки собираются вместе со строкой статистики для данных, загруженных в обход API."""
+        for day, duration in ((1, 6.0), (1, 8.0), (3, 7.0)):
+            _add_record(db_session, test_user.id, date(2024, 2, day), duration, rem_sleep=1.0 if day == 3 else None)
+        
+        get_user_stats(db_session, test_user.id)
+        
+        _assert_consistent(db_session, test_user.id)
+        assert db_session.query(SleepDailyRollup).count() == 2
+    
+    def test_window_totals(self, db_session, test_user):
+        """Суммы окна берутся только из дней начиная с since."""
+        for day, duration in ((1, 6.0), (2, 8.0), (3, 7.0)):
+            _add_record(db_session, test_user.id, date(2024, 3, day), duration, quality=day)
+        get_user_stats(db_session, test_user.id)
+        
+        totals = window_totals(db_session, test_user.id, date(2024, 3, 2))
+        
+        assert totals["record_count"] == 2
+        assert totals["duration_sum"] == pytest.approx(15.0)
+        assert totals["quality_sum"] == 5
+        assert totals["min_duration"] == 7.0
+        assert totals["max_duration"] == 8.0
+    
+    def test_window_totals_empty(self, db_session, test_user):
+        """Окно без записей."""
+        totals = window_totals(db_session, test_user.id, date(2024, 3, 2))
+        
+        assert totals["record_count"] == 0
+        assert totals["min_duration"] is None
@@ -0,0 +1,250 @@
+"""
+Unit-тесты для материализованной статистики сна (app/sleep_stats.py).
+"""
+import threading
+import time
+
+import pytest
+from datetime import datetime, timezone, timedelta
+from sqlalchemy.orm import sessionmaker
+
+from app import sleep_stats
+from app.database import Base, create_db_engine
+from app.duration_sketch import DurationSketch
+from app.models import SleepRecord, User, UserSleepStats
+from app.routes.sleep import create_sleep_record, update_sleep_record
+from app.schemas.sleep import SleepRecordCreate, SleepRecordUpdate
+from app.sleep_stats import get_user_stats, rebuild_all, rebuild_stats
+from tests.conftest import sleep_payload
+
+
+def _expected(db_session, user_id):
+    records = db_session.query(SleepRecord).filter(SleepRecord.user_id == user_id).all()
+    durations = [r.duration for r in records]
+    return {
+        "record_count": len(records),
+        "duration_sum": sum(durations),
+        "duration_sq_sum": sum(d * d for d in durations),
+        "min_duration": min(durations) if durations else None,
+        "max_duration": max(durations) if durations else None,
+        "quality_sum": sum(r.quality for r in records),
+        "durations": durations,
+    }
+
+
+def _assert_consistent(db_session, user_id):
+    stats = db_session.get(UserSleepStats, user_id, populate_existing=True)
+    expected = _expected(db_session, user_id)
+    assert stats.record_count == expected["record_count"]
+    assert stats.duration_sum == pytest.approx(expected["duration_sum"], abs=1e-9)
+    assert stats.duration_sq_sum == pytest.approx(expected["duration_sq_sum"], abs=1e-9)
+    assert stats.min_duration == pytest.approx(expected["min_duration"])
+    assert stats.max_duration == pytest.approx(expected["max_duration"])
+    assert stats.quality_sum == expected["quality_sum"]
+    sketch = DurationSketch()
+    sketch.add(expected["durations"])
+    assert DurationSketch.loads(stats.duration_sketch).counts == sketch.counts
+
+
+class TestIncrementalStats:
+    """Тесты поддержки таблицы при изменениях записей через API."""
+    
+    def test_create_records(self, client, auth_headers, db_session, test_user):
+        """Создание записей увеличивает счетчики и обновляет экстремумы."""
+        for hours, quality in ((7, 6), (9, 8), (5, 4)):
+            client.post("/api/sleep", headers=auth_headers, json=sleep_payload(hours, quality))
+        
+        _assert_consistent(db_session, test_user.id)
+    
+    def test_update_record(self, client, auth_headers, db_session, test_user):
+        """Изменение длительности пересчитывает суммы и экстремумы."""
+        ids = [
+            client.post("/api/sleep", headers=auth_headers, json=sleep_payload(hours, 7)).json()["id"]
+            for hours in (6, 8)
+        ]
+        sleep_end = datetime.now(timezone.utc)
+        client.put(f"/api/sleep/{ids[1]}", headers=auth_headers, json={
+            "sleep_start": (sleep_end - timedelta(hours=4)).isoformat(),
+            "sleep_end": sleep_end.isoformat(),
+            "quality": 3,
+        })
+        
+        _assert_consistent(db_session, test_user.id)
+        assert db_session.get(UserSleepStats, test_user.id).max_duration == pytest.approx(6.0)
+    
+    def test_delete_extreme_record(self, client, auth_headers, db_session, test_user):
+        """Удаление записи с максимумом берет новый максимум из оставшихся."""
+        ids = [
+            client.post("/api/sleep", headers=auth_headers, json=sleep_payload(hours, 7)).json()["id"]
+            for hours in (6, 7, 9)
+        ]
+        client.delete(f"/api/sleep/{ids[2]}", headers=auth_headers)
+        
+        _assert_consistent(db_session, test_user.id)
+        assert db_session.get(UserSleepStats, test_user.id).max_duration == pytest.approx(7.0)
+    
+    def test_delete_last_record(self, client, auth_headers, db_session, test_user):
+        """После удаления последней записи экстремумы сбрасываются."""
+        record_id = client.post("/api/sleep", headers=auth_headers, json=sleep_payload(8, 7)).json()["id"]
+        client.delete(f"/api/sleep/{record_id}", headers=auth_headers)
+        
+        stats = db_session.get(UserSleepStats, test_user.id, populate_existing=True)
+        assert stats.record_count == 0
+        assert stats.min_duration is None
+        assert stats.max_duration is None
+    
+    def test_every_write_changes_version(self, client, auth_headers, db_session, test_user):
+        """Каждая запись сна, включая изменение только фаз, поднимает версию данных."""
+        def version():
+            return db_session.get(UserSleepStats, test_user.id, populate_existing=True).version
+        
+        record_id = client.post("/api/sleep", headers=auth_headers, json=sleep_payload(8, 7)).json()["id"]
+        versions = [version()]
+        client.put(f"/api/sleep/{record_id}", headers=auth_headers, json={"rem_sleep": 1.5})
+        versions.append(version())
+        client.put(f"/api/sleep/{record_id}", headers=auth_headers, json={"quality": 9})
+        versions.append(version())
+        client.delete(f"/api/sleep/{record_id}", headers=auth_headers)
+        versions.append(version())
+        
+        assert versions == sorted(set(versions))
+    
+    def test_new_row_version_differs(self, db_session, test_user, multiple_sleep_records):
+        """Пересобранная строка получает новую версию, а не начинает с нуля."""
+        old = get_user_stats(db_session, test_user.id).version
+        rebuild_stats(db_session, [test_user.id])
+        db_session.commit()
+        
+        assert get_user_stats(db_session, test_user.id).version not in (0, old)
+
+
+class TestRebuild:
+    """Тесты пересчета таблицы из исходных записей."""
+    
+    def test_missing_row_is_built_on_read(self, db_session, test_user, multiple_sleep_records):
+        """Строка создается при первом чтении, если записи добавлены в обход API."""
+        stats = get_user_stats(db_session, test_user.id)
+        
+        assert stats.record_count == 5
+        _assert_consistent(db_session, test_user.id)
+    
+    def test_rebuild_repairs_stale_row(self, db_session, test_user, multiple_sleep_records):
+        """Пересчет исправляет рассинхронизированную строку."""
+        db_session.add(UserSleepStats(user_id=test_user.id, record_count=100, duration_sum=1.0))
+        db_session.commit()
+        
+        rebuild_stats(db_session, [test_user.id])
+        db_session.commit()
+        
+        _assert_consistent(db_session, test_user.id)
+    
+    def test_rebuild_all_in_chunks(self, db_session, test_user, test_user2, multiple_sleep_records):
+        """Полный пересчет обходит пользователей порциями."""
+        progress = []
+        
+        processed = rebuild_all(db_session, chunk_size=1, progress=progress.append)
+        
+        assert processed == 2
+        assert progress == [1, 2]
+        _assert_consistent(db_session, test_user.id)
+        assert db_session.get(UserSleepStats, test_user2.id).record_count == 0
+
+
+class TestConcurrentWrites:
+    """Тесты параллельных записей в файловую базу SQLite."""
+    
+    @pytest.fixture
+    def session_factory(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'concurrent.db'}")
+        Base.metadata.create_all(bind=engine)
+        yield sessionmaker(bind=engine, expire_on_commit=False)
+        engine.dispose()
+    
+    def _user_with_record(self, session_factory, quality):
+        with session_factory() as db:
+            user = User(username="racer", email="racer@example.com", password="x")
+            db.add(user)
+            db.flush()
+            night = datetime(2024, 1, 2, 7, 0)
+            record = SleepRecord(
+                user_id=user.id, sleep_date=night, sleep_start=night - timedelta(hours=8), sleep_end=night,
+                duration=8.0, quality=quality,
+            )
+            db.add(record)
+            db.commit()
+            get_user_stats(db, user.id)
+            return user, record.id
+    
+    def _run_paused(self, first, second, paused):
+        """Запускает second, когда first дошел до paused, и ждет оба потока."""
+        errors = []
+        
+        def run(target):
+            try:
+                target()
+            except Exception as exc:  # ошибки потоков иначе теряются
+                errors.append(exc)
+        
+        threads = [threading.Thread(target=run, args=(first,)), threading.Thread(target=run, args=(second,))]
+        threads[0].start()
+        assert paused.wait(5)
+        threads[1].start()
+        for thread in threads:
+            thread.join(10)
+        assert errors == []
+    
+    def _pause_once(self, monkeypatch, name):
+        # Первый вызов функции задерживается: второй поток успевает вклиниться, если его ничто не держит
+        reached = threading.Event()
+        original = getattr(sleep_stats, name)
+        
+        def paused(*args, **kwargs):
+            result = original(*args, **kwargs)
+            if not reached.is_set():
+                reached.set()
+                time.sleep(0.5)
+            return result
+        
+        monkeypatch.setattr(sleep_stats, name, paused)
+        return reached
+    
+    def test_parallel_updates(self, session_factory, monkeypatch):
+        """Две одновременные правки одной записи не вычитают одно и то же прежнее значение."""
+        user, record_id = self._user_with_record(session_factory, quality=5)
+        old_values_read = self._pause_once(monkeypatch, "snapshot")
+        
+        def put(quality):
+            with session_factory() as db:
+                update_sleep_record(record_id, SleepRecordUpdate(quality=quality), current_user=user, db=db)
+        
+        self._run_paused(lambda: put(9), lambda: put(1), old_values_read)
+        
+        with session_factory() as db:
+            assert db.get(UserSleepStats, user.id).quality_sum == db.get(SleepRecord, record_id).quality
+    
+    def test_rebuild_with_parallel_insert(self, session_factory, monkeypatch):
+        """Запись, добавленная во время пересборки строки статистики, не теряется."""
+        user, _ = self._user_with_record(session_factory, quality=5)
+        with session_factory() as db:
+            db.query(UserSleepStats).delete()
+            db.commit()
+        aggregates_read = self._pause_once(monkeypatch, "_duration_bins_by_user")
+        
+        def read_stats():
+            with session_factory() as db:
+                get_user_stats(db, user.id)
+        
+        def post():
+            sleep_end = datetime(2024, 1, 3, 7, 0, tzinfo=timezone.utc)
+            with session_factory() as db:
+                create_sleep_record(
+                    SleepRecordCreate(sleep_start=sleep_end - timedelta(hours=6), sleep_end=sleep_end, quality=7),
+                    current_user=user, db=db,
+                )
+        
+        self._run_paused(read_stats, post, aggregates_read)
+        
+        with session_factory() as db:
+            stats = db.get(UserSleepStats, user.id)
+            assert stats.record_count == 2
+            assert stats.quality_sum == 12
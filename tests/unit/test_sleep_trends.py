@@ -0,0 +1,112 @@
+"""
+Unit-тесты для расчета трендов сна (app/sleep_trends.py).
+"""
+import statistics
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models import SleepRecord
+from app.sleep_trends import METRICS, SleepSeries, compute_trends, load_series
+
+
+def _series(days, duration, quality, rem=None):
+    rem = rem if rem is not None else [np.nan] * len(days)
+    nan = [np.nan] * len(days)
+    return SleepSeries(
+        days=np.array(days, dtype=np.int64),
+        first_date=np.datetime64("2024-01-01"),
+        values=np.array([duration, quality, nan, nan, rem], dtype=np.float64),
+    )
+
+
+class TestComputeTrends:
+    """Тесты векторного расчета трендов."""
+    
+    def test_summary_matches_python(self):
+        """Среднее, отклонение и перцентили совпадают с расчетом на чистом Python."""
+        duration = [6.0, 7.5, 8.0, 5.5, 9.0, 7.0, 6.5, 8.5]
+        trends = compute_trends(_series(range(8), duration, [5, 6, 7, 8, 9, 5, 6, 7]))
+        
+        metric = trends["metrics"]["duration"]
+        assert metric["mean"] == pytest.approx(statistics.fmean(duration), abs=0.01)
+        assert metric["std"] == pytest.approx(statistics.pstdev(duration), abs=0.01)
+        assert metric["percentiles"]["p50"] == pytest.approx(statistics.median(duration), abs=0.01)
+        assert metric["min"] == 5.5
+        assert metric["max"] == 9.0
+    
+    def test_slope(self):
+        """Наклон линейного тренда - изменение за день."""
+        trends = compute_trends(_series([0, 1, 2, 3], [6.0, 6.5, 7.0, 7.5], [5, 5, 5, 5]))
+        
+        assert trends["metrics"]["duration"]["slope_per_day"] == pytest.approx(0.5)
+        assert trends["metrics"]["quality"]["slope_per_day"] == 0
+    
+    def test_rolling_uses_calendar_days(self):
+        """Окно считается по дням, а не по числу записей; записи за один день усредняются вместе."""
+        trends = compute_trends(_series([0, 1, 1, 20], [4.0, 6.0, 8.0, 9.0], [5, 5, 5, 5]))
+        
+        metric = trends["metrics"]["duration"]
+        assert metric["rolling_7d"] == 9.0
+        assert metric["rolling_30d"] == pytest.approx(27.0 / 4, abs=0.01)
+    
+    def test_week_over_week(self):
+        """Сравнение последних 7 дней с предыдущими семью."""
+        duration = [6.0] * 7 + [7.0] * 7
+        trends = compute_trends(_series(range(14), duration, [5] * 14))
+        
+        week = trends["metrics"]["duration"]["week_over_week"]
+        assert week == {"current": 7.0, "previous": 6.0, "delta": 1.0}
+    
+    def test_short_history_has_no_previous_week(self):
+        """При истории короче недели предыдущей недели нет."""
+        trends = compute_trends(_series([0, 1], [6.0, 7.0], [5, 6]))
+        
+        week = trends["metrics"]["duration"]["week_over_week"]
+        assert week["previous"] is None
+        assert week["delta"] is None
+    
+    def test_missing_phases(self):
+        """Пропуски фаз не участвуют в расчете, фаза без данных - None."""
+        trends = compute_trends(_series([0, 1, 2], [6.0, 7.0, 8.0], [5, 6, 7], rem=[1.0, np.nan, 2.0]))
+        
+        assert trends["metrics"]["rem_sleep"]["count"] == 2
+        assert trends["metrics"]["rem_sleep"]["mean"] == 1.5
+        assert trends["metrics"]["deep_sleep"] is None
+    
+    def test_daily_series_limited(self):
+        """Ряд по дням содержит не больше days последних дней."""
+        trends = compute_trends(_series(range(40), [7.0] * 40, [6] * 40), days=10)
+        
+        assert len(trends["daily"]) == 10
+        assert trends["daily"][-1]["date"] == "2024-02-09"
+        assert trends["daily"][-1]["duration_30d"] == 7.0
+        assert trends["last_date"] == "2024-02-09"
+
+
+class TestLoadSeries:
+    """Тесты выборки ночей в массивы."""
+    
+    def test_no_records(self, db_session, test_user):
+        """Без записей ряда нет."""
+        assert load_series(db_session, test_user.id) is None
+    
+    def test_columns_ordered_by_date(self, db_session, test_user):
+        """Записи упорядочены по дате, NULL фаз превращается в NaN."""
+        start = datetime(2024, 3, 10, 23, 0)
+        for day, duration in ((2, 8.0), (0, 6.0)):
+            night = start + timedelta(days=day)
+            db_session.add(SleepRecord(
+                user_id=test_user.id, sleep_date=night, sleep_start=night,
+                sleep_end=night + timedelta(hours=duration), duration=duration, quality=7,
+            ))
+        db_session.commit()
+        
+        series = load_series(db_session, test_user.id)
+        
+        assert series.first_date == np.datetime64("2024-03-10")
+        assert series.days.tolist() == [0, 2]
+        assert series.values.shape == (len(METRICS), 2)
+        assert series.values[0].tolist() == [6.0, 8.0]
+        assert np.isnan(series.values[METRICS.index("rem_sleep")]).all()